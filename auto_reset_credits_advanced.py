@@ -4,761 +4,5223 @@ Automatic Credit Reset Script for gaccode.com (Advanced Version with Config File
 This script automates the process of creating a credit refill request ticket.
 """
 
-import requests
 import json
+import re
 import time
 import os
 import sys
 import argparse
-import smtplib
-from datetime import datetime, timezone
+import base64
+import hashlib
+import random
+import threading
+import queue
+import atexit
+import logging
+import contextvars
+import signal
+import sqlite3
+import tempfile
+import stat
+import gzip
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import asynccontextmanager, closing, contextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.header import Header
+from urllib.parse import urlsplit
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
-class CreditResetBot:
+
+# Console output goes through this logger. Messages keep the classic
+# "[INFO] ..." text; the formatters decide how it is shown.
+logger = logging.getLogger('gaccode')
+
+# Account of the current fleet run (thread or asyncio task), added to every line
+LOG_ACCOUNT = contextvars.ContextVar('log_account', default=None)
+
+LOG_TAG = re.compile(r'^\[([A-Z][A-Z0-9 .-]*)\] ')
+
+LOG_LEVELS = {'debug': logging.DEBUG, 'info': logging.INFO, 'warning': logging.WARNING, 'error': logging.ERROR}
+
+
+class AccountContextFilter(logging.Filter):
+    """Attach the current LOG_ACCOUNT to each record (runs in the logging thread or task)"""
+    
+    def filter(self, record):
+        record.account = LOG_ACCOUNT.get()
+        return True
+
+
+class ConsoleFormatter(logging.Formatter):
+    """The script's console look: messages as written, prefixed with the account in fleet runs"""
+    
+    def format(self, record):
+        message = record.getMessage()
+        account = getattr(record, 'account', None)
+        if account:
+            text = message.lstrip('\n')
+            message = f"{message[:len(message) - len(text)]}[{account}] {text}"
+        return message
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, account, tag ("STEP 1", "FLEET", ...) and message"""
+    
+    def format(self, record):
+        message = record.getMessage().strip('\n')
+        match = LOG_TAG.match(message)
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname.lower(),
+            'account': getattr(record, 'account', None),
+            'tag': match.group(1) if match else None,
+            'message': message[match.end():] if match else message.strip(),
+        }
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """StreamHandler on whatever sys.stdout is at the time of writing"""
+    
+    def __init__(self):
+        super().__init__(sys.stdout)
+    
+    @property
+    def stream(self):
+        return sys.stdout
+    
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def drop_separators(record):
+    """Filter for structured output: skip the ===== / ----- banner lines"""
+    return bool(record.getMessage().strip('\n=- '))
+
+
+_log_listener = None
+
+
+def configure_logging(fmt='human', level='info', buffered=True):
+    """
+    Set up console output
+    
+    Args:
+        fmt: 'human' (classic console look) or 'json' (one object per line)
+        level: Minimum level: debug, info, warning or error
+        buffered: Hand records to a background thread, so callers never
+            block on a slow terminal or pipe
+    """
+    global _log_listener
+    stop_logging()
+    
+    handler = ConsoleHandler()
+    if fmt == 'json':
+        handler.setFormatter(JSONFormatter())
+        handler.addFilter(drop_separators)
+    else:
+        handler.setFormatter(ConsoleFormatter())
+    
+    for old in list(logger.handlers):
+        logger.removeHandler(old)
+    if buffered:
+        import logging.handlers
+        _log_listener = logging.handlers.QueueListener(queue.SimpleQueue(), handler)
+        _log_listener.start()
+        handler = logging.handlers.QueueHandler(_log_listener.queue)
+    logger.addHandler(handler)
+    logger.setLevel(LOG_LEVELS[level])
+
+
+@contextmanager
+def log_account(name):
+    """Attribute the log lines of the enclosed code (this thread or task) to a fleet account"""
+    token = LOG_ACCOUNT.set(name)
+    try:
+        yield
+    finally:
+        LOG_ACCOUNT.reset(token)
+
+
+def stop_logging():
+    """Write out the buffered records and stop the logging thread"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+logger.propagate = False
+logger.addFilter(AccountContextFilter())
+configure_logging(buffered=False)
+# Registered before the other exit hooks so it runs after them and writes out their output
+atexit.register(stop_logging)
+
+
+# requests (with urllib3, ssl and http.client) is most of this module's import
+# time and only the synchronous bot needs it, so _import_requests() imports it
+# on first use, together with the exception types built on it
+requests = None
+urllib3 = None
+CircuitOpenError = None
+CassetteMiss = None
+
+_requests_lock = threading.Lock()
+
+
+def _import_requests():
+    """Import requests on first use (CreditResetBot, shared connection pool)"""
+    global requests, urllib3, CircuitOpenError, CassetteMiss
+    with _requests_lock:
+        if requests is None:
+            import urllib3 as urllib3_module
+            import requests as requests_module
+            
+            class CircuitOpenError(requests_module.exceptions.ConnectionError):
+                """Request refused locally because the endpoint's circuit breaker is open"""
+            
+            class CassetteMiss(requests_module.exceptions.ConnectionError):
+                """Request that the replayed cassette has no response for"""
+            
+            urllib3 = urllib3_module
+            requests = requests_module
+    return requests
+
+
+# Connection pool shared by all CreditResetBot instances in this process
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+_shared_adapter = None
+_shared_adapter_lock = threading.Lock()
+
+
+def get_shared_adapter(pool_connections=None, pool_maxsize=None):
+    """
+    Get the process-wide HTTP adapter holding the keep-alive connection pools
+    
+    The first caller sizes the pools; use configure_http_pool() to resize
+    them before bots are created (e.g. to match the fleet worker count).
+    
+    Args:
+        pool_connections: Number of per-host pools to cache
+        pool_maxsize: Maximum number of connections kept per host
+    
+    Returns:
+        requests.adapters.HTTPAdapter: Shared adapter
+    """
+    global _shared_adapter
+    _import_requests()
+    with _shared_adapter_lock:
+        if _shared_adapter is None:
+            _shared_adapter = requests.adapters.HTTPAdapter(
+                pool_connections=pool_connections or DEFAULT_POOL_CONNECTIONS,
+                pool_maxsize=pool_maxsize or DEFAULT_POOL_MAXSIZE
+            )
+        return _shared_adapter
+
+
+def configure_http_pool(pool_connections=None, pool_maxsize=None):
+    """
+    (Re)create the shared HTTP adapter with the given pool sizes
+    
+    Args:
+        pool_connections: Number of per-host pools to cache
+        pool_maxsize: Maximum number of connections kept per host
+    """
+    global _shared_adapter
+    _import_requests()
+    with _shared_adapter_lock:
+        if _shared_adapter is not None:
+            _shared_adapter.close()
+        _shared_adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_connections or DEFAULT_POOL_CONNECTIONS,
+            pool_maxsize=pool_maxsize or DEFAULT_POOL_MAXSIZE
+        )
+
+
+# HTTP statuses worth retrying (rate limited or transient server errors)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Per-endpoint retry policy defaults, keyed by "METHOD /path" (ids become {id}).
+# Reads retry freely; creating a ticket is not idempotent, so it is only
+# retried when the request provably never reached the server.
+DEFAULT_RETRY_POLICIES = {
+    'POST /tickets': {'idempotent': False},
+}
+
+
+class RetryBudget:
+    """Thread-safe cap on the total number of retries of a run (or fleet run)"""
+    
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+    
+    def try_spend(self):
+        """Take one retry from the budget; False once it is exhausted"""
+        with self._lock:
+            if self.used >= self.limit:
+                return False
+            self.used += 1
+            return True
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header (delta-seconds or HTTP date)
+    
+    Returns:
+        float: Seconds to wait, or None if absent/invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def request_never_sent(error):
+    """Whether a requests exception proves the request never reached the server"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        reason = getattr(error.args[0], 'reason', None)
+        return isinstance(reason, urllib3.exceptions.NewConnectionError)
+    return False
+
+
+# Request rate limits (requests per second and burst), keyed like the retry
+# policies. Endpoints without an entry share the host-wide '*' bucket;
+# creating tickets and logging in get stricter buckets of their own.
+DEFAULT_RATE_LIMITS = {
+    '*': {'rate': 20, 'burst': 40},
+    'POST /tickets': {'rate': 2, 'burst': 10},
+    'POST /login': {'rate': 1, 'burst': 5},
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that adapts to 429 responses
+    
+    Callers reserve a token and sleep for the returned delay, so waiting
+    works the same for threads and coroutines. A 429 halves the rate and
+    holds the bucket for Retry-After; successful responses then raise the
+    rate again step by step (AIMD) up to the configured rate.
+    """
+    
+    def __init__(self, rate, burst):
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+    
+    def reserve(self):
+        """
+        Take one token
+        
+        Returns:
+            float: Seconds to wait before sending the request
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(delay, self.blocked_until - now)
+    
+    def backlog(self, count):
+        """Seconds until count more requests can be sent (without taking tokens)"""
+        with self._lock:
+            now = time.monotonic()
+            tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            return max(0.0, (count - tokens) / self.rate, self.blocked_until - now)
+    
+    def penalize(self, retry_after=None):
+        """Slow down after a 429 (Too Many Requests)"""
+        with self._lock:
+            self.rate = max(self.base_rate / 16, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+    
+    def reward(self):
+        """Recover the rate after a successful response"""
+        if self.rate < self.base_rate:
+            with self._lock:
+                self.rate = min(self.base_rate, self.rate + self.base_rate / 20)
+
+
+class RateLimiter:
+    """Token buckets shared by every bot in the process, per API host and endpoint"""
+    
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+    
+    def bucket(self, base_url, name, rate, burst):
+        """
+        Get the shared bucket of an endpoint (created with rate/burst on first use)
+        
+        Args:
+            base_url: API base URL (one set of buckets per host)
+            name: Endpoint key, or '*' for the host-wide bucket
+        """
+        with self._lock:
+            key = (base_url, name)
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(rate, burst)
+            return self._buckets[key]
+
+
+RATE_LIMITER = RateLimiter()
+
+
+# Responses that count as an API failure for the circuit breakers
+CIRCUIT_FAILURE_STATUS = {500, 502, 503, 504}
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker of one API endpoint
+    
+    Opens after failure_threshold consecutive failures; requests are then
+    refused without being sent. After reset_timeout one probe request is let
+    through (half-open): its success closes the breaker, its failure keeps
+    it open for another reset_timeout.
+    """
+    
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probe_at = None
+        self._lock = threading.Lock()
+    
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+    
+    def allow(self):
+        """Whether a request may be sent now (True for the half-open probe)"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            # A probe that never reported back does not block forever
+            if self.probe_at is not None and now - self.probe_at < self.reset_timeout:
+                return False
+            self.probe_at = now
+            return True
+    
+    def record_success(self):
+        """
+        Returns:
+            bool: True if this closed an open breaker
+        """
+        with self._lock:
+            was_open = self.opened_at is not None
+            self.failures = 0
+            self.opened_at = self.probe_at = None
+            return was_open
+    
+    def record_failure(self):
+        """
+        Returns:
+            bool: True if this opened the breaker
+        """
+        with self._lock:
+            self.failures += 1
+            if self.opened_at is not None:
+                # Failed probe: stay open for another period
+                self.opened_at = time.monotonic()
+                self.probe_at = None
+                return False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+    
+    def retry_in(self):
+        """Seconds until the breaker lets a probe through (0 if closed)"""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+
+class CircuitBreakers:
+    """
+    Circuit breakers shared by every bot in the process, per API host and
+    endpoint, with one outage alert per host
+    """
+    
+    def __init__(self):
+        self._breakers = {}
+        self._alerted = set()
+        self._lock = threading.Lock()
+    
+    def breaker(self, base_url, endpoint, failure_threshold=5, reset_timeout=30):
+        """Get the shared breaker of an endpoint (created with the given settings on first use)"""
+        with self._lock:
+            key = (base_url, endpoint)
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(failure_threshold, reset_timeout)
+            return self._breakers[key]
+    
+    def outage_started(self, base_url):
+        """Whether an opening breaker starts a new outage of the host (alert once)"""
+        with self._lock:
+            if base_url in self._alerted:
+                return False
+            self._alerted.add(base_url)
+            return True
+    
+    def outage_over(self, base_url):
+        """Whether no breaker of the host is open any more"""
+        with self._lock:
+            if any(b.is_open for (url, _), b in self._breakers.items() if url == base_url):
+                return False
+            self._alerted.discard(base_url)
+            return True
+    
+    def retry_in(self):
+        """Seconds until every open breaker lets a probe through"""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return max([b.retry_in() for b in breakers], default=0.0)
+
+
+CIRCUIT_BREAKERS = CircuitBreakers()
+
+
+# Response headers kept in cassettes (the bot reads nothing else; Date feeds ClockSkew)
+CASSETTE_HEADERS = ('content-type', 'retry-after', 'etag', 'last-modified', 'date')
+
+# JSON keys whose values never reach a cassette
+CASSETTE_REDACTED_KEYS = {'password', 'email', 'token', 'accessToken', 'refreshToken'}
+
+ISO_DATE = re.compile(r'\b(\d{4}-\d{2}-\d{2})(?=T\d{2}:)')
+
+
+class HTTPCassette:
+    """
+    Record/replay of the HTTP traffic of CreditResetBot
+    
+    In record mode every response is captured with its timing; secrets
+    (password, email, auth tokens) are redacted and only the headers the bot
+    reads are kept. In replay mode requests are answered from the cassette
+    without touching the network: responses are matched by method and path
+    in recorded order, the last GET response of a path repeats (status polls),
+    dates in the bodies are moved by whole days so "today" in the
+    recording is today at replay time, and Date headers are moved to the
+    replay clock keeping the server clock offset of the recording. A *.gz
+    path is gzip-compressed.
+    """
+    
+    def __init__(self, path, mode='replay', keep_timing=False, secrets=()):
+        """
+        Args:
+            path: Cassette file
+            mode: 'record' or 'replay'
+            keep_timing: Replay each response after its recorded duration
+            secrets: Extra strings to redact wherever they appear
+        """
+        self.path = path
+        self.mode = mode
+        self.keep_timing = keep_timing
+        self.secrets = [secret for secret in secrets if secret]
+        self.lock = threading.Lock()
+        self.interactions = []
+        self.misses = 0
+        self.started = time.monotonic()
+        self.recorded_at = datetime.now(timezone.utc).isoformat()
+        
+        if mode == 'replay':
+            opener = gzip.open if str(path).endswith('.gz') else open
+            with opener(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            self.recorded_at = data['recorded_at']
+            self.interactions = data['interactions']
+            recorded_day = datetime.fromisoformat(self.recorded_at).date()
+            self.day_shift = (datetime.now(timezone.utc).date() - recorded_day).days
+            self._queues = {}
+            for interaction in self.interactions:
+                self._queues.setdefault((interaction['method'], interaction['path']), []).append(interaction)
+            self._served = 0
+    
+    @staticmethod
+    def request_path(url):
+        parts = urlsplit(url)
+        return parts.path + (f"?{parts.query}" if parts.query else '')
+    
+    @staticmethod
+    def redact_token(token):
+        """Placeholder JWT that keeps only the exp claim, so expiry handling still works"""
+        expiry = TokenManager.token_expiry(token)
+        claims = {'exp': int(expiry.timestamp())} if expiry else {}
+        encode = lambda data: base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+        return f"{encode({'alg': 'none'})}.{encode(claims)}.redacted"
+    
+    def redact(self, value, key=None):
+        if isinstance(value, dict):
+            return {k: self.redact(v, k) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.redact(v) for v in value]
+        if key in CASSETTE_REDACTED_KEYS and isinstance(value, str):
+            if key == 'email':
+                return 'redacted@example.com'
+            return self.redact_token(value) if 'token' in key.lower() else 'REDACTED'
+        return value
+    
+    def redact_body(self, text):
+        try:
+            text = json.dumps(self.redact(json.loads(text)), ensure_ascii=False, separators=(',', ':'))
+        except ValueError:
+            pass
+        for secret in self.secrets:
+            text = text.replace(secret, 'REDACTED')
+        return text
+    
+    def record(self, request, response, elapsed):
+        headers = {k: v for k, v in response.headers.items() if k.lower() in CASSETTE_HEADERS}
+        interaction = {
+            'method': request.method,
+            'path': self.request_path(request.url),
+            'status': response.status_code,
+            'headers': headers,
+            'body': self.redact_body(response.text),
+            'elapsed': round(elapsed, 4),
+            'at': round(time.monotonic() - self.started - elapsed, 4),
+        }
+        with self.lock:
+            self.interactions.append(interaction)
+    
+    def shift_dates(self, text):
+        if not self.day_shift:
+            return text
+        shift = timedelta(days=self.day_shift)
+        return ISO_DATE.sub(lambda m: (datetime.strptime(m.group(1), '%Y-%m-%d') + shift).strftime('%Y-%m-%d'), text)
+    
+    def shift_date_header(self, value, interaction):
+        """Date header moved by the time passed since the response was recorded"""
+        from email.utils import parsedate_to_datetime, format_datetime
+        try:
+            server_time = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return value
+        if server_time.tzinfo is None:
+            server_time = server_time.replace(tzinfo=timezone.utc)
+        received_at = datetime.fromisoformat(self.recorded_at) + timedelta(
+            seconds=interaction['at'] + interaction['elapsed'])
+        shifted = server_time + (datetime.now(timezone.utc) - received_at)
+        return format_datetime(shifted.astimezone(timezone.utc), usegmt=True)
+    
+    def play(self, request):
+        """
+        Recorded response of a request
+        
+        Raises:
+            CassetteMiss: The cassette has no (more) responses for the request
+        """
+        key = (request.method, self.request_path(request.url))
+        with self.lock:
+            recorded = self._queues.get(key)
+            if not recorded or (len(recorded) == 1 and request.method != 'GET' and recorded[0].get('_served')):
+                self.misses += 1
+                raise CassetteMiss(f"{key[0]} {key[1]} not in cassette {self.path}", request=request)
+            interaction = recorded.pop(0) if len(recorded) > 1 else recorded[0]
+            interaction['_served'] = True
+            self._served += 1
+        
+        if self.keep_timing and interaction['elapsed'] > 0:
+            time.sleep(interaction['elapsed'])
+        
+        from http import HTTPStatus
+        
+        response = requests.Response()
+        response.status_code = interaction['status']
+        try:
+            response.reason = HTTPStatus(interaction['status']).phrase
+        except ValueError:
+            response.reason = ''
+        response.headers = requests.structures.CaseInsensitiveDict(interaction['headers'])
+        if 'Date' in response.headers:
+            response.headers['Date'] = self.shift_date_header(response.headers['Date'], interaction)
+        response._content = self.shift_dates(interaction['body']).encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+    
+    def save(self):
+        """Write the recorded cassette"""
+        with self.lock:
+            data = {
+                'version': 1,
+                'recorded_at': self.recorded_at,
+                'interactions': list(self.interactions),
+            }
+        opener = gzip.open if str(self.path).endswith('.gz') else open
+        with opener(self.path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        logger.info(f"[INFO] Recorded {len(data['interactions'])} HTTP interaction(s) to {self.path}")
+    
+    def summary(self):
+        if self.mode == 'record':
+            return f"{len(self.interactions)} interaction(s) recorded"
+        return f"{self._served} response(s) replayed, {self.misses} miss(es)"
+
+
+class CassetteAdapter:
+    """
+    Transport adapter (the send/close interface of requests.adapters.BaseAdapter)
+    that records through, or replays instead of, the real adapter
+    """
+    
+    def __init__(self, cassette, adapter):
+        self.cassette = cassette
+        self.adapter = adapter
+    
+    def send(self, request, **kwargs):
+        if self.cassette.mode == 'replay':
+            return self.cassette.play(request)
+        started = time.monotonic()
+        response = self.adapter.send(request, **kwargs)
+        self.cassette.record(request, response, time.monotonic() - started)
+        return response
+    
+    def close(self):
+        pass  # the wrapped adapter is the shared pool
+
+
+# Lock files of file_lock(), per user, so none are left next to config files
+LOCK_DIR = os.path.join(tempfile.gettempdir(),
+                        f"gaccode-locks-{os.getuid()}" if hasattr(os, 'getuid') else 'gaccode-locks')
+
+# In-process locks backing file_lock(), one per lock file
+_file_locks = {}
+_file_locks_lock = threading.Lock()
+
+
+def lock_file_path(path):
+    """Lock file of path in LOCK_DIR, named after the file and a hash of its absolute path"""
+    path = os.path.abspath(path)
+    digest = hashlib.sha256(os.path.normcase(path).encode('utf-8')).hexdigest()[:16]
+    os.makedirs(LOCK_DIR, mode=0o700, exist_ok=True)
+    return os.path.join(LOCK_DIR, f"{os.path.basename(path)}.{digest}.lock")
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive lock for path across threads and processes
+    
+    The lock is taken on a side file in LOCK_DIR rather than on path, so the
+    protected file itself can be replaced while the lock is held.
+    """
+    lock_path = lock_file_path(path)
+    with _file_locks_lock:
+        thread_lock = _file_locks.setdefault(lock_path, threading.Lock())
+    
+    with thread_lock, open(lock_path, 'a+b') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ~10 seconds; keep waiting
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write_json(path, data, mode=None):
+    """
+    Replace a JSON file atomically (temp file, fsync, rename)
+    
+    Readers and crashes see either the old or the new content, never a
+    truncated file. Call with file_lock(path) held if there can be several
+    writers.
+    
+    Args:
+        path: File to replace
+        data: JSON-serializable data
+        mode: File permissions (default: keep those of the existing file)
+    """
+    atomic_write_text(path, json.dumps(data, indent=2, ensure_ascii=False), mode)
+
+
+def atomic_write_text(path, text, mode=None):
+    """
+    Replace a text file atomically, like atomic_write_json()
+    
+    Args:
+        path: File to replace
+        text: New content
+        mode: File permissions (default: keep those of the existing file)
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        if mode is None:
+            try:
+                mode = stat.S_IMODE(os.stat(path).st_mode)
+            except OSError:
+                mode = 0o600  # new file, may hold credentials
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    
+    # Make the rename itself durable (POSIX only)
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+# Per-account token cache, kept next to the config file
+TOKEN_CACHE_FILENAME = '.gac_token_cache.json'
+
+
+class TokenManager:
+    """
+    Token lifecycle of one account: JWT expiry, proactive refresh and a
+    token cache that survives between runs
+    
+    One instance is shared by every bot of the same account in the process,
+    so concurrent 401s or an expiring token trigger a single login.
+    """
+    
+    _instances = {}
+    _instances_lock = threading.Lock()
+    
+    def __init__(self, account, cache_path=None, refresh_margin=300):
+        """
+        Args:
+            account: Account identifier (login email), None disables caching
+            cache_path: Token cache file, None disables caching
+            refresh_margin: Refresh tokens expiring within this many seconds
+        """
+        self.account = account
+        self.cache_path = cache_path
+        self.refresh_margin = refresh_margin
+        self.token = None  # latest token obtained in this process
+        self.lock = threading.Lock()
+    
+    @classmethod
+    def for_account(cls, account, cache_path=None, refresh_margin=300):
+        """Get the process-wide token manager of an account"""
+        if not account:
+            return cls(None, None, refresh_margin)
+        with cls._instances_lock:
+            key = (account, cache_path)
+            if key not in cls._instances:
+                cls._instances[key] = cls(account, cache_path, refresh_margin)
+            return cls._instances[key]
+    
+    @staticmethod
+    def token_expiry(token):
+        """
+        Read the expiry ('exp' claim) of a JWT without verifying it
+        
+        Returns:
+            datetime: Expiry in UTC, or None if the token is not a JWT with exp
+        """
+        parts = (token or '').split('.')
+        if len(parts) != 3:
+            return None
+        try:
+            payload = base64.urlsafe_b64decode(parts[1] + '=' * (-len(parts[1]) % 4))
+            return datetime.fromtimestamp(float(json.loads(payload)['exp']), timezone.utc)
+        except (ValueError, KeyError, TypeError):
+            return None
+    
+    def expires_soon(self, token):
+        """Whether a JWT expires within the refresh margin (False if unknown)"""
+        expiry = self.token_expiry(token)
+        if expiry is None:
+            return False
+        return expiry - datetime.now(timezone.utc) <= timedelta(seconds=self.refresh_margin)
+    
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def load_cached(self):
+        """
+        Get the cached token of this account
+        
+        Returns:
+            str: Cached token, or None if there is none or it is about to expire
+        """
+        if not self.account or not self.cache_path:
+            return None
+        token = self._read_cache().get(self.account)
+        if token and not self.expires_soon(token):
+            return token
+        return None
+    
+    def store(self, token):
+        """Remember a new token in memory and in the cache file"""
+        self.token = token
+        if not self.account or not self.cache_path:
+            return
+        
+        try:
+            with file_lock(self.cache_path):
+                cache = self._read_cache()
+                if cache.get(self.account) == token:
+                    return
+                cache[self.account] = token
+                atomic_write_json(self.cache_path, cache, mode=0o600)
+        except OSError as e:
+            logger.warning(f"[WARNING] Failed to update token cache {self.cache_path}: {e}")
+
+
+# Local per-account state database, kept next to the config file
+STATE_DB_FILENAME = '.gac_state.db'
+
+
+class StateStore:
+    """
+    Persistent local state per account (SQLite)
+    
+    Records the last successful reset (time and ticket id), the last
+    subscription snapshot and the last balance, so run() can skip network
+    checks whose answer is already known locally.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS account_state (
+                    account TEXT PRIMARY KEY,
+                    last_reset_at TEXT,
+                    last_ticket_id TEXT,
+                    subscription TEXT,
+                    subscription_at TEXT,
+                    balance TEXT,
+                    balance_at TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS seen_announcements (
+                    account TEXT,
+                    fingerprint TEXT,
+                    seen_at TEXT,
+                    PRIMARY KEY (account, fingerprint)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ticket_journal (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    account TEXT,
+                    day TEXT,
+                    state TEXT,
+                    ticket_id TEXT,
+                    created_at TEXT,
+                    updated_at TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body TEXT,
+                    stored_at TEXT
+                )
+            """)
+    
+    def _connect(self):
+        # One short-lived connection per operation keeps the store thread-safe
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def get(self, account):
+        """
+        Get the recorded state of an account
+        
+        Returns:
+            dict: Column values (JSON columns decoded), empty if unknown
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM account_state WHERE account = ?", (account,)).fetchone()
+        if row is None:
+            return {}
+        state = dict(row)
+        for key in ('subscription', 'balance'):
+            if state[key] is not None:
+                state[key] = json.loads(state[key])
+        return state
+    
+    def update(self, account, **values):
+        """Set some columns of an account's state"""
+        columns = list(values)
+        params = [json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v for v in values.values()]
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR IGNORE INTO account_state (account) VALUES (?)", (account,))
+            conn.execute(
+                f"UPDATE account_state SET {', '.join(f'{c} = ?' for c in columns)} WHERE account = ?",
+                params + [account]
+            )
+    
+    def record_reset(self, account, reset_at, ticket_id=None):
+        self.update(account, last_reset_at=reset_at, last_ticket_id=None if ticket_id is None else str(ticket_id))
+    
+    def record_subscription(self, account, subscription):
+        self.update(account, subscription=subscription, subscription_at=utc_now_iso())
+    
+    def record_balance(self, account, balance):
+        self.update(account, balance=balance, balance_at=utc_now_iso())
+    
+    def seen_fingerprints(self, account, fingerprints):
+        """Subset of fingerprints already recorded for an account"""
+        if not fingerprints:
+            return set()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT fingerprint FROM seen_announcements WHERE account = ? "
+                f"AND fingerprint IN ({', '.join('?' * len(fingerprints))})",
+                [account] + list(fingerprints)
+            ).fetchall()
+        return {row['fingerprint'] for row in rows}
+    
+    def mark_seen(self, account, fingerprints):
+        now = utc_now_iso()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO seen_announcements (account, fingerprint, seen_at) VALUES (?, ?, ?)",
+                [(account, fingerprint, now) for fingerprint in fingerprints]
+            )
+    
+    def journal_intent(self, account):
+        """
+        Durably record that a ticket is about to be submitted
+        
+        Returns:
+            int: Journal entry id
+        """
+        now = utc_now_iso()
+        with closing(self._connect()) as conn, conn:
+            # The intent must be on disk before POST /tickets is sent
+            conn.execute("PRAGMA synchronous=FULL")
+            cursor = conn.execute(
+                "INSERT INTO ticket_journal (account, day, state, created_at, updated_at) VALUES (?, ?, 'intent', ?, ?)",
+                (account, datetime.now(timezone.utc).date().isoformat(), now, now)
+            )
+            return cursor.lastrowid
+    
+    def journal_update(self, entry_id, state, ticket_id=None):
+        """Move a journal entry to a new state (keeping a known ticket id)"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.execute(
+                "UPDATE ticket_journal SET state = ?, ticket_id = COALESCE(?, ticket_id), updated_at = ? WHERE id = ?",
+                (state, None if ticket_id is None else str(ticket_id), utc_now_iso(), entry_id)
+            )
+    
+    def journal_in_flight(self, account):
+        """Journal entries of an account whose submission outcome is unknown"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT * FROM ticket_journal WHERE account = ? AND state = 'intent' ORDER BY id", (account,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def get_http_cache(self, url):
+        """Cached validators (etag, last_modified) and body of a URL, or None"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM http_cache WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+    
+    def put_http_cache(self, url, etag, last_modified, body):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO http_cache (url, etag, last_modified, body, stored_at) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body, utc_now_iso())
+            )
+
+
+class LeaseBackend:
+    """
+    Shared store of account-day leases used to coordinate several runners
+    
+    Implementations must make acquire() atomic across processes and hosts.
+    Register new backends in LEASE_BACKENDS to make them available to
+    --lease-db as '<scheme>:<location>'.
+    """
+    
+    def acquire(self, key, owner, ttl):
+        """
+        Claim a lease unless another owner holds it (unexpired) or it is done
+        
+        Returns:
+            tuple: (acquired, holder) - holder is the blocking lease (dict
+                with owner, expires_at, done) when not acquired
+        """
+        raise NotImplementedError
+    
+    def renew(self, key, owner, ttl):
+        """Extend a lease held by owner; False if it was lost"""
+        raise NotImplementedError
+    
+    def release(self, key, owner, done=False):
+        """Give a lease up; done=True keeps it forever so nobody runs the account-day again"""
+        raise NotImplementedError
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """
+    Leases in a SQLite database, usable from many processes and, over a
+    shared path, from several hosts (whose clocks must be in sync)
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            # No WAL: it does not work on network file systems
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    key TEXT PRIMARY KEY,
+                    owner TEXT,
+                    expires_at REAL,
+                    done INTEGER DEFAULT 0,
+                    updated_at TEXT
+                )
+            """)
+    
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def acquire(self, key, owner, ttl):
+        now = time.time()
+        with closing(self._connect()) as conn:
+            # Take the write lock before reading, so check-and-set is atomic
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT * FROM leases WHERE key = ?", (key,)).fetchone()
+                if row is not None and (row['done'] or (row['owner'] != owner and row['expires_at'] > now)):
+                    conn.execute("ROLLBACK")
+                    return False, dict(row)
+                if row is not None and row['owner'] != owner:
+                    logger.info(f"[INFO] Taking over expired lease {key} from {row['owner']}")
+                conn.execute(
+                    "INSERT OR REPLACE INTO leases (key, owner, expires_at, done, updated_at) VALUES (?, ?, ?, 0, ?)",
+                    (key, owner, now + ttl, utc_now_iso())
+                )
+                conn.execute("COMMIT")
+                return True, None
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def renew(self, key, owner, ttl):
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE leases SET expires_at = ?, updated_at = ? WHERE key = ? AND owner = ? AND done = 0",
+                (time.time() + ttl, utc_now_iso(), key, owner)
+            )
+            return cursor.rowcount == 1
+    
+    def release(self, key, owner, done=False):
+        with closing(self._connect()) as conn:
+            if done:
+                conn.execute(
+                    "UPDATE leases SET done = 1, updated_at = ? WHERE key = ? AND owner = ?",
+                    (utc_now_iso(), key, owner)
+                )
+            else:
+                conn.execute("DELETE FROM leases WHERE key = ? AND owner = ? AND done = 0", (key, owner))
+
+
+# Lease backends by --lease-db scheme
+LEASE_BACKENDS = {
+    'sqlite': SQLiteLeaseBackend,
+}
+
+
+def open_lease_backend(spec):
+    """
+    Open the lease backend named by spec
+    
+    Args:
+        spec: '<scheme>:<location>' for a registered backend (e.g.
+            'sqlite:///shared/leases.db'), or a plain SQLite file path
+    
+    Returns:
+        LeaseBackend: The backend
+    """
+    scheme, sep, location = spec.partition(':')
+    if sep and scheme in LEASE_BACKENDS:
+        if location.startswith('//'):
+            location = location[2:]
+        return LEASE_BACKENDS[scheme](location)
+    return SQLiteLeaseBackend(spec)
+
+
+class Lease:
+    """An account-day lease claimed (or not) by this runner"""
+    
+    def __init__(self, key, holder=None):
+        self.key = key
+        self.holder = holder  # blocking lease if not acquired
+        self.done = False     # set when the account-day must not run again
+        self._stop = None
+    
+    @property
+    def acquired(self):
+        return self.holder is None
+
+
+class LeaseCoordinator:
+    """
+    Splits a fleet between runners (processes or hosts) without two of
+    them ever resetting the same account on the same UTC day
+    
+    Accounts are sharded deterministically by a hash of their email, and
+    before a run the runner claims the account-day lease from the shared
+    backend. A heartbeat renews the lease while the run is in flight; the
+    lease of a crashed runner expires after ttl and can be taken over.
+    """
+    
+    def __init__(self, backend, owner=None, ttl=600, shard=None):
+        """
+        Args:
+            backend: LeaseBackend shared by all runners (None: sharding only)
+            owner: Runner id (default: hostname-pid)
+            ttl: Lease lifetime in seconds, renewed every ttl/3 while running
+            shard: (index, count) - only run accounts of this shard
+        """
+        import socket
+        
+        self.backend = backend
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}"
+        self.ttl = ttl
+        self.shard = shard
+    
+    @staticmethod
+    def account_key(name, config):
+        """Identity of an account across runners (its email, or the config name)"""
+        return (config or {}).get('email') or name
+    
+    def in_shard(self, key):
+        if not self.shard:
+            return True
+        index, count = self.shard
+        return int(hashlib.sha256(key.encode('utf-8')).hexdigest(), 16) % count == index
+    
+    def shard_accounts(self, accounts):
+        """Keep the (name, config, config_file_path, error) entries of this runner's shard"""
+        if not self.shard:
+            return accounts
+        mine = [entry for entry in accounts if self.in_shard(self.account_key(entry[0], entry[1]))]
+        logger.info(f"[INFO] Shard {self.shard[0]}/{self.shard[1]}: {len(mine)} of {len(accounts)} account(s)")
+        return mine
+    
+    def acquire(self, key, day=None):
+        """
+        Claim the lease of an account for a UTC day and keep it alive while held
+        
+        Args:
+            key: Account key (account_key())
+            day: UTC date the run resets credits for (default: today)
+        
+        Returns:
+            Lease: Check lease.acquired; pass it to release() when done
+        """
+        lease_key = f"{key}:{(day or datetime.now(timezone.utc).date()).isoformat()}"
+        if self.backend is None:
+            return Lease(lease_key)  # sharding only
+        acquired, holder = self.backend.acquire(lease_key, self.owner, self.ttl)
+        lease = Lease(lease_key, holder)
+        if not acquired:
+            return lease
+        
+        lease._stop = threading.Event()
+        
+        def heartbeat():
+            while not lease._stop.wait(self.ttl / 3):
+                if not self.backend.renew(lease_key, self.owner, self.ttl):
+                    logger.warning(f"[WARNING] Lost lease {lease_key}")
+                    return
+        
+        threading.Thread(target=heartbeat, name=f'lease-{key}', daemon=True).start()
+        return lease
+    
+    def release(self, lease):
+        if not lease.acquired or lease._stop is None:
+            return
+        lease._stop.set()
+        self.backend.release(lease.key, self.owner, done=lease.done)
+    
+    @staticmethod
+    def blocked_result(name, lease):
+        """Fleet result of an account whose lease is held by another runner"""
+        holder = lease.holder
+        if holder['done']:
+            return {'account': name, 'status': 'already_reset',
+                    'reason': f"reset today by runner {holder['owner']}", 'duration': 0.0}
+        return {'account': name, 'status': 'leased',
+                'reason': f"claimed by runner {holder['owner']}", 'duration': 0.0}
+
+
+class AnnouncementFeed:
+    """
+    Announcements shared by every bot in the process
+    
+    Announcements are the same for all accounts, so a fleet run fetches them
+    once (per base_url) and reuses the result for ttl seconds.
+    """
+    
+    def __init__(self):
+        self._entries = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+    
+    def _fresh(self, base_url, ttl):
+        entry = self._entries.get(base_url)
+        if entry and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+        return None
+    
+    def get(self, base_url, fetch, ttl):
+        """Get the announcements, calling fetch() at most once at a time"""
+        with self._lock:
+            announcements = self._fresh(base_url, ttl)
+            if announcements is None:
+                announcements = fetch()
+                if announcements is not None:
+                    self._entries[base_url] = (time.monotonic(), announcements)
+            return announcements
+    
+    async def get_async(self, base_url, fetch, ttl):
+        """Coroutine version of get(); concurrent callers await one fetch"""
+        import asyncio
+        
+        announcements = self._fresh(base_url, ttl)
+        if announcements is not None:
+            return announcements
+        
+        task = self._tasks.get(base_url)
+        if task is None or task.done():
+            task = asyncio.ensure_future(fetch())
+            self._tasks[base_url] = task
+        announcements = await asyncio.shield(task)
+        if announcements is not None:
+            self._entries[base_url] = (time.monotonic(), announcements)
+        return announcements
+
+
+ANNOUNCEMENT_FEED = AnnouncementFeed()
+
+
+class AlertDispatcher:
+    """
+    Background email delivery shared by every bot in the process
+    
+    Alerts are queued and sent by a worker thread that keeps one
+    authenticated SMTP connection per server/login open for many messages.
+    In digest mode (email_alerts.digest) alerts are collected instead and
+    folded into one email per recipient when the dispatcher is flushed.
+    """
+    
+    def __init__(self, idle_timeout=30, flush_timeout=30):
+        """
+        Args:
+            idle_timeout: Close SMTP connections idle for this many seconds
+            flush_timeout: Default time limit of flush() (also used at exit);
+                alerts whose email_alerts.flush_timeout is longer extend it
+                until the next flush
+        """
+        self.idle_timeout = idle_timeout
+        self.flush_timeout = flush_timeout
+        self._alert_timeout = None  # longest flush_timeout of the alerts since the last flush
+        self.offline = False  # print alerts instead of sending them (cassette replay)
+        self._queue = queue.Queue()
+        self._digests = {}
+        self._connections = {}
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._worker = None
+    
+    @staticmethod
+    def _server_key(email_config):
+        return (
+            email_config['smtp_server'],
+            email_config.get('smtp_port', 587),
+            email_config['smtp_user'],
+            email_config['smtp_password'],
+        )
+    
+    def submit(self, email_config, subject, body, on_delivered=None):
+        """
+        Queue an alert for delivery (or for the digest)
+        
+        Args:
+            email_config: The account's email_alerts configuration
+            subject: Email subject (without the tool prefix)
+            body: Full email body
+            on_delivered: Called on the worker thread once the email (or the
+                digest carrying it) was sent; never called if sending fails
+        """
+        alert_timeout = email_config.get('flush_timeout', self.flush_timeout)
+        with self._cond:
+            self._alert_timeout = max(self._alert_timeout or 0, alert_timeout)
+        
+        if email_config.get('digest', False):
+            key = (self._server_key(email_config), email_config['from_email'], email_config['to_email'])
+            with self._cond:
+                self._digests.setdefault(key, (email_config, []))[1].append((subject, body, on_delivered))
+            return
+        self._enqueue((email_config, subject, body, [on_delivered] if on_delivered else []))
+    
+    def _enqueue(self, job):
+        with self._cond:
+            self._pending += 1
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+                self._worker.start()
+        self._queue.put(job)
+    
+    def _run(self):
+        while True:
+            try:
+                job = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                self._close_connections()
+                continue
+            
+            try:
+                if job is None:
+                    self._close_connections()
+                else:
+                    email_config, subject, body, callbacks = job
+                    if self._deliver(email_config, subject, body):
+                        for callback in callbacks:
+                            callback()
+            except Exception as e:
+                logger.error(f"[ERROR] Failed to send email: {e}")
+                import traceback
+                logger.debug(f"[DEBUG] Email error details: {traceback.format_exc()}")
+            finally:
+                with self._cond:
+                    self._pending -= 1
+                    self._cond.notify_all()
+    
+    def _connect(self, email_config):
+        import smtplib
+        
+        # Connect to SMTP server based on port
+        smtp_port = email_config.get('smtp_port', 587)
+        
+        if smtp_port == 465:
+            # SSL connection
+            server = smtplib.SMTP_SSL(email_config['smtp_server'], smtp_port, timeout=30)
+        else:
+            # STARTTLS connection (587, 25)
+            server = smtplib.SMTP(email_config['smtp_server'], smtp_port, timeout=30)
+            server.starttls()
+        
+        server.login(email_config['smtp_user'], email_config['smtp_password'])
+        return server
+    
+    def _deliver(self, email_config, subject, body):
+        """
+        Returns:
+            bool: True if the email was sent
+        """
+        if self.offline:
+            logger.info(f"[INFO] Offline, email not sent: {subject}")
+            return False
+        
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+        from email.header import Header
+        
+        # Create email message
+        msg = MIMEMultipart()
+        msg['From'] = email_config['from_email']
+        msg['To'] = email_config['to_email']
+        msg['Subject'] = Header(f"[GAC积分重置工具] {subject}", 'utf-8')
+        msg.attach(MIMEText(body, 'plain', 'utf-8'))
+        
+        key = self._server_key(email_config)
+        for attempt in range(2):
+            server = self._connections.get(key)
+            if server is None:
+                server = self._connections[key] = self._connect(email_config)
+            try:
+                server.sendmail(email_config['from_email'], [email_config['to_email']], msg.as_string())
+                break
+            except smtplib.SMTPServerDisconnected:
+                # Reused connection was closed by the server; reconnect once
+                self._connections.pop(key, None)
+                if attempt:
+                    raise
+        
+        logger.info(f"[SUCCESS] Email sent successfully: {subject}")
+        return True
+    
+    def _close_connections(self):
+        import smtplib
+        
+        for server in self._connections.values():
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+        self._connections.clear()
+    
+    def _queue_digests(self):
+        with self._cond:
+            digests, self._digests = self._digests, {}
+        
+        for email_config, alerts in digests.values():
+            callbacks = [callback for _, _, callback in alerts if callback]
+            if len(alerts) == 1:
+                subject, body, _ = alerts[0]
+                self._enqueue((email_config, subject, body, callbacks))
+                continue
+            body = "\n".join(f"===== {subject} =====\n{body}" for subject, body, _ in alerts)
+            self._enqueue((email_config, f"运行摘要 ({len(alerts)}条通知)", body, callbacks))
+    
+    def flush(self, timeout=None):
+        """
+        Send the digests and wait (bounded) until all queued alerts are delivered
+        
+        Args:
+            timeout: Seconds to wait at most (default: the longest
+                flush_timeout of the alerts queued since the last flush)
+        
+        Returns:
+            bool: True if everything was delivered in time
+        """
+        self._queue_digests()
+        with self._cond:
+            alert_timeout, self._alert_timeout = self._alert_timeout, None
+            if self._pending == 0:
+                return True
+        # Close the SMTP connections once the queue is drained
+        self._enqueue(None)
+        
+        if timeout is None:
+            timeout = self.flush_timeout if alert_timeout is None else alert_timeout
+        with self._cond:
+            done = self._cond.wait_for(lambda: self._pending == 0, timeout=timeout)
+            if not done:
+                logger.warning(f"[WARNING] {self._pending} email alert(s) not delivered within {timeout}s")
+        return done
+
+
+ALERT_DISPATCHER = AlertDispatcher()
+atexit.register(ALERT_DISPATCHER.flush)
+
+
+class RunMetrics:
+    """
+    Timings of one bot run: a timeline of its phases and per-endpoint HTTP
+    statistics (durations, status codes, retries, bytes transferred)
+    
+    Each phase also splits its wall time into HTTP time ('network'), bot
+    sleeps ('sleep') and, for bots running on their own thread, CPU time
+    ('cpu'). With trace set every request and sleep is kept as an event.
+    """
+    
+    def __init__(self, account, cpu_clock=None, trace=False):
+        """
+        Args:
+            account: Account label
+            cpu_clock: CPU time function of the run's thread (time.thread_time), if any
+            trace: Keep individual request and sleep events
+        """
+        self.account = account
+        self.started_at = datetime.now(timezone.utc)
+        self.phases = []     # {'phase', 'start', 'duration', 'network', 'sleep', 'cpu'} in run order
+        self.endpoints = {}  # endpoint key -> statistics
+        self.events = [] if trace else None  # {'name', 'cat', 'start', 'duration'}
+        self.status = self.reason = self.duration = None
+        self.prepared_late = None  # boundary runs: seconds preparation ran past 00:00 UTC
+        self.lock = threading.Lock()
+        self.cpu_clock = cpu_clock
+        self._started = time.perf_counter()
+        self._phase = None   # (name, start, cpu) of the running phase
+        self._network = self._sleep = 0.0
+    
+    def _close_phase(self, now):
+        if self._phase:
+            name, start, cpu = self._phase
+            self.phases.append({
+                'phase': name,
+                'start': round(start - self._started, 4),
+                'duration': round(now - start, 4),
+                'network': round(self._network, 4),
+                'sleep': round(self._sleep, 4),
+                'cpu': round(self.cpu_clock() - cpu, 4) if self.cpu_clock else None,
+            })
+            self._phase = None
+        self._network = self._sleep = 0.0
+    
+    def phase(self, name):
+        """End the running phase and start the next one"""
+        now = time.perf_counter()
+        with self.lock:
+            self._close_phase(now)
+            self._phase = (name, now, self.cpu_clock() if self.cpu_clock else None)
+    
+    def _event(self, name, category, duration, **args):
+        if self.events is not None:
+            start = time.perf_counter() - duration - self._started
+            self.events.append(dict(name=name, cat=category, start=round(start, 6), duration=round(duration, 6), **args))
+    
+    def record_sleep(self, duration):
+        """Record time the bot spent sleeping (backoff, rate limit, polling)"""
+        with self.lock:
+            self._sleep += duration
+            self._event('sleep', 'sleep', duration)
+    
+    def record_request(self, endpoint, duration, status, sent, received, retry):
+        """
+        Record one HTTP attempt
+        
+        Args:
+            status: HTTP status, None for network errors
+            sent: Request body bytes
+            received: Response body bytes
+            retry: Whether the attempt repeated an earlier one
+        """
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = {
+                    'requests': 0, 'retries': 0, 'errors': 0, 'statuses': {},
+                    'duration_total': 0.0, 'duration_max': 0.0,
+                    'bytes_sent': 0, 'bytes_received': 0,
+                }
+            stats['requests'] += 1
+            stats['retries'] += bool(retry)
+            self._network += duration
+            self._event(endpoint, 'http', duration, status=status)
+            if status is None:
+                stats['errors'] += 1
+            else:
+                stats['statuses'][str(status)] = stats['statuses'].get(str(status), 0) + 1
+            stats['duration_total'] += duration
+            stats['duration_max'] = max(stats['duration_max'], duration)
+            stats['bytes_sent'] += sent
+            stats['bytes_received'] += received
+    
+    def finish(self, result):
+        """Close the run with its (status, reason) result"""
+        now = time.perf_counter()
+        with self.lock:
+            self._close_phase(now)
+            self.duration = now - self._started
+            self.status, self.reason = result
+    
+    def as_dict(self):
+        with self.lock:
+            endpoints = {}
+            for endpoint, stats in self.endpoints.items():
+                endpoints[endpoint] = dict(
+                    stats,
+                    statuses=dict(stats['statuses']),
+                    duration_total=round(stats['duration_total'], 4),
+                    duration_max=round(stats['duration_max'], 4),
+                    duration_mean=round(stats['duration_total'] / stats['requests'], 4),
+                )
+            return {
+                'account': self.account,
+                'started_at': self.started_at.isoformat(),
+                'duration': round(self.duration, 4) if self.duration is not None else None,
+                'status': self.status,
+                'reason': self.reason,
+                **({'prepared_late': round(self.prepared_late, 4)} if self.prepared_late is not None else {}),
+                'phases': list(self.phases),
+                'endpoints': endpoints,
+                **({'events': list(self.events)} if self.events is not None else {}),
+            }
+
+
+class MetricsRegistry:
+    """
+    Latest RunMetrics of every account in the process, exported as a JSON
+    run report and as a Prometheus textfile-collector file
+    
+    Disabled unless configure() is given an output path; bots then skip
+    all bookkeeping.
+    """
+    
+    def __init__(self):
+        self.enabled = False
+        self.trace = False  # keep request/sleep events (--profile)
+        self.json_path = None
+        self.prometheus_path = None
+        self.runs = {}
+        self.lock = threading.Lock()
+    
+    def configure(self, json_path=None, prometheus_path=None):
+        self.json_path = json_path
+        self.prometheus_path = prometheus_path
+        self.enabled = bool(json_path or prometheus_path)
+    
+    def start(self, account, cpu_clock=None):
+        """RunMetrics for a new run, or None when metrics are disabled"""
+        return RunMetrics(account, cpu_clock, self.trace) if self.enabled else None
+    
+    def add(self, run):
+        with self.lock:
+            self.runs[run.account] = run
+    
+    def report(self):
+        """JSON run report: every account's latest run"""
+        with self.lock:
+            runs = list(self.runs.values())
+        return {
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'runs': [run.as_dict() for run in runs],
+        }
+    
+    @staticmethod
+    def _labels(**labels):
+        escape = lambda value: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels.items()) + '}'
+    
+    def prometheus(self):
+        """Prometheus text exposition of the latest runs"""
+        metrics = {}  # name -> (help, [(labels, value)])
+        
+        def add(name, help_text, value, **labels):
+            metrics.setdefault(name, (help_text, []))[1].append((self._labels(**labels), value))
+        
+        for run in self.report()['runs']:
+            account = run['account']
+            add('gac_run_duration_seconds', 'Duration of the last run', run['duration'] or 0, account=account)
+            add('gac_run_timestamp_seconds', 'Start time of the last run',
+                datetime.fromisoformat(run['started_at']).timestamp(), account=account)
+            add('gac_run_status', 'Outcome of the last run', 1, account=account, status=run['status'] or 'unknown')
+            if 'prepared_late' in run:
+                add('gac_boundary_prepared_late_seconds', 'Seconds the last boundary run finished preparing after 00:00 UTC',
+                    run['prepared_late'], account=account)
+            
+            phases = {}
+            for phase in run['phases']:
+                phases[phase['phase']] = phases.get(phase['phase'], 0) + phase['duration']
+            for phase, duration in phases.items():
+                add('gac_phase_duration_seconds', 'Time spent in a phase of the last run',
+                    round(duration, 4), account=account, phase=phase)
+            
+            for endpoint, stats in run['endpoints'].items():
+                for status, count in stats['statuses'].items():
+                    add('gac_http_responses', 'HTTP responses in the last run by status',
+                        count, account=account, endpoint=endpoint, status=status)
+                add('gac_http_requests', 'HTTP attempts in the last run', stats['requests'], account=account, endpoint=endpoint)
+                add('gac_http_retries', 'HTTP retries in the last run', stats['retries'], account=account, endpoint=endpoint)
+                add('gac_http_errors', 'HTTP attempts without a response in the last run',
+                    stats['errors'], account=account, endpoint=endpoint)
+                add('gac_http_duration_seconds_total', 'Total HTTP time in the last run',
+                    stats['duration_total'], account=account, endpoint=endpoint)
+                add('gac_http_duration_seconds_max', 'Slowest HTTP attempt in the last run',
+                    stats['duration_max'], account=account, endpoint=endpoint)
+                add('gac_http_sent_bytes', 'Request body bytes sent in the last run',
+                    stats['bytes_sent'], account=account, endpoint=endpoint)
+                add('gac_http_received_bytes', 'Response body bytes received in the last run',
+                    stats['bytes_received'], account=account, endpoint=endpoint)
+        
+        lines = []
+        for name, (help_text, samples) in metrics.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(f"{name}{labels} {value}" for labels, value in samples)
+        return '\n'.join(lines) + '\n'
+    
+    def write(self):
+        """Write the configured report files (atomically, world-readable)"""
+        if not self.enabled:
+            return
+        try:
+            if self.json_path:
+                atomic_write_json(self.json_path, self.report(), mode=0o644)
+            if self.prometheus_path:
+                atomic_write_text(self.prometheus_path, self.prometheus(), mode=0o644)
+        except OSError as e:
+            logger.warning(f"[WARNING] Failed to write metrics: {e}")
+
+
+METRICS = MetricsRegistry()
+
+
+class RunProfiler:
+    """
+    --profile: CPU profile (every thread), tracemalloc snapshot and a
+    per-phase wall-clock timeline of a single or fleet run
+    
+    Files written to the profile directory:
+        cpu.pstats       cProfile data (python -m pstats, snakeviz, ...)
+        cpu.txt          top functions by cumulative and own time
+        memory.snapshot  tracemalloc snapshot (tracemalloc.Snapshot.load)
+        memory.txt       peak traced memory and top allocation sites
+        timeline.json    per account and phase: wall, network, sleep, cpu, other
+        trace.json       Chrome trace events (chrome://tracing, ui.perfetto.dev)
+    """
+    
+    def __init__(self, directory, frames=10):
+        self.directory = Path(directory)
+        self.frames = frames
+        self.profiles = []
+        self.lock = threading.Lock()
+        self.started = None
+    
+    def _profile_thread(self, frame, event, arg):
+        # Installed with threading.setprofile: switch each new thread to its own profiler
+        sys.setprofile(None)
+        profile = self._cprofile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return  # Python 3.12+: the main profiler already covers every thread
+        with self.lock:
+            self.profiles.append(profile)
+    
+    def start(self):
+        import cProfile
+        import tracemalloc
+        self._cprofile = cProfile
+        self.directory.mkdir(parents=True, exist_ok=True)
+        METRICS.enabled = METRICS.trace = True
+        tracemalloc.start(self.frames)
+        self.started = (time.perf_counter(), time.process_time())
+        self.main = cProfile.Profile()
+        threading.setprofile(self._profile_thread)
+        self.main.enable()
+    
+    def stop(self):
+        """Stop profiling and write the reports"""
+        if self.started is None:
+            return
+        import pstats
+        import tracemalloc
+        # Pending alerts are part of the run (SMTP time)
+        ALERT_DISPATCHER.flush()
+        self.main.disable()
+        threading.setprofile(None)
+        wall = time.perf_counter() - self.started[0]
+        cpu = time.process_time() - self.started[1]
+        self.started = None
+        
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        with self.lock:
+            profiles = [self.main] + self.profiles
+        stats = pstats.Stats(*profiles)
+        stats.dump_stats(str(self.directory / 'cpu.pstats'))
+        with open(self.directory / 'cpu.txt', 'w', encoding='utf-8') as f:
+            stats.stream = f
+            stats.sort_stats('cumulative').print_stats(40)
+            stats.sort_stats('tottime').print_stats(25)
+        
+        snapshot.dump(str(self.directory / 'memory.snapshot'))
+        with open(self.directory / 'memory.txt', 'w', encoding='utf-8') as f:
+            f.write(f"Traced memory: current {current / 1024 / 1024:.2f} MiB, peak {peak / 1024 / 1024:.2f} MiB\n\n")
+            for stat in snapshot.statistics('lineno')[:30]:
+                f.write(f"{stat}\n")
+        
+        timeline = self.timeline()
+        atomic_write_json(str(self.directory / 'timeline.json'),
+                          dict(wall=round(wall, 4), cpu=round(cpu, 4), peak_memory=peak, accounts=timeline), mode=0o644)
+        atomic_write_json(str(self.directory / 'trace.json'), self.trace_events(), mode=0o644)
+        self.print_summary(wall, cpu, peak, timeline)
+    
+    def timeline(self):
+        """Per account phases, with the time not spent on HTTP, sleeps or CPU as 'other'"""
+        accounts = {}
+        for run in METRICS.report()['runs']:
+            phases = []
+            for phase in run['phases']:
+                known = phase['network'] + phase['sleep'] + (phase['cpu'] or 0)
+                phases.append(dict({k: v for k, v in phase.items()},
+                                   other=round(max(0.0, phase['duration'] - known), 4)))
+            accounts[run['account']] = {'status': run['status'], 'duration': run['duration'], 'phases': phases}
+        return accounts
+    
+    def trace_events(self):
+        """Chrome trace event format: one track per account with phases, requests and sleeps"""
+        events = []
+        for tid, run in enumerate(METRICS.report()['runs'], 1):
+            offset = datetime.fromisoformat(run['started_at']).timestamp() * 1e6
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': run['account']}})
+            for phase in run['phases']:
+                events.append({'name': phase['phase'], 'cat': 'phase', 'ph': 'X', 'pid': 1, 'tid': tid,
+                               'ts': offset + phase['start'] * 1e6, 'dur': phase['duration'] * 1e6,
+                               'args': {k: phase[k] for k in ('network', 'sleep', 'cpu')}})
+            for event in run.get('events', []):
+                events.append({'name': event['name'], 'cat': event['cat'], 'ph': 'X', 'pid': 1, 'tid': tid,
+                               'ts': offset + event['start'] * 1e6, 'dur': event['duration'] * 1e6,
+                               'args': {k: v for k, v in event.items() if k not in ('name', 'cat', 'start', 'duration')}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+    
+    def print_summary(self, wall, cpu, peak, timeline):
+        totals = {}
+        for account in timeline.values():
+            for phase in account['phases']:
+                total = totals.setdefault(phase['phase'], dict.fromkeys(('duration', 'network', 'sleep', 'cpu', 'other'), 0.0))
+                for key in total:
+                    total[key] += phase[key] or 0
+        
+        logger.info("=" * 60)
+        logger.info(f"[PROFILE] Wall {wall:.3f}s, process CPU {cpu:.3f}s, peak traced memory {peak / 1024 / 1024:.2f} MiB")
+        logger.info(f"[PROFILE] {'phase':<16}{'wall':>9}{'network':>9}{'sleep':>9}{'cpu':>9}{'other':>9}")
+        for name, total in totals.items():
+            logger.info(f"[PROFILE] {name:<16}" + ''.join(f"{total[key]:>9.3f}" for key in ('duration', 'network', 'sleep', 'cpu', 'other')))
+        logger.info(f"[PROFILE] Reports written to {self.directory}/ (cpu.pstats, memory.snapshot, timeline.json, trace.json)")
+        logger.info("=" * 60)
+
+
+class ClockSkew:
+    """
+    Offset between the server clock and the local clock, from Date headers
+    
+    A Date header has one-second resolution: a response dated D was made
+    while the server clock was in [D, D+1), at some point between sending
+    the request and receiving the response. Each sample thus bounds
+    offset = server - local to an interval, and intersecting samples taken
+    at different sub-second phases narrows the estimate down.
+    """
+    
+    def __init__(self):
+        self.low = None
+        self.high = None
+        self.samples = 0
+        self._midpoints = []
+    
+    def observe(self, date_header, sent_at, received_at):
+        """
+        Add one sample
+        
+        Args:
+            date_header: Date header of the response
+            sent_at: Local time.time() when the request was sent
+            received_at: Local time.time() when the response arrived
+        
+        Returns:
+            bool: True if the sample was usable
+        """
+        from email.utils import parsedate_to_datetime
+        try:
+            server_time = parsedate_to_datetime(date_header).timestamp()
+        except (TypeError, ValueError):
+            return False
+        
+        low, high = server_time - received_at, server_time + 1 - sent_at
+        self.samples += 1
+        self._midpoints.append((low + high) / 2)
+        if self.low is None:
+            self.low, self.high = low, high
+        else:
+            self.low, self.high = max(self.low, low), min(self.high, high)
+        return True
+    
+    @property
+    def consistent(self):
+        return self.low is not None and self.low <= self.high
+    
+    @property
+    def offset(self):
+        """Seconds to add to the local clock to get server time (0 if unknown)"""
+        if self.low is None:
+            return 0.0
+        if self.consistent:
+            return (self.low + self.high) / 2
+        # Clock stepped while sampling: fall back to the median sample
+        midpoints = sorted(self._midpoints)
+        return midpoints[len(midpoints) // 2]
+    
+    @property
+    def error(self):
+        """Maximum error of offset in seconds (None if unknown)"""
+        return (self.high - self.low) / 2 if self.consistent else None
+
+
+def utc_now_iso():
+    """Current UTC time in the API's ISO 8601 format"""
+    return datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def parse_api_time(value):
+    """Parse an API timestamp (ISO 8601, 'Z' for UTC)"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class AsyncResponse:
+    """Minimal response object attached to AsyncRequestError for HTTP errors"""
+    
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+    
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncRequestError(Exception):
+    """Network or HTTP error raised by AsyncCreditResetBot requests"""
+    
+    def __init__(self, message, response=None):
+        super().__init__(message)
+        self.response = response
+        self.status_code = response.status_code if response is not None else None
+
+
+def _import_aiohttp():
+    """Import the optional aiohttp dependency used by AsyncCreditResetBot"""
+    try:
+        import aiohttp
+    except ImportError:
+        raise RuntimeError(
+            "AsyncCreditResetBot requires aiohttp. Install it with: pip install aiohttp"
+        ) from None
+    return aiohttp
+
+
+class CreditResetBotBase:
+    """
+    Configuration, response parsing and decision logic shared by the
+    synchronous CreditResetBot and the asyncio AsyncCreditResetBot
+    """
+    
+    # CPU time function of a run's thread; None where runs share a thread (asyncio)
+    cpu_clock = None
+    
+    def __init__(self, config, config_file_path=None, retry_budget=None):
+        """
+        Initialize the bot with configuration
+        
+        Args:
+            config: Configuration dictionary
+            config_file_path: Path to config file (for saving updated token)
+            retry_budget: Optional RetryBudget shared with other bots (fleet runs)
+        """
+        self.base_url = config.get('base_url', 'https://gaccode.com/api')
+        self.auth_token = config.get('auth_token', '')
+        self.email = config.get('email')
+        self.password = config.get('password')
+        self.ticket_config = config.get('ticket_config', {})
+        self.retry_config = config.get('retry_config', {})
+        self.retry_budget = retry_budget or RetryBudget(self.retry_config.get('budget', 10))
+        self.rate_limit = config.get('rate_limit', {})
+        self.circuit_config = config.get('circuit_breaker', {})
+        self.circuit_tripped = None  # endpoint whose open breaker stopped this run
+        self.circuit_failed = set()  # endpoints that failed during this run
+        self.config = config
+        self.config_file_path = config_file_path
+        
+        # Token lifecycle: expiry-aware refresh, shared per account and cached between runs
+        token_config = config.get('token_config', {})
+        cache_file = token_config.get('cache_file')
+        if cache_file is None and config_file_path:
+            cache_file = str(Path(config_file_path).resolve().parent / TOKEN_CACHE_FILENAME)
+        self.token_manager = TokenManager.for_account(
+            self.email,
+            cache_path=cache_file or None,
+            refresh_margin=token_config.get('refresh_margin', 300)
+        )
+        # Without persist_to_config the cache is where refreshed tokens live
+        if self.needs_login() or not token_config.get('persist_to_config', True):
+            cached_token = self.token_manager.load_cached()
+            if cached_token and cached_token != self.auth_token:
+                logger.info("[INFO] Using cached auth token")
+                self.auth_token = cached_token
+        
+        # Local state store (SQLite next to the config file unless configured)
+        state_config = config.get('state_store', {})
+        state_path = state_config.get('path')
+        if state_path is None and config_file_path:
+            state_path = str(Path(config_file_path).resolve().parent / STATE_DB_FILENAME)
+        self.account_key = self.email or (str(Path(config_file_path).resolve()) if config_file_path else None)
+        self.state_store = None
+        self.subscription_ttl = state_config.get('subscription_ttl', 86400)
+        self.journal_grace = state_config.get('journal_grace', 300)
+        self.journal_entry = None  # ticket journal entry of the current submission
+        self.recent_tickets = None  # ticket list seen by the last check_today_reset
+        self.announcement_ttl = config.get('announcements', {}).get('shared_ttl', 600)
+        self.force_server_check = False
+        if state_config.get('enabled', True) and state_path and self.account_key:
+            try:
+                self.state_store = StateStore(state_path)
+            except sqlite3.Error as e:
+                logger.warning(f"[WARNING] Local state store unavailable ({state_path}): {e}")
+        
+        # Outcome of the last run(): (status, reason)
+        # status is one of 'success', 'already_reset', 'error'
+        self.last_result = (None, None)
+        
+        # Run metrics (only collected when METRICS is enabled)
+        self.metrics = None
+        self.metrics_label = config.get('name') or (Path(config_file_path).stem if config_file_path else self.email) or 'default'
+        
+        # If auth_token is empty or placeholder, we'll try to login later
+        # Don't raise error here, allow initialization
+        
+        self.headers = {
+            'pragma': 'no-cache',
+            'cache-control': 'no-cache',
+            'authorization': f'Bearer {self.auth_token}',
+            'accept-language': self.ticket_config.get('language', 'zh'),
+            'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36',
+            'content-type': 'application/json',
+            'accept': '*/*',
+            'sec-fetch-site': 'same-origin',
+            'sec-fetch-mode': 'cors',
+            'sec-fetch-dest': 'empty',
+        }
+        
+        http_config = config.get('http_config', {})
+        self.timeout = http_config.get('timeout', 10)
+        
+        # Ticket verification polling: check immediately, then back off with
+        # jitter until the ticket is CLOSED or the deadline passes
+        self.verify_poll = config.get('verify_poll', {})
+        self.last_time_to_close = None
+    
+    def endpoint_key(self, method, url):
+        """
+        Name the endpoint of a request, e.g. 'GET /tickets/{id}'
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+        
+        Returns:
+            str: "METHOD /path" with the query string and ids stripped
+        """
+        path = url[len(self.base_url):] if url.startswith(self.base_url) else url
+        segments = path.split('?', 1)[0].strip('/').split('/')
+        
+        # /tickets/123 and /tickets/456 share one policy
+        for idx, segment in enumerate(segments):
+            if segment.isdigit() or (idx == 1 and segments[0] == 'tickets' and segment != 'recaptcha-required'):
+                segments[idx] = '{id}'
+        
+        return f"{method.upper()} /{'/'.join(segments)}"
+    
+    def retry_policy(self, endpoint):
+        """
+        Effective retry policy of an endpoint
+        
+        retry_config provides the defaults (max_retries, retry_delay, max_delay);
+        retry_config['endpoints'][endpoint] overrides them per endpoint.
+        
+        Returns:
+            dict: max_retries, retry_delay, max_delay and idempotent
+        """
+        policy = {
+            'max_retries': self.retry_config.get('max_retries', 3),
+            'retry_delay': self.retry_config.get('retry_delay', 2),
+            'max_delay': self.retry_config.get('max_delay', 30),
+            'idempotent': True,
+        }
+        policy.update(DEFAULT_RETRY_POLICIES.get(endpoint, {}))
+        policy.update(self.retry_config.get('endpoints', {}).get(endpoint, {}))
+        return policy
+    
+    def rate_bucket(self, endpoint):
+        """
+        Shared token bucket limiting requests to an endpoint
+        
+        rate_limit provides the host-wide default (rate, burst);
+        rate_limit['endpoints'][endpoint] configures a bucket per endpoint.
+        
+        Returns:
+            TokenBucket: The bucket, or None if rate limiting is disabled
+        """
+        if not self.rate_limit.get('enabled', True):
+            return None
+        
+        limits = dict(DEFAULT_RATE_LIMITS)
+        limits['*'] = {
+            'rate': self.rate_limit.get('rate', limits['*']['rate']),
+            'burst': self.rate_limit.get('burst', limits['*']['burst']),
+        }
+        limits.update(self.rate_limit.get('endpoints', {}))
+        
+        name = endpoint if endpoint in limits else '*'
+        return RATE_LIMITER.bucket(self.base_url, name, **limits[name])
+    
+    def circuit_breaker(self, endpoint):
+        """
+        Shared circuit breaker of an endpoint
+        
+        Returns:
+            CircuitBreaker: The breaker, or None if circuit breakers are disabled
+        """
+        if not self.circuit_config.get('enabled', True):
+            return None
+        return CIRCUIT_BREAKERS.breaker(
+            self.base_url, endpoint,
+            failure_threshold=self.circuit_config.get('failure_threshold', 5),
+            reset_timeout=self.circuit_config.get('reset_timeout', 30)
+        )
+    
+    def circuit_refused(self, endpoint):
+        """Remember that an open breaker refused a request of this run"""
+        self.circuit_tripped = endpoint
+        return f"Circuit breaker open for {endpoint}, request not sent"
+    
+    def record_circuit(self, breaker, endpoint, failed):
+        """
+        Report the outcome of a request to its circuit breaker
+        
+        The bot whose failure opens the breaker sends the one outage alert
+        of the host; runs stopped by the outage are re-queued by the fleet
+        and send no alerts of their own.
+        """
+        if not failed:
+            if breaker.record_success():
+                logger.info(f"[INFO] {endpoint}: API recovered, circuit breaker closed")
+                CIRCUIT_BREAKERS.outage_over(self.base_url)
+            return
+        
+        self.circuit_failed.add(endpoint)
+        if not breaker.record_failure():
+            return
+        logger.warning(f"[WARNING] {endpoint}: {breaker.failures} consecutive failures, circuit breaker open "
+                       f"for {breaker.reset_timeout}s")
+        if CIRCUIT_BREAKERS.outage_started(self.base_url):
+            self.send_email_alert(
+                "API故障 - 已暂停请求",
+                f"接口 {endpoint} 连续失败 {breaker.failures} 次，已暂停对 {self.base_url} 的请求。\n"
+                f"其余账号将快速失败，并在接口恢复后自动重新排队执行。\n"
+                f"本次故障期间不再为每个账号单独发送邮件。",
+                "outage"
+            )
+        self.circuit_tripped = endpoint
+    
+    def stopped_by_outage(self):
+        """
+        Endpoint whose outage stopped this run: a request was refused by an
+        open breaker, or failed on an endpoint whose breaker is open now
+        
+        Returns:
+            str: Endpoint key, or None
+        """
+        if self.circuit_tripped:
+            return self.circuit_tripped
+        for endpoint in self.circuit_failed:
+            breaker = self.circuit_breaker(endpoint)
+            if breaker and breaker.is_open:
+                return endpoint
+        return None
+    
+    def retry_delay(self, endpoint, attempt, status_code=None, retry_after=None, error=None, never_sent=False):
+        """
+        Decide whether a failed request should be retried
+        
+        Args:
+            endpoint: Endpoint key (see endpoint_key)
+            attempt: Number of retries already made for this request
+            status_code: HTTP status of the response, None for network errors
+            retry_after: Seconds requested by a Retry-After header, if any
+            error: Network error, if no response was received
+            never_sent: The request provably never reached the server
+        
+        Returns:
+            float: Seconds to wait before retrying, or None to give up
+        """
+        policy = self.retry_policy(endpoint)
+        if attempt >= policy['max_retries']:
+            return None
+        
+        if status_code is not None:
+            if status_code not in RETRYABLE_STATUS or not policy['idempotent']:
+                return None
+        elif not policy['idempotent'] and not never_sent:
+            return None
+        
+        # Exponential backoff with jitter, unless the server asked for a delay
+        delay = min(policy['max_delay'], policy['retry_delay'] * (2 ** attempt))
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        if retry_after is not None:
+            if retry_after > policy['max_delay']:
+                logger.warning(f"[WARNING] {endpoint}: server asked to retry after {retry_after:.0f}s, giving up")
+                return None
+            delay = retry_after
+        
+        if not self.retry_budget.try_spend():
+            logger.warning(f"[WARNING] {endpoint}: retry budget exhausted ({self.retry_budget.limit}), giving up")
+            return None
+        
+        reason = f"HTTP {status_code}" if status_code is not None else type(error).__name__
+        logger.warning(f"[WARNING] {endpoint} failed ({reason}), retrying in {delay:.1f}s "
+                       f"(attempt {attempt + 1}/{policy['max_retries']})")
+        return delay
+    
+    def save_config(self):
+        """
+        Save the updated token to the config file
+        
+        The file is updated under a lock and replaced atomically. Only its
+        auth_token field changes, and nothing is written when it already
+        holds the current token. With token_config.persist_to_config set to
+        false the config is never rewritten; the token cache keeps the token.
+        
+        Returns:
+            bool: True if save successful, False otherwise
+        """
+        self.config['auth_token'] = self.auth_token
+        
+        if not self.config.get('token_config', {}).get('persist_to_config', True):
+            if self.token_manager.cache_path:
+                return True  # already stored by the token manager
+            logger.warning("[WARNING] persist_to_config is disabled and there is no token cache, token not saved")
+            return False
+        
+        if not self.config_file_path:
+            logger.warning("[WARNING] No config file path provided, cannot save configuration")
+            return False
+        
+        try:
+            with file_lock(self.config_file_path):
+                # Re-read so edits made since startup (or by another run) are kept
+                try:
+                    with open(self.config_file_path, 'r', encoding='utf-8') as f:
+                        saved = json.load(f)
+                except (OSError, ValueError):
+                    saved = dict(self.config)
+                
+                if saved.get('auth_token') == self.auth_token:
+                    logger.info(f"[INFO] Configuration already up to date: {self.config_file_path}")
+                    return True
+                
+                saved['auth_token'] = self.auth_token
+                atomic_write_json(self.config_file_path, saved)
+            
+            logger.info(f"[SUCCESS] Configuration saved to {self.config_file_path}")
+            return True
+        
+        except Exception as e:
+            logger.error(f"[ERROR] Failed to save configuration: {e}")
+            return False
+    
+    def needs_login(self):
+        """Whether there is no usable auth token (missing, placeholder or about to expire)"""
+        if not self.auth_token or self.auth_token == 'YOUR_AUTH_TOKEN_HERE':
+            return True
+        return self.token_manager.expires_soon(self.auth_token)
+    
+    def set_token(self, token):
+        """Use a new auth token for all following requests"""
+        self.auth_token = token
+        self.headers['authorization'] = f'Bearer {self.auth_token}'
+    
+    def reuse_token(self, stale_token=None):
+        """
+        Decide whether a login can be avoided; call with the token manager locked
+        
+        Args:
+            stale_token: Token that was just rejected with 401, if any
+        
+        Returns:
+            bool: True if the bot now holds a usable token, False if a login is needed
+        """
+        if stale_token is not None and self.auth_token != stale_token:
+            return True  # another request of this bot already logged in again
+        
+        latest = self.token_manager.token
+        if latest and latest != stale_token and not self.token_manager.expires_soon(latest):
+            self.set_token(latest)  # another bot of this account already logged in
+            return True
+        
+        if stale_token is None:
+            return not self.needs_login()
+        
+        logger.warning("[WARNING] Token appears to be invalid (401 Unauthorized)")
+        return False
+    
+    def login_request(self):
+        """
+        Build the login request
+        
+        Returns:
+            tuple: (url, headers, payload), or None if credentials are missing
+        """
+        if not self.email or not self.password:
+            logger.error("[ERROR] Email and password are required for token refresh")
+            logger.info("[INFO] Please provide email and password in configuration")
+            return None
+        
+        url = f"{self.base_url}/login"
+        headers = {
+            # Login must not carry the (stale) session authorization header
+            'authorization': None,
+            'origin': 'https://gaccode.com',
+            'referer': 'https://gaccode.com/login',
+        }
+        
+        payload = {
+            "email": self.email,
+            "password": self.password
+        }
+        return url, headers, payload
+    
+    def apply_login(self, data, save_to_config=True):
+        """
+        Apply a login response: store the token, save config and notify
+        
+        Args:
+            data: Parsed login response
+            save_to_config: Whether to save the new token to config file
+        
+        Returns:
+            bool: True if the response contained a token
+        """
+        if 'token' not in data:
+            logger.error(f"[ERROR] No token in response: {data}")
+            return False
+        
+        # Update token and authorization header
+        self.set_token(data['token'])
+        self.token_manager.store(self.auth_token)
+        logger.info(f"[SUCCESS] Login successful!")
+        logger.info(f"[INFO] New token: {self.auth_token[:50]}...")
+        
+        # Save to config file
+        if save_to_config:
+            self.save_config()
+        
+        # Send token refresh email notification
+        self.send_email_alert(
+            "认证Token已刷新",
+            f"登录成功，已自动更新认证token。\n登录时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\nToken (前50字符): {self.auth_token[:50]}...",
+            "token_refresh"
+        )
+        
+        return True
+    
+    def parse_subscription(self, data):
+        """
+        Parse a /subscriptions/active response
+        
+        Returns:
+            tuple: (bool, dict) - (has_active_subscription, subscription_info)
+        """
+        subscriptions = data.get('subscriptions', [])
+        
+        if not subscriptions:
+            logger.warning("[WARNING] No active subscriptions found")
+            logger.info("[INFO] Credit refill may not be available without an active subscription")
+            return False, None
+        
+        # Check the first (most recent) subscription
+        sub = subscriptions[0]
+        sub_info = sub.get('subscription', {})
+        self.remember('subscription', sub)
+        
+        logger.info(f"[INFO] Active subscription found:")
+        logger.info(f"  - Tier: {sub_info.get('tier')}")
+        logger.info(f"  - Description: {sub_info.get('description')}")
+        logger.info(f"  - Start Date: {sub.get('startDate')}")
+        logger.info(f"  - End Date: {sub.get('endDate')}")
+        logger.info(f"  - Supports Refill: {sub_info.get('supportsRefill')}")
+        
+        # Check if subscription supports refill
+        if not sub_info.get('supportsRefill', False):
+            logger.warning("[WARNING] Current subscription does not support credit refill")
+            return False, sub_info
+        
+        # Check if subscription has expired
+        end_date_str = sub.get('endDate')
+        if end_date_str:
+            end_date = datetime.fromisoformat(end_date_str.replace('Z', '+00:00'))
+            current_date = datetime.now(timezone.utc)
+            
+            if current_date > end_date:
+                logger.warning("[WARNING] Subscription has expired")
+                logger.info(f"[INFO] Expired on: {end_date_str}")
+                return False, sub_info
+        
+        return True, sub_info
+    
+    def parse_today_reset(self, data):
+        """
+        Parse a /tickets response and decide whether credits were reset today (UTC)
+        
+        Returns:
+            tuple: (bool, str) - (already_reset_today, created_time)
+        """
+        try:
+            tickets = data.get('tickets', [])
+            self.recent_tickets = tickets
+            if not tickets:
+                logger.info("[INFO] No previous tickets found")
+                return False, None
+            
+            # Get the first (most recent) ticket
+            latest_ticket = tickets[0]
+            created_at = latest_ticket.get('createdAt')
+            
+            if not created_at:
+                logger.warning("[WARNING] Latest ticket has no createdAt field")
+                return False, None
+            
+            # Parse the timestamp (ISO 8601 format with Z for UTC)
+            created_datetime = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+            current_datetime = datetime.now(timezone.utc)
+            
+            # Check if the date is the same (ignoring time)
+            created_date = created_datetime.date()
+            current_date = current_datetime.date()
+            
+            logger.info(f"[INFO] Latest ticket information:")
+            logger.info(f"  - Ticket ID: {latest_ticket.get('id')}")
+            logger.info(f"  - Title: {latest_ticket.get('title')}")
+            logger.info(f"  - Created at: {created_at}")
+            logger.info(f"  - Status: {latest_ticket.get('status')}")
+            
+            if created_date == current_date:
+                self.remember('reset', (created_at, latest_ticket.get('id')))
+                return True, created_at
+            else:
+                return False, created_at
+        
+        except (ValueError, AttributeError) as e:
+            logger.error(f"[ERROR] Failed to parse date: {e}")
+            logger.warning(f"[WARNING] Cannot verify today's reset status due to parsing error")
+            logger.info(f"[INFO] Proceeding with caution...")
+            return False, None  # Data format error, proceed but warn
+    
+    def today_reset_unverifiable(self, error):
+        """
+        Result of the today-reset check when the ticket list could not be fetched
+        
+        Returns:
+            tuple: (True, None) so that run() aborts instead of risking a duplicate
+        """
+        logger.error(f"[ERROR] Failed to check tickets: {error}")
+        logger.warning(f"[WARNING] Cannot verify today's reset status due to network error")
+        logger.info(f"[INFO] Aborting to avoid duplicate submission")
+        self.recent_tickets = None
+        return True, None  # Return True to abort execution
+    
+    def parse_recaptcha(self, data):
+        """
+        Parse a /tickets/recaptcha-required response
+        
+        Returns:
+            dict: Recaptcha status, ticket count and daily limit
+        """
+        logger.info(f"[INFO] Recaptcha check result:")
+        logger.info(f"  - Requires Recaptcha: {data.get('requiresRecaptcha')}")
+        logger.info(f"  - Tickets today: {data.get('ticketCountToday')}")
+        logger.info(f"  - Daily limit: {data.get('dailyLimit')}")
+        return data
+    
+    def ticket_payload(self):
+        """Request body for creating a credit refill ticket"""
+        return {
+            "categoryId": self.ticket_config.get('category_id', 3),
+            "title": self.ticket_config.get('title', '重置积分'),
+            "description": self.ticket_config.get('description', ''),
+            "language": self.ticket_config.get('language', 'zh')
+        }
+    
+    def parse_created_ticket(self, data):
+        """
+        Parse a POST /tickets response
+        
+        Returns:
+            dict: Response containing ticket information
+        """
+        if 'ticket' in data:
+            ticket = data['ticket']
+            logger.info(f"[SUCCESS] Ticket created successfully!")
+            logger.info(f"  - Ticket ID: {ticket.get('id')}")
+            logger.info(f"  - Title: {ticket.get('title')}")
+            logger.info(f"  - Status: {ticket.get('status')}")
+            logger.info(f"  - Created at: {ticket.get('createdAt')}")
+            
+            # Print messages if any
+            messages = ticket.get('messages', [])
+            if messages:
+                logger.info(f"  - Response message: {messages[0].get('message')}")
+        else:
+            logger.warning(f"[WARNING] Unexpected response format: {data}")
+        return data
+    
+    def parse_verification(self, data):
+        """
+        Parse a GET /tickets/{id} response
+        
+        Returns:
+            dict: Ticket information
+        """
+        if 'ticket' in data:
+            ticket = data['ticket']
+            logger.info(f"[INFO] Ticket verification:")
+            logger.info(f"  - Ticket ID: {ticket.get('id')}")
+            logger.info(f"  - Status: {ticket.get('status')}")
+            logger.info(f"  - Updated at: {ticket.get('updatedAt')}")
+            
+            messages = ticket.get('messages', [])
+            if messages:
+                logger.info(f"  - Latest message: {messages[-1].get('message')}")
+        else:
+            logger.warning(f"[WARNING] Unexpected response format: {data}")
+        return data
+    
+    def parse_balance(self, data):
+        """
+        Parse a /credits/balance response
+        
+        Returns:
+            dict: Credit balance information
+        """
+        logger.info(f"[INFO] Credit balance:")
+        logger.info(f"  - Balance: {data.get('balance', 'N/A')}")
+        self.remember('balance', data)
+        return data
+    
+    def parse_announcements(self, data):
+        """
+        Parse an /announcements response
+        
+        Returns:
+            list: List of announcements
+        """
+        announcements = data.get('announcements', [])
+        
+        if announcements:
+            logger.info(f"[INFO] Found {len(announcements)} announcement(s):")
+            for idx, announcement in enumerate(announcements, 1):
+                logger.info(f"  [{idx}] Title: {announcement.get('title', 'N/A')}")
+                logger.info(f"      Type: {announcement.get('type', 'N/A')}")
+                logger.info(f"      Created: {announcement.get('createdAt', 'N/A')}")
+        else:
+            logger.info("[INFO] No announcements found")
+        
+        return announcements
+    
+    @staticmethod
+    def print_error_response(e):
+        """Print the server response attached to a failed request, if any"""
+        if hasattr(e, 'response') and e.response is not None:
+            try:
+                error_data = e.response.json()
+                logger.error(f"[ERROR] Server response: {error_data}")
+            except:
+                logger.error(f"[ERROR] Server response: {e.response.text}")
+    
+    def send_email_alert(self, subject, body, alert_type="info", on_delivered=None):
+        """
+        Send email alert notification (queued, see AlertDispatcher)
+        
+        Args:
+            subject: Email subject
+            body: Email body text
+            alert_type: Type of alert (info, success, warning, error, outage)
+            on_delivered: Called on the dispatcher thread once the email is sent
+        
+        Returns:
+            bool: Whether the alert was queued
+        """
+        email_config = self.config.get('email_alerts', {})
+        
+        # Check if email alerts are enabled
+        if not email_config.get('enabled', False):
+            return False
+        
+        # An API outage is reported once for all accounts (see record_circuit)
+        if alert_type == "error" and self.stopped_by_outage():
+            logger.info(f"[INFO] Email skipped, API outage already reported: {subject}")
+            return False
+        
+        # Check notification settings based on alert type
+        if alert_type == "success" and not email_config.get('on_success', False):
+            return False
+        if alert_type in ("error", "outage") and not email_config.get('on_failure', True):
+            return False
+        if alert_type == "token_refresh" and not email_config.get('on_token_refresh', True):
+            return False
+        
+        # Check required email configuration fields
+        required_fields = ['smtp_server', 'smtp_user', 'smtp_password', 'from_email', 'to_email']
+        missing_fields = [field for field in required_fields if not email_config.get(field)]
+        
+        if missing_fields:
+            logger.warning(f"[WARNING] Email configuration incomplete, missing: {missing_fields}")
+            return False
+        
+        # Email body with timestamp
+        full_body = f"""
+GAC积分重置工具通知
+
+时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+类型: {alert_type}
+
+{body}
+
+---
+此邮件由GAC积分重置工具自动发送
+配置文件: {self.config_file_path}
+"""
+        
+        # Delivered by a background worker so SMTP never delays the reset
+        logger.info(f"[INFO] Queued email: {subject}")
+        ALERT_DISPATCHER.submit(email_config, subject, full_body, on_delivered)
+        return True
+    
+    # ------------------------------------------------------------------
+    # Decision steps of run(), shared by the sync and async bots
+    # ------------------------------------------------------------------
+    
+    def start_metrics(self):
+        """Begin collecting metrics for a run (no-op unless METRICS is enabled)"""
+        self.metrics = METRICS.start(self.metrics_label, self.cpu_clock)
+    
+    def phase(self, name):
+        """Mark the start of a run phase in the metrics timeline"""
+        if self.metrics:
+            self.metrics.phase(name)
+    
+    def finish_metrics(self):
+        """Close the run's metrics and hand them to METRICS"""
+        if self.metrics:
+            self.metrics.finish(self.last_result)
+            METRICS.add(self.metrics)
+            self.metrics = None
+    
+    def record_http(self, endpoint, started, status, sent, received, retry):
+        """Record an HTTP attempt that started at perf_counter() time started"""
+        self.metrics.record_request(endpoint, time.perf_counter() - started, status, sent, received, retry)
+    
+    @staticmethod
+    def payload_size(payload):
+        """Size in bytes of a JSON request body"""
+        return len(json.dumps(payload).encode('utf-8')) if payload is not None else 0
+    
+    def print_run_header(self):
+        logger.info("=" * 60)
+        logger.info(f"Credit Reset Bot - Started at {datetime.now()}")
+        logger.info("=" * 60)
+    
+    def abort_login_failed(self):
+        logger.info("\n" + "=" * 60)
+        logger.error("[ERROR] ❌ Failed to obtain authentication token!")
+        logger.info("[INFO] Please check your email and password in configuration.")
+        logger.info("=" * 60)
+        self.last_result = ('error', 'failed to obtain authentication token')
+        return False
+    
+    def conditional_headers(self, url):
+        """
+        Validators for a conditional GET of url from the local HTTP cache
+        
+        Returns:
+            tuple: (headers, cached_entry) - cached_entry is None if not cached
+        """
+        if not self.state_store:
+            return {}, None
+        try:
+            cached = self.state_store.get_http_cache(url)
+        except sqlite3.Error:
+            return {}, None
+        
+        headers = {}
+        if cached:
+            if cached['etag']:
+                headers['if-none-match'] = cached['etag']
+            if cached['last_modified']:
+                headers['if-modified-since'] = cached['last_modified']
+        return headers, cached
+    
+    def conditional_result(self, url, status_code, data, response_headers, cached):
+        """
+        Resolve a conditional GET: reuse the cached body on 304, cache the new one otherwise
+        
+        Returns:
+            dict: Response data
+        """
+        if status_code == 304 and cached:
+            logger.info("[INFO] Not modified since last check, using cached response")
+            return json.loads(cached['body'])
+        
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if self.state_store and (etag or last_modified):
+            try:
+                self.state_store.put_http_cache(url, etag, last_modified, json.dumps(data, ensure_ascii=False))
+            except sqlite3.Error as e:
+                logger.warning(f"[WARNING] Failed to update HTTP cache: {e}")
+        return data
+    
+    @staticmethod
+    def announcement_fingerprint(announcement):
+        """Content hash of an announcement; changes when any field changes"""
+        canonical = json.dumps(announcement, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    def new_announcements(self, announcements):
+        """
+        Filter out announcements this account was already alerted about
+        
+        Returns:
+            list: New or changed announcements (all of them without a state store)
+        """
+        if not announcements or not self.state_store:
+            return announcements or []
+        
+        fingerprints = [self.announcement_fingerprint(a) for a in announcements]
+        try:
+            seen = self.state_store.seen_fingerprints(self.account_key, fingerprints)
+        except sqlite3.Error as e:
+            logger.warning(f"[WARNING] Failed to read seen announcements: {e}")
+            return announcements
+        return [a for a, fp in zip(announcements, fingerprints) if fp not in seen]
+    
+    def mark_announcements_seen(self, announcements):
+        if not announcements or not self.state_store:
+            return
+        try:
+            self.state_store.mark_seen(
+                self.account_key, [self.announcement_fingerprint(a) for a in announcements]
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"[WARNING] Failed to record seen announcements: {e}")
+    
+    def notify_announcements(self, announcements):
+        """
+        Send the announcement email for new or changed announcements
+        
+        Announcements are only marked as notified once their email was sent,
+        so a failed send, or alerts that are off, leave them to a later run.
+        """
+        if announcements:
+            known = len(announcements)
+            announcements = self.new_announcements(announcements)
+            if not announcements:
+                logger.info(f"[INFO] ✓ No new announcements ({known} already notified)")
+                return
+        
+        if announcements:
+            # Format announcements for email
+            announcement_text = ""
+            for idx, announcement in enumerate(announcements, 1):
+                announcement_text += f"\n公告 {idx}:\n"
+                announcement_text += f"标题: {announcement.get('title', 'N/A')}\n"
+                announcement_text += f"类型: {announcement.get('type', 'N/A')}\n"
+                announcement_text += f"内容: {announcement.get('content', announcement.get('message', 'N/A'))}\n"
+                announcement_text += f"发布时间: {announcement.get('createdAt', 'N/A')}\n"
+                announcement_text += "-" * 40
+            
+            # Send announcement email
+            queued = self.send_email_alert(
+                f"系统公告 ({len(announcements)}条)",
+                f"GAC系统有新的公告信息:\n{announcement_text}\n\n请访问 https://gaccode.com/dashboard 查看详情。",
+                "info",
+                on_delivered=lambda: self.mark_announcements_seen(announcements)
+            )
+            if queued:
+                logger.info("[INFO] ✓ Announcement notification sent!")
+            else:
+                logger.info("[INFO] Email alerts are off, announcements stay unnotified")
+        else:
+            logger.info("[INFO] ✓ No announcements to notify")
+    
+    def abort_no_subscription(self):
+        logger.info("\n" + "=" * 60)
+        logger.warning("[WARNING] ⚠️  No valid active subscription!")
+        logger.info("[INFO] Credit refill requires an active subscription that supports refill.")
+        logger.info("[INFO] Please check your subscription status at https://gaccode.com/subscriptions")
+        logger.info("=" * 60)
+        
+        # Send subscription error email
+        self.send_email_alert(
+            "订阅检查失败",
+            "未找到有效的活跃订阅或订阅不支持积分重置。\n请访问 https://gaccode.com/subscriptions 检查订阅状态。",
+            "error"
+        )
+        
+        # For automated runs, we return False
+        self.last_result = ('error', 'no valid active subscription')
+        return False
+    
+    def remember(self, kind, value):
+        """
+        Record something learned from the server in the local state store
+        
+        Args:
+            kind: 'subscription', 'balance' or 'reset' (value: (reset_at, ticket_id))
+            value: The data to record
+        """
+        if not self.state_store:
+            return
+        try:
+            if kind == 'reset':
+                self.state_store.record_reset(self.account_key, *value)
+            elif kind == 'subscription':
+                self.state_store.record_subscription(self.account_key, value)
+            elif kind == 'balance':
+                self.state_store.record_balance(self.account_key, value)
+        except sqlite3.Error as e:
+            logger.warning(f"[WARNING] Failed to update local state: {e}")
+    
+    def journal_intent(self):
+        """
+        Record in the ticket journal that create_ticket() is about to submit
+        
+        Returns:
+            int: Journal entry id, or None without a state store
+        """
+        self.journal_entry = None
+        if not self.state_store:
+            return None
+        try:
+            self.journal_entry = self.state_store.journal_intent(self.account_key)
+        except sqlite3.Error as e:
+            logger.warning(f"[WARNING] Failed to write ticket journal, duplicate protection is network-only: {e}")
+        return self.journal_entry
+    
+    def journal(self, state, ticket_id=None):
+        """Move the current journal entry to a new state"""
+        if self.journal_entry is None:
+            return
+        try:
+            self.state_store.journal_update(self.journal_entry, state, ticket_id)
+        except sqlite3.Error as e:
+            logger.warning(f"[WARNING] Failed to update ticket journal: {e}")
+    
+    def journal_result(self, ticket_response, status_code=None):
+        """
+        Record the outcome of POST /tickets in the journal
+        
+        A ticket in the response is 'created' and a 4xx means the server
+        refused it ('failed'). Network errors and 5xx leave the entry in
+        flight: the ticket may exist, and reconcile_journal() settles it
+        before the next submission.
+        """
+        if ticket_response and 'ticket' in ticket_response:
+            self.journal('created', ticket_response['ticket'].get('id'))
+        elif status_code is not None and 400 <= status_code < 500:
+            self.journal('failed')
+    
+    def reconcile_journal(self, outcome=None):
+        """
+        Step 0.2: settle submissions left in flight by an earlier run (a crash
+        or lost response after POST /tickets) against the ticket list from
+        check_today_reset before anything new is submitted
+        
+        Args:
+            outcome: Result of handle_reset_status()
+        
+        Returns:
+            bool or None: run() result if it must stop here, None to proceed
+        """
+        if not self.state_store or self.recent_tickets is None:
+            return outcome
+        try:
+            entries = self.state_store.journal_in_flight(self.account_key)
+        except sqlite3.Error as e:
+            logger.warning(f"[WARNING] Failed to read ticket journal: {e}")
+            return outcome
+        if not entries:
+            return outcome
+        
+        logger.info(f"[INFO] Reconciling {len(entries)} unconfirmed ticket submission(s)...")
+        today = datetime.now(timezone.utc).date().isoformat()
+        now = datetime.now(timezone.utc)
+        unconfirmed = False
+        for entry in entries:
+            intent_at = parse_api_time(entry['created_at'])
+            # Allow for clock skew between this machine and the server
+            match = None
+            for ticket in self.recent_tickets or []:
+                try:
+                    created_at = parse_api_time(ticket.get('createdAt', ''))
+                except ValueError:
+                    continue
+                if created_at.tzinfo is None:
+                    created_at = created_at.replace(tzinfo=timezone.utc)
+                if created_at >= intent_at - timedelta(seconds=60):
+                    match = ticket
+                    break
+            
+            try:
+                if match:
+                    logger.info(f"[INFO] Submission of {entry['created_at']} did reach the server: ticket {match.get('id')}")
+                    self.state_store.journal_update(entry['id'], 'created', match.get('id'))
+                elif entry['day'] != today:
+                    self.state_store.journal_update(entry['id'], 'expired')
+                elif (now - intent_at).total_seconds() < self.journal_grace:
+                    # The ticket list may lag behind; do not risk a second ticket yet
+                    unconfirmed = True
+                else:
+                    logger.info(f"[INFO] Submission of {entry['created_at']} never reached the server")
+                    self.state_store.journal_update(entry['id'], 'absent')
+            except sqlite3.Error as e:
+                logger.warning(f"[WARNING] Failed to update ticket journal: {e}")
+        
+        if unconfirmed and outcome is None:
+            logger.warning("[WARNING] An earlier ticket submission is not confirmed yet, not submitting again")
+            logger.info(f"[INFO] It is settled on a run after {self.journal_grace}s")
+            self.last_result = ('error', 'earlier submission not confirmed yet')
+            return False
+        return outcome
+    
+    def cached_subscription(self):
+        """
+        Subscription check answered from the local snapshot, if still fresh
+        
+        An entry lives for subscription_ttl seconds but never past the
+        subscription's endDate. Only subscriptions that support refill are
+        served from the cache.
+        
+        Returns:
+            tuple: (True, subscription_info) on a cache hit, None on a miss
+        """
+        if not self.state_store or not self.subscription_ttl or self.force_server_check:
+            return None
+        try:
+            state = self.state_store.get(self.account_key)
+        except sqlite3.Error as e:
+            logger.warning(f"[WARNING] Failed to read local state: {e}")
+            return None
+        
+        sub = state.get('subscription')
+        if not sub or not state.get('subscription_at'):
+            return None
+        sub_info = sub.get('subscription', {})
+        if not sub_info.get('supportsRefill', False):
+            return None
+        
+        try:
+            expires_at = parse_api_time(state['subscription_at']) + timedelta(seconds=self.subscription_ttl)
+            if sub.get('endDate'):
+                expires_at = min(expires_at, parse_api_time(sub['endDate']))
+        except ValueError:
+            return None
+        if datetime.now(timezone.utc) >= expires_at:
+            return None
+        
+        logger.info(f"[INFO] Active subscription (cached until {expires_at.isoformat()}):")
+        logger.info(f"  - Tier: {sub_info.get('tier')}")
+        logger.info(f"  - End Date: {sub.get('endDate')}")
+        return True, sub_info
+    
+    def invalidate_subscription(self):
+        """Drop the cached subscription snapshot (e.g. after a failed refill)"""
+        if not self.state_store:
+            return
+        try:
+            self.state_store.update(self.account_key, subscription=None, subscription_at=None)
+        except sqlite3.Error as e:
+            logger.warning(f"[WARNING] Failed to update local state: {e}")
+    
+    def local_reset_today(self):
+        """
+        Look up a reset recorded locally for today (UTC)
+        
+        Returns:
+            dict: Local state if it proves credits were reset today, None otherwise
+        """
+        if not self.state_store:
+            return None
+        try:
+            state = self.state_store.get(self.account_key)
+        except sqlite3.Error as e:
+            logger.warning(f"[WARNING] Failed to read local state: {e}")
+            return None
+        
+        reset_at = state.get('last_reset_at')
+        if not reset_at:
+            return None
+        try:
+            reset_date = parse_api_time(reset_at).astimezone(timezone.utc).date()
+        except ValueError:
+            return None
+        if reset_date != datetime.now(timezone.utc).date():
+            return None
+        return state
+    
+    def check_local_state(self):
+        """
+        Step 0 from local state only: stop early if this machine already saw today's reset
+        
+        Returns:
+            bool or None: run() result if the local record is conclusive, None otherwise
+        """
+        state = self.local_reset_today()
+        if not state:
+            return None
+        
+        logger.info("\n[STEP 0] Checking if already reset today (local state)...")
+        logger.info(f"[INFO] Local record: reset at {state['last_reset_at']}"
+                    f" (ticket {state.get('last_ticket_id') or 'N/A'}), skipping server check")
+        return self.handle_reset_status(True, state['last_reset_at'])
+    
+    def handle_reset_status(self, already_reset, reset_time):
+        """
+        Decide what to do with the result of check_today_reset()
+        
+        Returns:
+            bool or None: run() result if it must stop here, None to proceed
+        """
+        if not already_reset:
+            logger.info("[INFO] ✓ No reset found today, proceeding...")
+            return None
+        
+        if reset_time is None:
+            # Network error or other issue, cannot verify
+            logger.info("\n" + "=" * 60)
+            logger.error(f"[ERROR] ❌ Cannot verify today's reset status!")
+            logger.info(f"[INFO] Aborting execution to avoid duplicate submission.")
+            logger.info(f"[INFO] Please check your network connection and try again.")
+            logger.info("=" * 60)
+            
+            # Send network error email
+            self.send_email_alert(
+                "网络错误 - 无法验证重置状态",
+                "无法验证今天是否已经重置积分（网络连接失败）。\n为避免重复提交，已终止执行。\n请检查网络连接后重试。",
+                "error"
+            )
+            
+            self.last_result = ('error', 'cannot verify today\'s reset status')
+            return False  # Return False to indicate error
+        
+        # Already reset today
+        logger.info("\n" + "=" * 60)
+        logger.info(f"[INFO] ⚠️  Already reset today!")
+        logger.info(f"[INFO] Last reset time: {reset_time}")
+        logger.info(f"[INFO] Please wait until tomorrow to reset again.")
+        logger.info("=" * 60)
+        
+        # Send email notification for already reset
+        self.send_email_alert(
+            "今日已重置 - 无需操作",
+            f"今天已经完成积分重置，无需重复操作。\n\n上次重置时间: {reset_time}\n\n请等待明天再次重置。",
+            "info"
+        )
+        
+        self.last_result = ('already_reset', f'last reset at {reset_time}')
+        return True  # Return True because no error occurred
+    
+    def recaptcha_allows_ticket(self, recaptcha_status):
+        """
+        Decide whether a ticket may be created given the recaptcha check result
+        
+        Returns:
+            bool: True if run() may proceed to create the ticket
+        """
+        if not recaptcha_status:
+            logger.error("[FAILED] Could not check recaptcha status")
+            self.last_result = ('error', 'could not check recaptcha status')
+            return False
+        
+        if recaptcha_status.get('requiresRecaptcha', False):
+            logger.error("[FAILED] Recaptcha is required. Manual intervention needed.")
+            self.last_result = ('error', 'recaptcha required')
+            return False
+        
+        # Check if daily limit is reached
+        ticket_count = recaptcha_status.get('ticketCountToday', 0)
+        daily_limit = recaptcha_status.get('dailyLimit', 3)
+        
+        if ticket_count >= daily_limit:
+            logger.error(f"[FAILED] Daily ticket limit reached ({ticket_count}/{daily_limit})")
+            self.last_result = ('error', f'daily ticket limit reached ({ticket_count}/{daily_limit})')
+            return False
+        
+        return True
+    
+    def abort_create_failed(self):
+        logger.error("[FAILED] Could not create ticket")
+        self.invalidate_subscription()
+        self.last_result = ('error', 'could not create ticket')
+        return False
+    
+    def abort_verify_failed(self):
+        logger.error("[FAILED] Could not verify ticket")
+        self.last_result = ('error', 'could not verify ticket')
+        return False
+    
+    @staticmethod
+    def ticket_status(verification):
+        """Status of a verified ticket ('CLOSED' means credits are reset)"""
+        return verification.get('ticket', {}).get('status')
+    
+    def verify_deadline(self):
+        """Seconds to keep polling a new ticket before giving up"""
+        return self.verify_poll.get('deadline', 30)
+    
+    def poll_delays(self):
+        """
+        Generate the delays between ticket verification attempts
+        
+        Yields:
+            float: Exponential backoff delay with jitter, in seconds
+        """
+        delay = self.verify_poll.get('initial_delay', 0.25)
+        max_delay = self.verify_poll.get('max_delay', 4)
+        multiplier = self.verify_poll.get('multiplier', 2)
+        jitter = self.verify_poll.get('jitter', 0.5)
+        while True:
+            yield delay * random.uniform(1 - jitter, 1 + jitter)
+            delay = min(max_delay, delay * multiplier)
+    
+    def record_time_to_close(self, elapsed, attempts):
+        """Remember how long the server took to close the ticket"""
+        self.last_time_to_close = round(elapsed, 3) if elapsed is not None else None
+        if elapsed is not None:
+            logger.info(f"[INFO] Ticket closed after {elapsed:.2f}s ({attempts} check(s))")
+        else:
+            logger.warning(f"[WARNING] Ticket not closed within {self.verify_deadline()}s ({attempts} check(s))")
+    
+    def report_reset_success(self, ticket_id, verification, balance_data=None):
+        """Report a closed ticket; balance_data is the post-reset balance, if checked"""
+        balance_info = ""
+        if balance_data and 'balance' in balance_data:
+            balance_info = f"\n当前积分: {balance_data.get('balance', 'N/A')}"
+        
+        # Send success email notification
+        messages = verification['ticket'].get('messages', [])
+        response_msg = messages[-1].get('message', '') if messages else ''
+        
+        self.send_email_alert(
+            "积分重置成功 ✅",
+            f"积分已成功重置！\n\n工单ID: {ticket_id}\n响应消息: {response_msg}\n完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{balance_info}",
+            "success"
+        )
+        
+        self.remember('reset', (utc_now_iso(), ticket_id))
+        self.journal('closed')
+        self.last_result = ('success', f'ticket {ticket_id} closed')
+        return True
+    
+    def report_unclosed_ticket(self, ticket_id, status):
+        logger.warning(f"\n[WARNING] Ticket created but status is: {status}")
+        logger.info("Please check manually if credits were reset.")
+        
+        # Send warning email
+        self.send_email_alert(
+            "积分重置状态异常",
+            f"工单已创建但状态为: {status}\n工单ID: {ticket_id}\n请手动检查是否重置成功。",
+            "error"
+        )
+        
+        self.invalidate_subscription()
+        self.journal('unclosed')
+        self.last_result = ('error', f'ticket {ticket_id} status is {status}')
+        return False
+
+
+class CreditResetBot(CreditResetBotBase):
     """Bot to automatically reset credits by creating support tickets"""
     
-    def __init__(self, config, config_file_path=None):
+    # A run stays on its thread, so its thread's CPU time is the run's
+    cpu_clock = staticmethod(time.thread_time)
+    
+    def __init__(self, config, config_file_path=None, retry_budget=None):
         """
         Initialize the bot with configuration
         
         Args:
             config: Configuration dictionary
             config_file_path: Path to config file (for saving updated token)
+            retry_budget: Optional RetryBudget shared with other bots (fleet runs)
         """
-        self.base_url = config.get('base_url', 'https://gaccode.com/api')
-        self.auth_token = config.get('auth_token', '')
-        self.email = config.get('email')
-        self.password = config.get('password')
-        self.ticket_config = config.get('ticket_config', {})
-        self.retry_config = config.get('retry_config', {})
-        self.config = config
-        self.config_file_path = config_file_path
+        super().__init__(config, config_file_path, retry_budget)
         
-        # If auth_token is empty or placeholder, we'll try to login later
-        # Don't raise error here, allow initialization
+        # Persistent keep-alive session; the connection pool is shared by every
+        # bot in the process so a fleet pays the TLS handshake once per host.
+        # self.headers becomes the session headers, so token updates apply directly.
+        http_config = config.get('http_config', {})
+        _import_requests()
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.headers = self.session.headers
+        adapter = get_shared_adapter(
+            pool_connections=http_config.get('pool_connections'),
+            pool_maxsize=http_config.get('pool_maxsize')
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def pause(self, seconds):
+        """time.sleep() counted as sleep time in the run metrics"""
+        started = time.perf_counter()
+        time.sleep(seconds)
+        if self.metrics:
+            self.metrics.record_sleep(time.perf_counter() - started)
+    
+    def use_cassette(self, cassette):
+        """
+        Record this bot's HTTP traffic to, or replay it from, an HTTPCassette
         
-        self.headers = {
-            'pragma': 'no-cache',
-            'cache-control': 'no-cache',
-            'authorization': f'Bearer {self.auth_token}',
-            'accept-language': self.ticket_config.get('language', 'zh'),
-            'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36',
-            'content-type': 'application/json',
-            'accept': '*/*',
-            'sec-fetch-site': 'same-origin',
-            'sec-fetch-mode': 'cors',
-            'sec-fetch-dest': 'empty',
+        Args:
+            cassette: HTTPCassette in 'record' or 'replay' mode
+        """
+        adapter = CassetteAdapter(cassette, self.session.get_adapter(self.base_url))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def _request(self, method, url, **kwargs):
+        """
+        Send an HTTP request through the bot's pooled session, retrying
+        transient failures according to the endpoint's retry policy and
+        logging in again once if the token is rejected (401)
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Extra arguments for requests (headers, json, ...)
+        
+        Returns:
+            requests.Response: The server response
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        endpoint = self.endpoint_key(method, url)
+        bucket = self.rate_bucket(endpoint)
+        breaker = self.circuit_breaker(endpoint)
+        attempt = 0
+        reauthenticated = False
+        
+        while True:
+            if breaker and not breaker.allow():
+                raise CircuitOpenError(self.circuit_refused(endpoint))
+            if bucket:
+                wait = bucket.reserve()
+                if wait > 0:
+                    self.pause(wait)
+            
+            token_used = self.auth_token
+            sent_at = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if self.metrics:
+                    self.record_http(endpoint, sent_at, None, self.payload_size(kwargs.get('json')), 0,
+                                     attempt > 0 or reauthenticated)
+                if breaker:
+                    self.record_circuit(breaker, endpoint, failed=True)
+                delay = self.retry_delay(endpoint, attempt, error=e, never_sent=request_never_sent(e))
+                if delay is None:
+                    raise
+            else:
+                if self.metrics:
+                    self.record_http(endpoint, sent_at, response.status_code, len(response.request.body or b''),
+                                     len(response.content), attempt > 0 or reauthenticated)
+                if breaker:
+                    self.record_circuit(breaker, endpoint, failed=response.status_code in CIRCUIT_FAILURE_STATUS)
+                if bucket:
+                    if response.status_code == 429:
+                        bucket.penalize(parse_retry_after(response.headers.get('Retry-After')))
+                    elif response.status_code < 400:
+                        bucket.reward()
+                
+                # Expired or revoked token: log in once and resend
+                if response.status_code == 401 and endpoint != 'POST /login' and not reauthenticated:
+                    reauthenticated = True
+                    if self.ensure_token(stale_token=token_used):
+                        continue
+                    return response
+                if response.status_code not in RETRYABLE_STATUS:
+                    return response
+                delay = self.retry_delay(
+                    endpoint, attempt,
+                    status_code=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get('Retry-After'))
+                )
+                if delay is None:
+                    return response
+            
+            self.pause(delay)
+            attempt += 1
+    
+    def ensure_token(self, stale_token=None):
+        """
+        Make sure the bot holds a usable token, logging in at most once per account
+        
+        Args:
+            stale_token: Token that was just rejected with 401, if any
+        
+        Returns:
+            bool: True if a usable token is available
+        """
+        with self.token_manager.lock:
+            if self.reuse_token(stale_token):
+                return True
+            return self.refresh_token()
+    
+    def refresh_token(self, save_to_config=True):
+        """
+        Refresh authentication token by logging in again
+        
+        Args:
+            save_to_config: Whether to save the new token to config file
+        
+        Returns:
+            bool: True if token refresh successful, False otherwise
+        """
+        login = self.login_request()
+        if not login:
+            return False
+        url, headers, payload = login
+        
+        try:
+            logger.info("[INFO] Attempting to login and get authentication token...")
+            response = self._request('POST', url, headers=headers, json=payload)
+            response.raise_for_status()
+            return self.apply_login(response.json(), save_to_config)
+        
+        except requests.exceptions.RequestException as e:
+            logger.error(f"[ERROR] Failed to login: {e}")
+            self.print_error_response(e)
+            return False
+    
+    def check_active_subscription(self):
+        """
+        Check if user has an active subscription that supports credit refill
+        
+        Returns:
+            tuple: (bool, dict) - (has_active_subscription, subscription_info)
+        """
+        cached = self.cached_subscription()
+        if cached:
+            return cached
+        
+        url = f"{self.base_url}/subscriptions/active"
+        headers = {'referer': 'https://gaccode.com/subscriptions'}
+        
+        try:
+            # An invalid token (401) is refreshed transparently by _request
+            response = self._request('GET', url, headers=headers)
+            response.raise_for_status()
+            return self.parse_subscription(response.json())
+        
+        except requests.exceptions.RequestException as e:
+            logger.error(f"[ERROR] Failed to check subscription status: {e}")
+            if hasattr(e, 'response') and e.response is not None:
+                if e.response.status_code == 401:
+                    logger.info("[INFO] Token may be invalid. Try refreshing token.")
+            return False, None
+    
+    def check_today_reset(self):
+        """
+        Check if credit has been reset today by checking the latest ticket
+        
+        Returns:
+            tuple: (bool, str) - (already_reset_today, created_time)
+        """
+        url = f"{self.base_url}/tickets?page=1&limit=20"
+        headers = {'referer': 'https://gaccode.com/tickets'}
+        
+        try:
+            response = self._request('GET', url, headers=headers)
+            response.raise_for_status()
+            data = response.json()
+        except requests.exceptions.RequestException as e:
+            return self.today_reset_unverifiable(e)
+        
+        return self.parse_today_reset(data)
+    
+    def check_recaptcha_required(self):
+        """
+        Check if recaptcha is required for creating tickets
+        
+        Returns:
+            dict: Response containing recaptcha status, ticket count, and daily limit
+        """
+        url = f"{self.base_url}/tickets/recaptcha-required"
+        headers = {'referer': 'https://gaccode.com/tickets/new'}
+        
+        try:
+            response = self._request('GET', url, headers=headers)
+            response.raise_for_status()
+            return self.parse_recaptcha(response.json())
+        except requests.exceptions.RequestException as e:
+            logger.error(f"[ERROR] Failed to check recaptcha status: {e}")
+            return None
+    
+    def create_ticket(self):
+        """
+        Create a credit refill request ticket
+        
+        Returns:
+            dict: Response containing ticket information
+        """
+        url = f"{self.base_url}/tickets"
+        headers = {
+            'origin': 'https://gaccode.com',
+            'referer': 'https://gaccode.com/tickets/new',
         }
+        
+        self.journal_intent()
+        try:
+            response = self._request('POST', url, headers=headers, json=self.ticket_payload())
+            response.raise_for_status()
+            ticket_response = self.parse_created_ticket(response.json())
+            self.journal_result(ticket_response)
+            return ticket_response
+        
+        except requests.exceptions.RequestException as e:
+            logger.error(f"[ERROR] Failed to create ticket: {e}")
+            self.print_error_response(e)
+            self.journal_result(None, e.response.status_code if e.response is not None else None)
+            return None
+    
+    def verify_ticket(self, ticket_id):
+        """
+        Verify the ticket status
+        
+        Args:
+            ticket_id: ID of the ticket to verify
+        
+        Returns:
+            dict: Ticket information
+        """
+        url = f"{self.base_url}/tickets/{ticket_id}"
+        headers = {'referer': f'https://gaccode.com/tickets/{ticket_id}'}
+        
+        try:
+            response = self._request('GET', url, headers=headers)
+            response.raise_for_status()
+            return self.parse_verification(response.json())
+        
+        except requests.exceptions.RequestException as e:
+            logger.error(f"[ERROR] Failed to verify ticket: {e}")
+            return None
+    
+    def get_credit_balance(self):
+        """
+        Get current credit balance
+        
+        Returns:
+            dict: Credit balance information
+        """
+        url = f"{self.base_url}/credits/balance"
+        headers = {'referer': 'https://gaccode.com/'}
+        
+        try:
+            response = self._request('GET', url, headers=headers)
+            response.raise_for_status()
+            return self.parse_balance(response.json())
+        except requests.exceptions.RequestException as e:
+            logger.error(f"[ERROR] Failed to get credit balance: {e}")
+            return None
+    
+    def check_announcements(self):
+        """
+        Check for system announcements
+        
+        Announcements are fetched once per process for all bots (see
+        AnnouncementFeed) with a conditional request when possible.
+        
+        Returns:
+            list: List of announcements
+        """
+        return ANNOUNCEMENT_FEED.get(self.base_url, self.fetch_announcements, self.announcement_ttl)
+    
+    def fetch_announcements(self):
+        """
+        Fetch system announcements from the server
+        
+        Returns:
+            list: List of announcements
+        """
+        url = f"{self.base_url}/announcements"
+        conditional, cached = self.conditional_headers(url)
+        headers = {'referer': 'https://gaccode.com/dashboard', **conditional}
+        
+        try:
+            response = self._request('GET', url, headers=headers)
+            response.raise_for_status()
+            data = None if response.status_code == 304 else response.json()
+            data = self.conditional_result(url, response.status_code, data, response.headers, cached)
+            return self.parse_announcements(data or {})
+        
+        except requests.exceptions.RequestException as e:
+            logger.error(f"[ERROR] Failed to check announcements: {e}")
+            return None
+    
+    def wait_for_ticket_closed(self, ticket_id):
+        """
+        Poll the ticket until it is CLOSED or the verification deadline passes
+        
+        Args:
+            ticket_id: ID of the ticket to verify
+        
+        Returns:
+            dict: Last successful verification response (None if all failed)
+        """
+        started = time.monotonic()
+        deadline = started + self.verify_deadline()
+        delays = self.poll_delays()
+        verification = None
+        attempts = 0
+        
+        while True:
+            attempts += 1
+            data = self.verify_ticket(ticket_id)
+            if data and 'ticket' in data:
+                verification = data
+                if self.ticket_status(data) == 'CLOSED':
+                    self.record_time_to_close(time.monotonic() - started, attempts)
+                    return verification
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.record_time_to_close(None, attempts)
+                return verification
+            self.pause(min(next(delays), remaining))
+    
+    def prepare_boundary_run(self, skip_subscription_check=False, day_started=False):
+        """
+        Boundary mode: do every slow step of run() before 00:00 UTC, so that
+        only create_ticket() is left for after the boundary
+        
+        Args:
+            skip_subscription_check: Skip the subscription check
+            day_started: The target day has already begun (late start), so
+                today's reset may exist: check it like run() does
+        
+        Returns:
+            bool: True if the account is ready to submit its ticket
+        """
+        if day_started:
+            if self.check_local_state() is not None:
+                return False
+        
+        if self.needs_login() and not self.ensure_token():
+            return self.abort_login_failed()
+        
+        if not skip_subscription_check:
+            has_subscription, _ = self.check_active_subscription()
+            if not has_subscription:
+                return self.abort_no_subscription()
+        
+        if day_started:
+            already_reset, reset_time = self.check_today_reset()
+            if self.reconcile_journal(self.handle_reset_status(already_reset, reset_time)) is not None:
+                return False
+        
+        recaptcha_status = self.check_recaptcha_required()
+        if recaptcha_status and not day_started:
+            # The ticket count still belongs to the old day; only recaptcha matters
+            recaptcha_status = dict(recaptcha_status, ticketCountToday=0)
+        return self.recaptcha_allows_ticket(recaptcha_status)
+    
+    def probe_clock(self, skew, samples=8, spacing=0.21):
+        """
+        Feed the Date headers of a few cheap requests into a ClockSkew
+        
+        Args:
+            skew: ClockSkew to update
+            samples: Number of requests
+            spacing: Seconds between requests; not a divisor of one second, so
+                the samples hit different phases of the server's clock tick
+        """
+        url = f"{self.base_url}/tickets/recaptcha-required"
+        for i in range(samples):
+            if i:
+                self.pause(spacing)
+            sent_at = time.time()
+            try:
+                response = self._request('GET', url, headers={'referer': 'https://gaccode.com/tickets/new'})
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"[WARNING] Clock probe failed: {e}")
+                continue
+            skew.observe(response.headers.get('Date'), sent_at, time.time())
     
-    def save_config(self):
+    def keep_warm(self):
+        """Cheap request that (re)opens the pooled connection before firing"""
+        try:
+            self.session.get(f"{self.base_url}/tickets/recaptcha-required", timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            pass
+    
+    def start_preflight(self, check_balance=False, skip_subscription_check=False, check_announcements=True):
         """
-        Save current configuration (including updated token) to config file
+        Issue the independent pre-flight reads concurrently
+        
+        Args:
+            check_balance: Whether to fetch the balance as well
+            skip_subscription_check: Skip the subscription read
+            check_announcements: Whether to fetch system announcements
         
         Returns:
-            bool: True if save successful, False otherwise
+            dict: Pre-flight futures keyed by check name
         """
-        if not self.config_file_path:
-            print("[WARNING] No config file path provided, cannot save configuration")
-            return False
+        checks = {
+            'today_reset': self.check_today_reset,
+            'recaptcha': self.check_recaptcha_required,
+        }
+        if check_announcements:
+            checks['announcements'] = self.check_announcements
+        if not skip_subscription_check:
+            checks['subscription'] = self.check_active_subscription
+        if check_balance:
+            checks['balance'] = self.get_credit_balance
         
-        try:
-            # Update token in config
-            self.config['auth_token'] = self.auth_token
-            
-            # Save to file with pretty formatting
-            with open(self.config_file_path, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
-            
-            print(f"[SUCCESS] Configuration saved to {self.config_file_path}")
-            return True
-            
-        except Exception as e:
-            print(f"[ERROR] Failed to save configuration: {e}")
-            return False
+        # Each read runs in a copy of this thread's context, so its log lines
+        # keep the fleet account (LOG_ACCOUNT)
+        executor = ThreadPoolExecutor(max_workers=len(checks))
+        preflight = {name: executor.submit(contextvars.copy_context().run, func) for name, func in checks.items()}
+        # Let the reads finish in the background even if run() aborts early
+        executor.shutdown(wait=False)
+        return preflight
     
-    def refresh_token(self, save_to_config=True):
+    def _preflight_result(self, preflight, name, func):
         """
-        Refresh authentication token by logging in again
+        Get a pre-flight result, either from a concurrent read or by calling func now
+        
+        Reads that raced a token refresh were already resent by _request.
+        """
+        if preflight is None or name not in preflight:
+            return func()
+        return preflight[name].result()
+    
+    def run(self, check_balance=False, skip_subscription_check=False, check_announcements=True,
+            concurrent_preflight=False, force_server_check=False):
+        """
+        Run the complete credit reset process
         
         Args:
-            save_to_config: Whether to save the new token to config file
+            check_balance: Whether to check balance before and after
+            skip_subscription_check: Skip subscription check (for testing)
+            check_announcements: Whether to check system announcements
+            concurrent_preflight: Issue the pre-flight reads (announcements,
+                subscription, today's reset, recaptcha) concurrently
+            force_server_check: Ignore the local state store (reset record and
+                subscription cache) and ask the server
         
         Returns:
-            bool: True if token refresh successful, False otherwise
+            bool: True if successful, False otherwise
         """
-        if not self.email or not self.password:
-            print("[ERROR] Email and password are required for token refresh")
-            print("[INFO] Please provide email and password in configuration")
-            return False
+        self.start_metrics()
+        try:
+            return self._run(check_balance, skip_subscription_check, check_announcements,
+                             concurrent_preflight, force_server_check)
+        finally:
+            self.finish_metrics()
+    
+    def _run(self, check_balance, skip_subscription_check, check_announcements,
+             concurrent_preflight, force_server_check):
+        """Steps of run()"""
+        self.print_run_header()
         
-        url = f"{self.base_url}/login"
-        headers = {
-            'content-type': 'application/json',
-            'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36',
-            'accept': '*/*',
-            'origin': 'https://gaccode.com',
-            'referer': 'https://gaccode.com/login',
-        }
+        self.phase('local_state')
+        # A reset recorded locally today is conclusive; skip all network checks
+        self.force_server_check = force_server_check
+        if not force_server_check:
+            outcome = self.check_local_state()
+            if outcome is not None:
+                return outcome
         
-        payload = {
-            "email": self.email,
-            "password": self.password
-        }
+        # Step -2: Check and initialize auth token
+        self.phase('token')
+        if self.needs_login():
+            logger.info("\n[STEP -2] No valid auth token found (missing or about to expire), attempting to login...")
+            if not self.ensure_token():
+                return self.abort_login_failed()
+            logger.info("[INFO] ✓ Authentication token obtained and saved!")
         
-        try:
-            print("[INFO] Attempting to login and get authentication token...")
-            response = requests.post(url, headers=headers, json=payload, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+        preflight = None
+        if concurrent_preflight:
+            logger.info("\n[INFO] Running pre-flight checks concurrently...")
+            preflight = self.start_preflight(
+                check_balance=check_balance,
+                skip_subscription_check=skip_subscription_check,
+                check_announcements=check_announcements
+            )
+        
+        # Step -1.5: Check system announcements
+        if check_announcements:
+            self.phase('announcements')
+            logger.info("\n[STEP -1.5] Checking system announcements...")
+            announcements = self._preflight_result(preflight, 'announcements', self.check_announcements)
+            self.notify_announcements(announcements)
+        
+        # Step -1: Check active subscription
+        if not skip_subscription_check:
+            self.phase('subscription')
+            logger.info("\n[STEP -1] Checking active subscription...")
+            has_subscription, sub_info = self._preflight_result(
+                preflight, 'subscription', self.check_active_subscription
+            )
             
-            if 'token' in data:
-                self.auth_token = data['token']
-                # Update authorization header
-                self.headers['authorization'] = f'Bearer {self.auth_token}'
-                print(f"[SUCCESS] Login successful!")
-                print(f"[INFO] New token: {self.auth_token[:50]}...")
-                
-                # Save to config file
-                if save_to_config:
-                    self.save_config()
-                
-                # Send token refresh email notification
-                self.send_email_alert(
-                    "认证Token已刷新",
-                    f"登录成功，已自动更新认证token。\n登录时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\nToken (前50字符): {self.auth_token[:50]}...",
-                    "token_refresh"
-                )
-                
-                return True
+            if not has_subscription:
+                return self.abort_no_subscription()
             else:
-                print(f"[ERROR] No token in response: {data}")
-                return False
-                
-        except requests.exceptions.RequestException as e:
-            print(f"[ERROR] Failed to login: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    error_data = e.response.json()
-                    print(f"[ERROR] Server response: {error_data}")
-                except:
-                    print(f"[ERROR] Server response: {e.response.text}")
+                logger.info("[INFO] ✓ Active subscription verified!")
+        else:
+            logger.info("\n[INFO] Skipping subscription check (--skip-subscription-check)")
+        
+        # Step 0: Check if already reset today
+        self.phase('today_reset')
+        logger.info("\n[STEP 0] Checking if already reset today...")
+        already_reset, reset_time = self._preflight_result(preflight, 'today_reset', self.check_today_reset)
+        
+        outcome = self.reconcile_journal(self.handle_reset_status(already_reset, reset_time))
+        if outcome is not None:
+            return outcome
+        
+        # Optional: Check balance before
+        if check_balance:
+            self.phase('balance_before')
+            logger.info("\n[STEP 0.5] Checking credit balance before reset...")
+            self._preflight_result(preflight, 'balance', self.get_credit_balance)
+        
+        # Step 1: Check recaptcha requirement
+        self.phase('recaptcha')
+        logger.info("\n[STEP 1] Checking recaptcha requirement...")
+        recaptcha_status = self._preflight_result(preflight, 'recaptcha', self.check_recaptcha_required)
+        
+        # 🔴 测试模式：在这里停止，不创建工单
+        # 取消下面两行注释来启用测试模式
+        # print("\n[TEST MODE] Stopping before creating ticket...")
+        # return True
+        
+        if not self.recaptcha_allows_ticket(recaptcha_status):
             return False
+        
+        # Step 2: Create ticket
+        self.phase('create')
+        logger.info("\n[STEP 2] Creating credit refill request ticket...")
+        ticket_response = self.create_ticket()
+        
+        return self.finish_ticket(ticket_response, check_balance)
     
-    def check_active_subscription(self):
+    def finish_ticket(self, ticket_response, check_balance=False):
         """
-        Check if user has an active subscription that supports credit refill
+        Steps 3-4 of run(): verify a created ticket and report the outcome
+        
+        Args:
+            ticket_response: Result of create_ticket()
+            check_balance: Whether to check the balance after the reset
         
         Returns:
-            tuple: (bool, dict) - (has_active_subscription, subscription_info)
+            bool: True if successful, False otherwise
         """
-        url = f"{self.base_url}/subscriptions/active"
-        headers = self.headers.copy()
-        headers['referer'] = 'https://gaccode.com/subscriptions'
+        if not ticket_response or 'ticket' not in ticket_response:
+            return self.abort_create_failed()
         
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            # Check if token is invalid (401)
-            if response.status_code == 401:
-                print("[WARNING] Token appears to be invalid (401 Unauthorized)")
-                if self.refresh_token():
-                    # Retry with new token
-                    headers['authorization'] = f'Bearer {self.auth_token}'
-                    response = requests.get(url, headers=headers, timeout=10)
-                else:
-                    return False, None
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            subscriptions = data.get('subscriptions', [])
-            
-            if not subscriptions:
-                print("[WARNING] No active subscriptions found")
-                print("[INFO] Credit refill may not be available without an active subscription")
-                return False, None
-            
-            # Check the first (most recent) subscription
-            sub = subscriptions[0]
-            sub_info = sub.get('subscription', {})
-            
-            print(f"[INFO] Active subscription found:")
-            print(f"  - Tier: {sub_info.get('tier')}")
-            print(f"  - Description: {sub_info.get('description')}")
-            print(f"  - Start Date: {sub.get('startDate')}")
-            print(f"  - End Date: {sub.get('endDate')}")
-            print(f"  - Supports Refill: {sub_info.get('supportsRefill')}")
-            
-            # Check if subscription supports refill
-            if not sub_info.get('supportsRefill', False):
-                print("[WARNING] Current subscription does not support credit refill")
-                return False, sub_info
-            
-            # Check if subscription has expired
-            end_date_str = sub.get('endDate')
-            if end_date_str:
-                end_date = datetime.fromisoformat(end_date_str.replace('Z', '+00:00'))
-                current_date = datetime.now(timezone.utc)
-                
-                if current_date > end_date:
-                    print("[WARNING] Subscription has expired")
-                    print(f"[INFO] Expired on: {end_date_str}")
-                    return False, sub_info
+        ticket_id = ticket_response['ticket'].get('id')
+        
+        # Step 3: Verify ticket
+        self.phase('verify')
+        logger.info("\n[STEP 3] Verifying ticket status...")
+        verification = self.wait_for_ticket_closed(ticket_id)
+        
+        if not verification:
+            return self.abort_verify_failed()
+        
+        # Check if ticket is closed (which means credits are reset)
+        status = self.ticket_status(verification)
+        if status == 'CLOSED':
+            logger.info("\n" + "=" * 60)
+            logger.info("[SUCCESS] Credits have been reset successfully! ✅")
+            logger.info("=" * 60)
             
-            return True, sub_info
+            # Optional: Check balance after
+            balance_data = None
+            if check_balance:
+                self.phase('balance_after')
+                logger.info("\n[STEP 4] Checking credit balance after reset...")
+                balance_data = self.get_credit_balance()
             
-        except requests.exceptions.RequestException as e:
-            print(f"[ERROR] Failed to check subscription status: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                if e.response.status_code == 401:
-                    print("[INFO] Token may be invalid. Try refreshing token.")
-            return False, None
+            return self.report_reset_success(ticket_id, verification, balance_data)
+        else:
+            return self.report_unclosed_ticket(ticket_id, status)
+
+
+class AsyncCreditResetBot(CreditResetBotBase):
+    """
+    asyncio counterpart of CreditResetBot (requires the optional aiohttp package)
     
-    def check_today_reset(self):
+    Exposes the same operations as coroutines and shares all response parsing
+    and decision logic with CreditResetBot through CreditResetBotBase.
+    Use it as an async context manager, or call close() when done.
+    """
+    
+    def __init__(self, config, config_file_path=None, retry_budget=None, connector=None):
         """
-        Check if credit has been reset today by checking the latest ticket
+        Initialize the bot with configuration
+        
+        Args:
+            config: Configuration dictionary
+            config_file_path: Path to config file (for saving updated token)
+            retry_budget: Optional RetryBudget shared with other bots (fleet runs)
+            connector: Optional aiohttp connector shared by many bots
+        """
+        super().__init__(config, config_file_path, retry_budget)
+        self._connector = connector
+        self._session = None
+        self._token_lock = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    async def pause(self, seconds):
+        """asyncio.sleep() counted as sleep time in the run metrics"""
+        import asyncio
+        
+        started = time.perf_counter()
+        await asyncio.sleep(seconds)
+        if self.metrics:
+            self.metrics.record_sleep(time.perf_counter() - started)
+    
+    async def close(self):
+        """Close the HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    def _get_session(self):
+        if self._session is None:
+            aiohttp = _import_aiohttp()
+            self._session = aiohttp.ClientSession(
+                connector=self._connector,
+                connector_owner=self._connector is None,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+    
+    async def _request(self, method, url, headers=None, json=None, with_headers=False):
+        """
+        Send an HTTP request and read its JSON body, retrying transient
+        failures according to the endpoint's retry policy and logging in
+        again once if the token is rejected (401)
         
         Returns:
-            tuple: (bool, str) - (already_reset_today, created_time)
+            tuple: (status_code, data) - data is None for non-JSON bodies;
+                (status_code, data, headers) if with_headers is set
+        
+        Raises:
+            AsyncRequestError: For network errors and HTTP error statuses
         """
-        url = f"{self.base_url}/tickets?page=1&limit=20"
-        headers = self.headers.copy()
-        headers['referer'] = 'https://gaccode.com/tickets'
+        import asyncio
         
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            tickets = data.get('tickets', [])
-            if not tickets:
-                print("[INFO] No previous tickets found")
-                return False, None
-            
-            # Get the first (most recent) ticket
-            latest_ticket = tickets[0]
-            created_at = latest_ticket.get('createdAt')
-            
-            if not created_at:
-                print("[WARNING] Latest ticket has no createdAt field")
-                return False, None
-            
-            # Parse the timestamp (ISO 8601 format with Z for UTC)
-            created_datetime = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-            current_datetime = datetime.now(timezone.utc)
-            
-            # Check if the date is the same (ignoring time)
-            created_date = created_datetime.date()
-            current_date = current_datetime.date()
+        aiohttp = _import_aiohttp()
+        endpoint = self.endpoint_key(method, url)
+        bucket = self.rate_bucket(endpoint)
+        breaker = self.circuit_breaker(endpoint)
+        attempt = 0
+        reauthenticated = False
+        
+        while True:
+            if breaker and not breaker.allow():
+                raise AsyncRequestError(self.circuit_refused(endpoint))
+            if bucket:
+                wait = bucket.reserve()
+                if wait > 0:
+                    await self.pause(wait)
             
-            print(f"[INFO] Latest ticket information:")
-            print(f"  - Ticket ID: {latest_ticket.get('id')}")
-            print(f"  - Title: {latest_ticket.get('title')}")
-            print(f"  - Created at: {created_at}")
-            print(f"  - Status: {latest_ticket.get('status')}")
+            token_used = self.auth_token
+            request_headers = dict(self.headers)
+            for key, value in (headers or {}).items():
+                if value is None:
+                    request_headers.pop(key, None)
+                else:
+                    request_headers[key] = value
             
-            if created_date == current_date:
-                return True, created_at
+            sent_at = time.perf_counter()
+            try:
+                async with self._get_session().request(method, url, headers=request_headers, json=json) as response:
+                    text = await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if self.metrics:
+                    self.record_http(endpoint, sent_at, None, self.payload_size(json), 0, attempt > 0 or reauthenticated)
+                if breaker:
+                    self.record_circuit(breaker, endpoint, failed=True)
+                # A failed connect (DNS, TCP, TLS) means nothing was sent
+                never_sent = isinstance(e, aiohttp.ClientConnectorError)
+                delay = self.retry_delay(endpoint, attempt, error=e, never_sent=never_sent)
+                if delay is None:
+                    raise AsyncRequestError(f"{type(e).__name__}: {e} for url: {url}") from e
             else:
-                return False, created_at
+                if self.metrics:
+                    self.record_http(endpoint, sent_at, response.status, self.payload_size(json),
+                                     len(text.encode('utf-8')), attempt > 0 or reauthenticated)
+                if breaker:
+                    self.record_circuit(breaker, endpoint, failed=response.status in CIRCUIT_FAILURE_STATUS)
+                if bucket:
+                    if response.status == 429:
+                        bucket.penalize(parse_retry_after(response.headers.get('Retry-After')))
+                    elif response.status < 400:
+                        bucket.reward()
                 
-        except requests.exceptions.RequestException as e:
-            print(f"[ERROR] Failed to check tickets: {e}")
-            print(f"[WARNING] Cannot verify today's reset status due to network error")
-            print(f"[INFO] Aborting to avoid duplicate submission")
-            return True, None  # Return True to abort execution
-        except (ValueError, AttributeError) as e:
-            print(f"[ERROR] Failed to parse date: {e}")
-            print(f"[WARNING] Cannot verify today's reset status due to parsing error")
-            print(f"[INFO] Proceeding with caution...")
-            return False, None  # Data format error, proceed but warn
+                # Expired or revoked token: log in once and resend
+                if response.status == 401 and endpoint != 'POST /login' and not reauthenticated:
+                    reauthenticated = True
+                    if await self.ensure_token(stale_token=token_used):
+                        continue
+                    break
+                if response.status not in RETRYABLE_STATUS:
+                    break
+                delay = self.retry_delay(
+                    endpoint, attempt,
+                    status_code=response.status,
+                    retry_after=parse_retry_after(response.headers.get('Retry-After'))
+                )
+                if delay is None:
+                    break
+            
+            await self.pause(delay)
+            attempt += 1
+        
+        if response.status >= 400:
+            raise AsyncRequestError(
+                f"{response.status} Error: {response.reason} for url: {url}",
+                AsyncResponse(response.status, text)
+            )
+        
+        try:
+            data = AsyncResponse(response.status, text).json() if text else None
+        except ValueError:
+            data = None
+        if with_headers:
+            return response.status, data, response.headers
+        return response.status, data
     
-    def check_recaptcha_required(self):
-        """
-        Check if recaptcha is required for creating tickets
+    async def offload(self, func, *args):
+        """Run a blocking step (state store, file locks, config writes) in a worker thread"""
+        import asyncio
         
-        Returns:
-            dict: Response containing recaptcha status, ticket count, and daily limit
+        return await asyncio.to_thread(func, *args)
+    
+    @asynccontextmanager
+    async def account_token_lock(self):
         """
-        url = f"{self.base_url}/tickets/recaptcha-required"
-        headers = self.headers.copy()
-        headers['referer'] = 'https://gaccode.com/tickets/new'
+        Hold the account's TokenManager lock, shared with CreditResetBot
+        instances of the account, without blocking the event loop
+        """
+        import asyncio
         
+        lock = self.token_manager.lock
+        acquiring = asyncio.ensure_future(asyncio.to_thread(lock.acquire))
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            print(f"[INFO] Recaptcha check result:")
-            print(f"  - Requires Recaptcha: {data.get('requiresRecaptcha')}")
-            print(f"  - Tickets today: {data.get('ticketCountToday')}")
-            print(f"  - Daily limit: {data.get('dailyLimit')}")
-            return data
-        except requests.exceptions.RequestException as e:
-            print(f"[ERROR] Failed to check recaptcha status: {e}")
-            return None
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The worker thread still gets the lock; give it back
+            acquiring.add_done_callback(lambda future: future.cancelled() or lock.release())
+            raise
+        try:
+            yield
+        finally:
+            lock.release()
     
-    def create_ticket(self):
+    async def ensure_token(self, stale_token=None):
         """
-        Create a credit refill request ticket
+        Coroutine version of CreditResetBot.ensure_token()
         
-        Returns:
-            dict: Response containing ticket information
+        Coroutines of this bot queue on an asyncio lock first, so at most one
+        worker thread per bot waits for the account's TokenManager lock.
         """
-        url = f"{self.base_url}/tickets"
-        headers = self.headers.copy()
-        headers['origin'] = 'https://gaccode.com'
-        headers['referer'] = 'https://gaccode.com/tickets/new'
+        if self._token_lock is None:
+            import asyncio
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock, self.account_token_lock():
+            if self.reuse_token(stale_token):
+                return True
+            return await self.refresh_token()
+    
+    async def refresh_token(self, save_to_config=True):
+        """Coroutine version of CreditResetBot.refresh_token()"""
+        login = self.login_request()
+        if not login:
+            return False
+        url, headers, payload = login
         
-        payload = {
-            "categoryId": self.ticket_config.get('category_id', 3),
-            "title": self.ticket_config.get('title', '重置积分'),
-            "description": self.ticket_config.get('description', ''),
-            "language": self.ticket_config.get('language', 'zh')
-        }
+        try:
+            logger.info("[INFO] Attempting to login and get authentication token...")
+            _, data = await self._request('POST', url, headers=headers, json=payload)
+            return await self.offload(self.apply_login, data or {}, save_to_config)
+        except AsyncRequestError as e:
+            logger.error(f"[ERROR] Failed to login: {e}")
+            self.print_error_response(e)
+            return False
+    
+    async def check_active_subscription(self):
+        """Coroutine version of CreditResetBot.check_active_subscription()"""
+        cached = await self.offload(self.cached_subscription)
+        if cached:
+            return cached
+        
+        url = f"{self.base_url}/subscriptions/active"
+        headers = {'referer': 'https://gaccode.com/subscriptions'}
         
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'ticket' in data:
-                ticket = data['ticket']
-                print(f"[SUCCESS] Ticket created successfully!")
-                print(f"  - Ticket ID: {ticket.get('id')}")
-                print(f"  - Title: {ticket.get('title')}")
-                print(f"  - Status: {ticket.get('status')}")
-                print(f"  - Created at: {ticket.get('createdAt')}")
-                
-                # Print messages if any
-                messages = ticket.get('messages', [])
-                if messages:
-                    print(f"  - Response message: {messages[0].get('message')}")
-                
-                return data
-            else:
-                print(f"[WARNING] Unexpected response format: {data}")
-                return data
-                
-        except requests.exceptions.RequestException as e:
-            print(f"[ERROR] Failed to create ticket: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    error_data = e.response.json()
-                    print(f"[ERROR] Server response: {error_data}")
-                except:
-                    print(f"[ERROR] Server response: {e.response.text}")
-            return None
+            # An invalid token (401) is refreshed transparently by _request
+            _, data = await self._request('GET', url, headers=headers)
+            return await self.offload(self.parse_subscription, data or {})
+        
+        except AsyncRequestError as e:
+            logger.error(f"[ERROR] Failed to check subscription status: {e}")
+            if e.status_code == 401:
+                logger.info("[INFO] Token may be invalid. Try refreshing token.")
+            return False, None
     
-    def verify_ticket(self, ticket_id):
-        """
-        Verify the ticket status
+    async def check_today_reset(self):
+        """Coroutine version of CreditResetBot.check_today_reset()"""
+        url = f"{self.base_url}/tickets?page=1&limit=20"
+        headers = {'referer': 'https://gaccode.com/tickets'}
         
-        Args:
-            ticket_id: ID of the ticket to verify
-            
-        Returns:
-            dict: Ticket information
-        """
-        url = f"{self.base_url}/tickets/{ticket_id}"
-        headers = self.headers.copy()
-        headers['referer'] = f'https://gaccode.com/tickets/{ticket_id}'
+        try:
+            _, data = await self._request('GET', url, headers=headers)
+        except AsyncRequestError as e:
+            return self.today_reset_unverifiable(e)
+        
+        return await self.offload(self.parse_today_reset, data or {})
+    
+    async def check_recaptcha_required(self):
+        """Coroutine version of CreditResetBot.check_recaptcha_required()"""
+        url = f"{self.base_url}/tickets/recaptcha-required"
+        headers = {'referer': 'https://gaccode.com/tickets/new'}
+        
+        try:
+            _, data = await self._request('GET', url, headers=headers)
+            return self.parse_recaptcha(data or {})
+        except AsyncRequestError as e:
+            logger.error(f"[ERROR] Failed to check recaptcha status: {e}")
+            return None
+    
+    async def create_ticket(self):
+        """Coroutine version of CreditResetBot.create_ticket()"""
+        url = f"{self.base_url}/tickets"
+        headers = {
+            'origin': 'https://gaccode.com',
+            'referer': 'https://gaccode.com/tickets/new',
+        }
         
+        await self.offload(self.journal_intent)
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'ticket' in data:
-                ticket = data['ticket']
-                print(f"[INFO] Ticket verification:")
-                print(f"  - Ticket ID: {ticket.get('id')}")
-                print(f"  - Status: {ticket.get('status')}")
-                print(f"  - Updated at: {ticket.get('updatedAt')}")
-                
-                messages = ticket.get('messages', [])
-                if messages:
-                    print(f"  - Latest message: {messages[-1].get('message')}")
-                
-                return data
-            else:
-                print(f"[WARNING] Unexpected response format: {data}")
-                return data
-                
-        except requests.exceptions.RequestException as e:
-            print(f"[ERROR] Failed to verify ticket: {e}")
+            _, data = await self._request('POST', url, headers=headers, json=self.ticket_payload())
+            ticket_response = self.parse_created_ticket(data or {})
+            await self.offload(self.journal_result, ticket_response)
+            return ticket_response
+        except AsyncRequestError as e:
+            logger.error(f"[ERROR] Failed to create ticket: {e}")
+            self.print_error_response(e)
+            await self.offload(self.journal_result, None, e.status_code)
             return None
     
-    def get_credit_balance(self):
-        """
-        Get current credit balance
+    async def verify_ticket(self, ticket_id):
+        """Coroutine version of CreditResetBot.verify_ticket()"""
+        url = f"{self.base_url}/tickets/{ticket_id}"
+        headers = {'referer': f'https://gaccode.com/tickets/{ticket_id}'}
         
-        Returns:
-            dict: Credit balance information
-        """
+        try:
+            _, data = await self._request('GET', url, headers=headers)
+            return self.parse_verification(data or {})
+        except AsyncRequestError as e:
+            logger.error(f"[ERROR] Failed to verify ticket: {e}")
+            return None
+    
+    async def get_credit_balance(self):
+        """Coroutine version of CreditResetBot.get_credit_balance()"""
         url = f"{self.base_url}/credits/balance"
-        headers = self.headers.copy()
-        headers['referer'] = 'https://gaccode.com/'
+        headers = {'referer': 'https://gaccode.com/'}
         
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            print(f"[INFO] Credit balance:")
-            print(f"  - Balance: {data.get('balance', 'N/A')}")
-            return data
-        except requests.exceptions.RequestException as e:
-            print(f"[ERROR] Failed to get credit balance: {e}")
+            _, data = await self._request('GET', url, headers=headers)
+            return await self.offload(self.parse_balance, data or {})
+        except AsyncRequestError as e:
+            logger.error(f"[ERROR] Failed to get credit balance: {e}")
             return None
     
-    def check_announcements(self):
+    async def check_announcements(self):
+        """Coroutine version of CreditResetBot.check_announcements()"""
+        return await ANNOUNCEMENT_FEED.get_async(self.base_url, self.fetch_announcements, self.announcement_ttl)
+    
+    async def fetch_announcements(self):
+        """Coroutine version of CreditResetBot.fetch_announcements()"""
+        url = f"{self.base_url}/announcements"
+        conditional, cached = await self.offload(self.conditional_headers, url)
+        headers = {'referer': 'https://gaccode.com/dashboard', **conditional}
+        
+        try:
+            status, data, response_headers = await self._request('GET', url, headers=headers, with_headers=True)
+            data = await self.offload(self.conditional_result, url, status, data, response_headers, cached)
+            return self.parse_announcements(data or {})
+        except AsyncRequestError as e:
+            logger.error(f"[ERROR] Failed to check announcements: {e}")
+            return None
+    
+    async def wait_for_ticket_closed(self, ticket_id):
+        """Coroutine version of CreditResetBot.wait_for_ticket_closed()"""
+        started = time.monotonic()
+        deadline = started + self.verify_deadline()
+        delays = self.poll_delays()
+        verification = None
+        attempts = 0
+        
+        while True:
+            attempts += 1
+            data = await self.verify_ticket(ticket_id)
+            if data and 'ticket' in data:
+                verification = data
+                if self.ticket_status(data) == 'CLOSED':
+                    self.record_time_to_close(time.monotonic() - started, attempts)
+                    return verification
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.record_time_to_close(None, attempts)
+                return verification
+            await self.pause(min(next(delays), remaining))
+    
+    async def run(self, check_balance=False, skip_subscription_check=False, check_announcements=True,
+                  concurrent_preflight=False, force_server_check=False):
         """
-        Check for system announcements
+        Coroutine version of CreditResetBot.run()
         
         Returns:
-            list: List of announcements
+            bool: True if successful, False otherwise
         """
-        url = f"{self.base_url}/announcements"
-        headers = self.headers.copy()
-        headers['referer'] = 'https://gaccode.com/dashboard'
+        self.start_metrics()
+        try:
+            return await self._run(check_balance, skip_subscription_check, check_announcements,
+                                   concurrent_preflight, force_server_check)
+        finally:
+            self.finish_metrics()
+    
+    async def _run(self, check_balance, skip_subscription_check, check_announcements,
+                   concurrent_preflight, force_server_check):
+        """Steps of run()"""
+        self.print_run_header()
+        
+        self.phase('local_state')
+        # A reset recorded locally today is conclusive; skip all network checks
+        self.force_server_check = force_server_check
+        if not force_server_check:
+            outcome = await self.offload(self.check_local_state)
+            if outcome is not None:
+                return outcome
+        
+        # Step -2: Check and initialize auth token
+        self.phase('token')
+        if self.needs_login():
+            logger.info("\n[STEP -2] No valid auth token found (missing or about to expire), attempting to login...")
+            if not await self.ensure_token():
+                return await self.offload(self.abort_login_failed)
+            logger.info("[INFO] ✓ Authentication token obtained and saved!")
+        
+        checks = {
+            'today_reset': self.check_today_reset,
+            'recaptcha': self.check_recaptcha_required,
+        }
+        if check_announcements:
+            checks['announcements'] = self.check_announcements
+        if not skip_subscription_check:
+            checks['subscription'] = self.check_active_subscription
+        if check_balance:
+            checks['balance'] = self.get_credit_balance
+        
+        tasks = {}
+        if concurrent_preflight:
+            logger.info("\n[INFO] Running pre-flight checks concurrently...")
+            import asyncio
+            tasks = {name: asyncio.ensure_future(func()) for name, func in checks.items()}
+        
+        async def result(name):
+            if name not in tasks:
+                return await checks[name]()
+            return await tasks[name]
         
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            announcements = data.get('announcements', [])
+            # Step -1.5: Check system announcements
+            if check_announcements:
+                self.phase('announcements')
+                logger.info("\n[STEP -1.5] Checking system announcements...")
+                await self.offload(self.notify_announcements, await result('announcements'))
             
-            if announcements:
-                print(f"[INFO] Found {len(announcements)} announcement(s):")
-                for idx, announcement in enumerate(announcements, 1):
-                    print(f"  [{idx}] Title: {announcement.get('title', 'N/A')}")
-                    print(f"      Type: {announcement.get('type', 'N/A')}")
-                    print(f"      Created: {announcement.get('createdAt', 'N/A')}")
+            # Step -1: Check active subscription
+            if not skip_subscription_check:
+                self.phase('subscription')
+                logger.info("\n[STEP -1] Checking active subscription...")
+                has_subscription, sub_info = await result('subscription')
+                if not has_subscription:
+                    return await self.offload(self.abort_no_subscription)
+                logger.info("[INFO] ✓ Active subscription verified!")
             else:
-                print("[INFO] No announcements found")
+                logger.info("\n[INFO] Skipping subscription check (--skip-subscription-check)")
             
-            return announcements
+            # Step 0: Check if already reset today
+            self.phase('today_reset')
+            logger.info("\n[STEP 0] Checking if already reset today...")
+            already_reset, reset_time = await result('today_reset')
+            outcome = await self.offload(
+                lambda: self.reconcile_journal(self.handle_reset_status(already_reset, reset_time))
+            )
+            if outcome is not None:
+                return outcome
             
-        except requests.exceptions.RequestException as e:
-            print(f"[ERROR] Failed to check announcements: {e}")
-            return None
+            # Optional: Check balance before
+            if check_balance:
+                self.phase('balance_before')
+                logger.info("\n[STEP 0.5] Checking credit balance before reset...")
+                await result('balance')
+            
+            # Step 1: Check recaptcha requirement
+            self.phase('recaptcha')
+            logger.info("\n[STEP 1] Checking recaptcha requirement...")
+            if not await self.offload(self.recaptcha_allows_ticket, await result('recaptcha')):
+                return False
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        
+        # Step 2: Create ticket
+        self.phase('create')
+        logger.info("\n[STEP 2] Creating credit refill request ticket...")
+        ticket_response = await self.create_ticket()
+        
+        return await self.finish_ticket(ticket_response, check_balance)
     
-    def send_email_alert(self, subject, body, alert_type="info"):
-        """
-        Send email alert notification
+    async def finish_ticket(self, ticket_response, check_balance=False):
+        """Coroutine version of CreditResetBot.finish_ticket()"""
+        if not ticket_response or 'ticket' not in ticket_response:
+            return await self.offload(self.abort_create_failed)
         
-        Args:
-            subject: Email subject
-            body: Email body text
-            alert_type: Type of alert (info, success, warning, error)
-        """
-        email_config = self.config.get('email_alerts', {})
+        ticket_id = ticket_response['ticket'].get('id')
         
-        # Check if email alerts are enabled
-        if not email_config.get('enabled', False):
-            return
+        # Step 3: Verify ticket
+        self.phase('verify')
+        logger.info("\n[STEP 3] Verifying ticket status...")
+        verification = await self.wait_for_ticket_closed(ticket_id)
         
-        # Check notification settings based on alert type
-        if alert_type == "success" and not email_config.get('on_success', False):
-            return
-        if alert_type == "error" and not email_config.get('on_failure', True):
-            return
-        if alert_type == "token_refresh" and not email_config.get('on_token_refresh', True):
-            return
+        if not verification:
+            return await self.offload(self.abort_verify_failed)
         
-        # Check required email configuration fields
-        required_fields = ['smtp_server', 'smtp_user', 'smtp_password', 'from_email', 'to_email']
-        missing_fields = [field for field in required_fields if not email_config.get(field)]
+        # Check if ticket is closed (which means credits are reset)
+        status = self.ticket_status(verification)
+        if status == 'CLOSED':
+            logger.info("\n" + "=" * 60)
+            logger.info("[SUCCESS] Credits have been reset successfully! ✅")
+            logger.info("=" * 60)
+            
+            # Optional: Check balance after
+            balance_data = None
+            if check_balance:
+                self.phase('balance_after')
+                logger.info("\n[STEP 4] Checking credit balance after reset...")
+                balance_data = await self.get_credit_balance()
+            
+            return await self.offload(self.report_reset_success, ticket_id, verification, balance_data)
+        else:
+            return await self.offload(self.report_unclosed_ticket, ticket_id, status)
+
+
+def load_config(config_path):
+    """
+    Load configuration from file
+    
+    Args:
+        config_path: Path to configuration file
         
-        if missing_fields:
-            print(f"[WARNING] Email configuration incomplete, missing: {missing_fields}")
+    Returns:
+        dict: Configuration dictionary
+    """
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return config
+    except FileNotFoundError:
+        logger.error(f"[ERROR] Configuration file not found: {config_path}")
+        logger.info("[INFO] Please create config.json based on config.json.example")
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        logger.error(f"[ERROR] Invalid JSON in configuration file: {e}")
+        sys.exit(1)
+
+
+def load_fleet_configs(fleet_path):
+    """
+    Collect account configurations for a fleet run
+    
+    Args:
+        fleet_path: Directory of *.json account configs, or a manifest file.
+            A manifest is a JSON list (or {"accounts": [...]}) whose entries
+            are config file paths (relative to the manifest) or inline configs.
+    
+    Returns:
+        list: (account_name, config, config_file_path, error) tuples
+    """
+    fleet_path = Path(fleet_path)
+    entries = []
+    
+    if fleet_path.is_dir():
+        for path in sorted(fleet_path.glob('*.json')):
+            # Skip state files such as the token cache
+            if not path.name.startswith('.'):
+                entries.append(str(path))
+    else:
+        with open(fleet_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if isinstance(manifest, dict):
+            manifest = manifest.get('accounts', [])
+        for entry in manifest:
+            if isinstance(entry, str) and not os.path.isabs(entry):
+                entry = str(fleet_path.parent / entry)
+            entries.append(entry)
+    
+    accounts = []
+    for idx, entry in enumerate(entries, 1):
+        if isinstance(entry, dict):
+            name = entry.get('name') or entry.get('email') or f'account-{idx}'
+            accounts.append((name, entry, None, None))
+            continue
+        
+        name = Path(entry).stem
+        try:
+            with open(entry, 'r', encoding='utf-8') as f:
+                accounts.append((name, json.load(f), entry, None))
+        except (OSError, json.JSONDecodeError) as e:
+            accounts.append((name, None, entry, f'cannot load config: {e}'))
+    
+    return accounts
+
+
+def run_account(name, config, config_file_path, run_kwargs, retry_budget=None, bot=None, coordinator=None):
+    """
+    Run the reset process for a single fleet account
+    
+    Args:
+        bot: Existing bot to reuse (daemon mode); config and
+            config_file_path are only used to create one when None
+        coordinator: LeaseCoordinator; the account only runs under its lease
+    
+    Returns:
+        dict: Result with account, status, reason and duration
+    """
+    if coordinator:
+        lease = coordinator.acquire(coordinator.account_key(name, bot.config if bot else config))
+        if not lease.acquired:
+            return coordinator.blocked_result(name, lease)
+        try:
+            result = run_account(name, config, config_file_path, run_kwargs, retry_budget, bot)
+            lease.done = result['status'] in ('success', 'already_reset')
+            return result
+        finally:
+            coordinator.release(lease)
+    
+    started = time.monotonic()
+    try:
+        with log_account(name):
+            if bot is None:
+                bot = CreditResetBot(config, config_file_path=config_file_path, retry_budget=retry_budget)
+            bot.metrics_label = name
+            bot.last_result = (None, None)
+            bot.last_time_to_close = None
+            bot.circuit_tripped = None
+            bot.circuit_failed = set()
+            bot.run(**run_kwargs)
+        status, reason = circuit_result(bot)
+        time_to_close = bot.last_time_to_close
+    except Exception as e:
+        status, reason = 'error', f'unexpected error: {e}'
+        time_to_close = None
+    
+    return {
+        'account': name,
+        'status': status or 'error',
+        'reason': reason,
+        'duration': round(time.monotonic() - started, 3),
+        'time_to_close': time_to_close,
+    }
+
+
+def circuit_result(bot):
+    """
+    Outcome of a finished run; runs stopped by an open circuit breaker are
+    'skipped' so the fleet re-queues them
+    
+    Returns:
+        tuple: (status, reason)
+    """
+    endpoint = bot.stopped_by_outage()
+    if endpoint and bot.last_result[0] != 'success':
+        return 'skipped', f'circuit breaker open ({endpoint})'
+    return bot.last_result
+
+
+def fleet_retry_budget(accounts, retry_budget=None):
+    """
+    Retry budget shared by all accounts of a fleet run
+    
+    Defaults to one retry per account on average, so an outage cannot be
+    amplified into a retry storm by a large fleet.
+    """
+    return RetryBudget(retry_budget if retry_budget is not None else max(10, len(accounts)))
+
+
+def next_utc_midnight(now=None):
+    """Start of the next UTC day"""
+    now = now or datetime.now(timezone.utc)
+    return datetime.combine(now.date(), datetime.min.time(), tzinfo=timezone.utc) + timedelta(days=1)
+
+
+def sleep_until(deadline):
+    """Sleep until time.time() reaches deadline, yielding in small steps at the end for precision"""
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0:
             return
+        time.sleep(remaining - 0.005 if remaining > 0.02 else 0)
+
+
+def login_backlog(bots):
+    """
+    Seconds the shared POST /login rate buckets need to let the logins of
+    bots through
+    
+    Returns:
+        tuple: (pending logins, seconds)
+    """
+    logins = {}  # rate bucket (None: not limited) -> pending logins
+    for bot in bots:
+        if bot.needs_login():
+            bucket = bot.rate_bucket('POST /login')
+            logins[bucket] = logins.get(bucket, 0) + 1
+    seconds = max([bucket.backlog(count) for bucket, count in logins.items() if bucket is not None] + [0.0])
+    return sum(logins.values()), seconds
+
+
+def snipe_account(name, bot, fire_at, boundary_at, check_balance=False, prepared_at=None):
+    """
+    Boundary mode for one prepared account: submit the ticket at fire_at,
+    then verify it like run() does
+    
+    Args:
+        fire_at: Local time.time() at which to send create_ticket
+        boundary_at: Local time.time() corresponding to 00:00 UTC on the server
+        prepared_at: Local time.time() at which preparation finished; past
+            the boundary the ticket fires late, which is logged and recorded
+    
+    Returns:
+        dict: Fleet result plus submission timing relative to the boundary
+    """
+    started = time.monotonic()
+    sent_ms = latency_ms = None
+    late = prepared_at - boundary_at if prepared_at is not None and prepared_at > boundary_at else None
+    bot.metrics_label = name
+    try:
+        with log_account(name):
+            if late is not None:
+                logger.warning(f"[WARNING] Prepared {late:.1f}s after 00:00 UTC, the ticket is submitted late")
+            # Reopen the pooled connection if the server dropped it while idle
+            sleep_until(fire_at - 2)
+            bot.keep_warm()
+            
+            sleep_until(fire_at)
+            bot.start_metrics()
+            if bot.metrics:
+                bot.metrics.prepared_late = late
+            bot.phase('create')
+            sent_at = time.time()
+            ticket_response = bot.create_ticket()
+            received_at = time.time()
+            sent_ms = round((sent_at - boundary_at) * 1000, 1)
+            latency_ms = round((received_at - boundary_at) * 1000, 1)
+            
+            bot.finish_ticket(ticket_response, check_balance)
+        status, reason = circuit_result(bot)
+    except Exception as e:
+        status, reason = 'error', f'unexpected error: {e}'
+    finally:
+        bot.finish_metrics()
+    
+    return {
+        'account': name,
+        'status': status or 'error',
+        'reason': reason,
+        'duration': round(time.monotonic() - started, 3),
+        'time_to_close': bot.last_time_to_close,
+        'sent_ms': sent_ms,
+        'latency_ms': latency_ms,
+        'prepared_late_ms': round(late * 1000, 1) if late is not None else None,
+    }
+
+
+def run_boundary(accounts, lead=60, margin=0.05, late_window=300, check_balance=False,
+                 skip_subscription_check=False, coordinator=None):
+    """
+    Boundary mode: prepare every account ahead of 00:00 UTC and submit all
+    tickets as soon as the new UTC day starts on the server
+    
+    Login, subscription and recaptcha checks run lead seconds before the
+    boundary; the server clock offset is estimated from Date headers so
+    create_ticket fires margin seconds after the server's midnight.
+    
+    Args:
+        accounts: (account_name, config, config_file_path, error) tuples
+        lead: Seconds before the boundary to start preparing; logins are
+            rate limited, so large fleets without valid tokens need more
+        margin: Seconds after the boundary to fire, on top of the error
+            of the clock offset estimate
+        late_window: Started less than this many seconds after a boundary,
+            fire for that boundary right away instead of waiting a day (after
+            the same already-reset checks as run())
+        check_balance: Whether to check the balance after the reset
+        skip_subscription_check: Skip subscription check (for testing)
+        coordinator: LeaseCoordinator; accounts only fire under their lease
+            for the boundary's day
+    
+    Returns:
+        int: Aggregate exit code (0 if every account succeeded)
+    """
+    if coordinator:
+        accounts = coordinator.shard_accounts(accounts)
+    if not accounts:
+        logger.error("[ERROR] No account configurations found")
+        return 1
+    
+    now = datetime.now(timezone.utc)
+    boundary = next_utc_midnight(now)
+    if (now - (boundary - timedelta(days=1))).total_seconds() < late_window:
+        boundary -= timedelta(days=1)
+    day_started = boundary <= now
+    logger.info(f"[INFO] Boundary mode: {len(accounts)} account(s), target {boundary:%Y-%m-%d %H:%M:%S} UTC")
+    
+    wait = (boundary - now).total_seconds() - lead
+    if wait > 0:
+        logger.info(f"[INFO] Waiting {wait:.0f}s before preparing...")
+        sleep_until(time.time() + wait)
+    
+    # One warm keep-alive connection per account at the boundary
+    configure_http_pool(pool_maxsize=max(len(accounts), DEFAULT_POOL_MAXSIZE))
+    budget = fleet_retry_budget(accounts)
+    
+    results = []
+    bots = {}
+    leases = {}
+    
+    def finish(result):
+        results.append(result)
+        print_fleet_result(result)
+        lease = leases.pop(result['account'], None)
+        if lease:
+            lease.done = result['status'] in ('success', 'already_reset')
+            coordinator.release(lease)
+    
+    for name, config, config_file_path, error in accounts:
+        if error:
+            results.append({'account': name, 'status': 'error', 'reason': error, 'duration': 0.0})
+            logger.info(f"[FLEET] {name}: error ({error})")
+            continue
+        if coordinator:
+            lease = coordinator.acquire(coordinator.account_key(name, config), day=boundary.date())
+            if not lease.acquired:
+                finish(coordinator.blocked_result(name, lease))
+                continue
+            leases[name] = lease
+        try:
+            bots[name] = CreditResetBot(config, config_file_path=config_file_path, retry_budget=budget)
+        except Exception as e:
+            finish({'account': name, 'status': 'error', 'reason': f'unexpected error: {e}', 'duration': 0.0})
+    
+    def prepare(name, bot):
+        with log_account(name):
+            ok = bot.prepare_boundary_run(skip_subscription_check, day_started=day_started)
+            prepared_at[name] = time.time()
+            return ok
+    
+    if not day_started:
+        # Logins share the POST /login rate bucket; a large fleet needing
+        # fresh tokens may not get through it before the boundary
+        logins, backlog = login_backlog(bots.values())
+        remaining = (boundary - datetime.now(timezone.utc)).total_seconds()
+        if backlog > remaining:
+            logger.warning(f"[WARNING] {logins} login(s) need about {backlog:.0f}s at the login rate limit, "
+                           f"but the boundary is {remaining:.0f}s away; raise --snipe-lead")
+    
+    logger.info("[INFO] Preparing accounts (login, subscription, recaptcha)...")
+    prepared_at = {}
+    ready = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(bots))) as executor:
+        prepared = {executor.submit(prepare, name, bot): name for name, bot in bots.items()}
+        for future in as_completed(prepared):
+            name = prepared[future]
+            bot = bots[name]
+            try:
+                ok = future.result()
+            except Exception as e:
+                ok = False
+                bot.last_result = ('error', f'unexpected error: {e}')
+            if ok:
+                ready[name] = bot
+            else:
+                status, reason = bot.last_result
+                finish({'account': name, 'status': status or 'error', 'reason': reason, 'duration': 0.0})
+    
+    # Clock offset per API host, measured through an already prepared account
+    skews = {}
+    for bot in ready.values():
+        if bot.base_url not in skews:
+            skews[bot.base_url] = skew = ClockSkew()
+            bot.probe_clock(skew)
+            error = f" ± {skew.error * 1000:.0f}ms" if skew.error is not None else ""
+            logger.info(f"[INFO] Server clock offset for {bot.base_url}: {skew.offset * 1000:+.0f}ms{error} "
+                        f"({skew.samples} sample(s))")
+    
+    logger.info(f"[INFO] {len(ready)} account(s) ready")
+    with ThreadPoolExecutor(max_workers=max(1, len(ready))) as executor:
+        futures = []
+        for name, bot in ready.items():
+            # Never fire early: a ticket dated the old day would count for it
+            skew = skews[bot.base_url]
+            boundary_at = boundary.timestamp() - skew.offset
+            fire_at = boundary_at + margin + (skew.error or 0.0)
+            futures.append(executor.submit(snipe_account, name, bot, fire_at, boundary_at, check_balance,
+                                           None if day_started else prepared_at[name]))
+        for future in as_completed(futures):
+            finish(future.result())
+    
+    return summarize_fleet(results)
+
+
+def run_fleet(fleet_path, workers=4, retry_budget=None, requeue_for=300, coordinator=None, **run_kwargs):
+    """
+    Run CreditResetBot.run() for every account of a fleet concurrently
+    
+    Args:
+        fleet_path: Directory or manifest of account configs
+        workers: Maximum number of accounts processed in parallel
+        retry_budget: Total retries allowed across the fleet (default: one per account)
+        requeue_for: Seconds to keep re-queuing accounts skipped by an open
+            circuit breaker
+        coordinator: LeaseCoordinator sharing the fleet with other runners
+        **run_kwargs: Arguments passed through to CreditResetBot.run()
+    
+    Returns:
+        int: Aggregate exit code (0 if every account succeeded or was already reset)
+    """
+    accounts = load_fleet_configs(fleet_path)
+    if not accounts:
+        logger.error(f"[ERROR] No account configurations found in {fleet_path}")
+        return 1
+    
+    if coordinator:
+        accounts = coordinator.shard_accounts(accounts)
+    logger.info(f"[INFO] Fleet run: {len(accounts)} account(s), {workers} worker(s)")
+    
+    # One keep-alive connection per worker, shared by all accounts
+    configure_http_pool(pool_maxsize=max(workers, DEFAULT_POOL_MAXSIZE))
+    budget = fleet_retry_budget(accounts, retry_budget)
+    
+    results = []
+    skipped = []  # (account entry, result) of runs stopped by an open circuit breaker
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {}
+        for name, config, config_file_path, error in accounts:
+            if error:
+                results.append({'account': name, 'status': 'error', 'reason': error, 'duration': 0.0})
+                logger.info(f"[FLEET] {name}: error ({error})")
+                continue
+            entry = (name, config, config_file_path)
+            futures[executor.submit(run_account, *entry, run_kwargs, budget, coordinator=coordinator)] = entry
         
+        # Stream one line per account as soon as it finishes
+        for future in as_completed(futures):
+            result = future.result()
+            print_fleet_result(result)
+            if result['status'] == 'skipped':
+                skipped.append((futures[future], result))
+            else:
+                results.append(result)
+        
+        # Re-queue skipped accounts once the breakers let a probe through:
+        # one account probes the API, the rest follow if it got through
+        deadline = time.monotonic() + requeue_for
+        while skipped:
+            wait = max(1.0, CIRCUIT_BREAKERS.retry_in())
+            if time.monotonic() + wait > deadline:
+                break
+            logger.info(f"[FLEET] {len(skipped)} account(s) skipped by an open circuit breaker, re-queued in {wait:.0f}s")
+            time.sleep(wait)
+            
+            entries = [entry for entry, _ in skipped]
+            skipped = []
+            probe = run_account(*entries[0], run_kwargs, budget, coordinator=coordinator)
+            print_fleet_result(probe)
+            if probe['status'] == 'skipped':
+                skipped = [(entry, probe) for entry in entries]
+                continue
+            results.append(probe)
+            
+            rest = entries[1:]
+            rerun = executor.map(lambda e: run_account(*e, run_kwargs, budget, coordinator=coordinator), rest)
+            for entry, result in zip(rest, rerun):
+                print_fleet_result(result)
+                if result['status'] == 'skipped':
+                    skipped.append((entry, result))
+                else:
+                    results.append(result)
+    
+    results.extend(result for _, result in skipped)
+    return summarize_fleet(results)
+
+
+def print_fleet_result(result):
+    """Print the one-line result of a fleet account"""
+    line = f"[FLEET] {result['account']}: {result['status']} ({result['reason']}) in {result['duration']}s"
+    if result.get('latency_ms') is not None:
+        line += f", submitted +{result['sent_ms']}ms / answered +{result['latency_ms']}ms after 00:00 UTC"
+    if result.get('prepared_late_ms') is not None:
+        line += f", prepared +{result['prepared_late_ms']}ms after 00:00 UTC"
+    if result.get('time_to_close') is not None:
+        line += f", ticket closed after {result['time_to_close']}s"
+    logger.info(line)
+
+
+def summarize_fleet(results):
+    """
+    Print the fleet summary
+    
+    Returns:
+        int: Aggregate exit code (1 if any account errored)
+    """
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    
+    logger.info("=" * 60)
+    logger.info(f"[INFO] Fleet summary: " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    logger.info("=" * 60)
+    
+    return 1 if counts.get('error') or counts.get('skipped') else 0
+
+
+async def run_account_async(name, config, config_file_path, run_kwargs, connector, semaphore,
+                            retry_budget=None, coordinator=None):
+    """
+    Run AsyncCreditResetBot.run() for a single fleet account
+    
+    Args:
+        coordinator: LeaseCoordinator; the account only runs under its lease
+    
+    Returns:
+        dict: Result with account, status, reason and duration
+    """
+    import asyncio
+    
+    if coordinator:
+        # Lease operations hit the (possibly shared) database; keep them off the loop
+        lease = await asyncio.to_thread(coordinator.acquire, coordinator.account_key(name, config))
+        if not lease.acquired:
+            return coordinator.blocked_result(name, lease)
+        try:
+            result = await run_account_async(name, config, config_file_path, run_kwargs, connector, semaphore,
+                                             retry_budget)
+            lease.done = result['status'] in ('success', 'already_reset')
+            return result
+        finally:
+            await asyncio.to_thread(coordinator.release, lease)
+    
+    async with semaphore:
+        started = time.monotonic()
         try:
-            print(f"[INFO] Sending email: {subject}")
+            with log_account(name):
+                async with AsyncCreditResetBot(config, config_file_path, retry_budget=retry_budget,
+                                               connector=connector) as bot:
+                    bot.metrics_label = name
+                    await bot.run(**run_kwargs)
+            status, reason = circuit_result(bot)
+            time_to_close = bot.last_time_to_close
+        except Exception as e:
+            status, reason = 'error', f'unexpected error: {e}'
+            time_to_close = None
+    
+    return {
+        'account': name,
+        'status': status or 'error',
+        'reason': reason,
+        'duration': round(time.monotonic() - started, 3),
+        'time_to_close': time_to_close,
+    }
+
+
+async def run_fleet_async(fleet_path, concurrency=1000, retry_budget=None, requeue_for=300, coordinator=None,
+                          **run_kwargs):
+    """
+    Run every account of a fleet on one asyncio event loop
+    
+    Args:
+        fleet_path: Directory or manifest of account configs
+        concurrency: Maximum number of accounts in flight at once
+        retry_budget: Total retries allowed across the fleet (default: one per account)
+        requeue_for: Seconds to keep re-queuing accounts skipped by an open
+            circuit breaker
+        coordinator: LeaseCoordinator sharing the fleet with other runners
+        **run_kwargs: Arguments passed through to AsyncCreditResetBot.run()
+    
+    Returns:
+        int: Aggregate exit code (0 if every account succeeded or was already reset)
+    """
+    import asyncio
+    
+    aiohttp = _import_aiohttp()
+    accounts = load_fleet_configs(fleet_path)
+    if not accounts:
+        logger.error(f"[ERROR] No account configurations found in {fleet_path}")
+        return 1
+    
+    if coordinator:
+        accounts = coordinator.shard_accounts(accounts)
+    logger.info(f"[INFO] Async fleet run: {len(accounts)} account(s), {concurrency} in flight")
+    
+    results = []
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    budget = fleet_retry_budget(accounts, retry_budget)
+    # One connector (connection pool) shared by every account
+    connector = aiohttp.TCPConnector(limit=max(1, concurrency))
+    skipped = []  # (account entry, result) of runs stopped by an open circuit breaker
+    
+    async def run_entry(entry):
+        return entry, await run_account_async(*entry, run_kwargs, connector, semaphore, budget, coordinator)
+    
+    def collect(entry, result):
+        print_fleet_result(result)
+        if result['status'] == 'skipped':
+            skipped.append((entry, result))
+        else:
+            results.append(result)
+    
+    try:
+        tasks = []
+        for name, config, config_file_path, error in accounts:
+            if error:
+                results.append({'account': name, 'status': 'error', 'reason': error, 'duration': 0.0})
+                logger.info(f"[FLEET] {name}: error ({error})")
+                continue
+            tasks.append(run_entry((name, config, config_file_path)))
+        
+        # Stream one line per account as soon as it finishes
+        for next_result in asyncio.as_completed(tasks):
+            collect(*await next_result)
+        
+        # Re-queue skipped accounts once the breakers let a probe through:
+        # one account probes the API, the rest follow if it got through
+        deadline = time.monotonic() + requeue_for
+        while skipped:
+            wait = max(1.0, CIRCUIT_BREAKERS.retry_in())
+            if time.monotonic() + wait > deadline:
+                break
+            logger.info(f"[FLEET] {len(skipped)} account(s) skipped by an open circuit breaker, re-queued in {wait:.0f}s")
+            await asyncio.sleep(wait)
             
-            # Create email message
-            msg = MIMEMultipart()
-            msg['From'] = email_config['from_email']
-            msg['To'] = email_config['to_email']
-            msg['Subject'] = Header(f"[GAC积分重置工具] {subject}", 'utf-8')
+            entries = [entry for entry, _ in skipped]
+            skipped = []
+            entry, probe = await run_entry(entries[0])
+            if probe['status'] == 'skipped':
+                print_fleet_result(probe)
+                skipped = [(entry, probe) for entry in entries]
+                continue
+            collect(entry, probe)
             
-            # Email body with timestamp
-            full_body = f"""
-GAC积分重置工具通知
+            for next_result in asyncio.as_completed([run_entry(entry) for entry in entries[1:]]):
+                collect(*await next_result)
+    finally:
+        await connector.close()
+    
+    results.extend(result for _, result in skipped)
+    return summarize_fleet(results)
 
-时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-类型: {alert_type}
 
-{body}
+def parse_shard(value):
+    """
+    Parse an 'I/N' shard spec
+    
+    Returns:
+        tuple: (index, count) with 0 <= index < count
+    """
+    index, sep, count = value.partition('/')
+    index, count = int(index), int(count or 0)
+    if not sep or not 0 <= index < count:
+        raise ValueError(f"invalid shard: {value}")
+    return index, count
 
----
-此邮件由GAC积分重置工具自动发送
-配置文件: {self.config_file_path}
-"""
-            
-            msg.attach(MIMEText(full_body, 'plain', 'utf-8'))
-            
-            # Connect to SMTP server based on port
-            smtp_port = email_config.get('smtp_port', 587)
-            
-            if smtp_port == 465:
-                # SSL connection
-                server = smtplib.SMTP_SSL(email_config['smtp_server'], smtp_port, timeout=30)
-            else:
-                # STARTTLS connection (587, 25)
-                server = smtplib.SMTP(email_config['smtp_server'], smtp_port, timeout=30)
-                server.starttls()
-            
-            # Login and send
-            server.login(email_config['smtp_user'], email_config['smtp_password'])
-            server.sendmail(email_config['from_email'], [email_config['to_email']], msg.as_string())
-            server.quit()
-            
-            print(f"[SUCCESS] Email sent successfully: {subject}")
-            
-        except Exception as e:
-            print(f"[ERROR] Failed to send email: {e}")
-            import traceback
-            print(f"[DEBUG] Email error details: {traceback.format_exc()}")
+
+def parse_run_at(value):
+    """
+    Parse a 'HH:MM[:SS]' time of day (UTC)
+    
+    Returns:
+        timedelta: Offset after 00:00 UTC
+    """
+    parts = [int(part) for part in value.split(':')]
+    if not 2 <= len(parts) <= 3:
+        raise ValueError(f"invalid time of day: {value}")
+    hours, minutes, seconds = (parts + [0])[:3]
+    if not (0 <= hours < 24 and 0 <= minutes < 60 and 0 <= seconds < 60):
+        raise ValueError(f"invalid time of day: {value}")
+    return timedelta(hours=hours, minutes=minutes, seconds=seconds)
+
+
+class ResetDaemon:
+    """
+    Long-running scheduler for one account or a whole fleet
     
-    def run(self, check_balance=False, skip_subscription_check=False, check_announcements=True):
+    Bots (and with them HTTP sessions and tokens) stay alive between runs.
+    Each account runs once per UTC day, run_at after midnight - the same day
+    boundary check_today_reset uses. An account without a reset recorded
+    for the current day is due immediately, which catches up on runs missed
+    while the daemon was down. Failed runs are retried after retry_interval,
+    and config files are watched and reloaded without a restart.
+    """
+    
+    def __init__(self, source, fleet=False, workers=4, run_at=timedelta(minutes=5),
+                 retry_interval=600, reload_interval=30, token_override=None, coordinator=None, **run_kwargs):
         """
-        Run the complete credit reset process
-        
         Args:
-            check_balance: Whether to check balance before and after
-            skip_subscription_check: Skip subscription check (for testing)
-            check_announcements: Whether to check system announcements
-            
-        Returns:
-            bool: True if successful, False otherwise
+            source: Config file, or fleet directory/manifest if fleet is set
+            fleet: Whether source is a fleet (see load_fleet_configs)
+            workers: Maximum number of accounts run in parallel
+            run_at: Daily run time as offset after 00:00 UTC
+            retry_interval: Seconds until a failed run is retried
+            reload_interval: Seconds between config change checks
+            token_override: Auth token replacing the one of a single config
+            coordinator: LeaseCoordinator sharing the accounts with other runners
+            **run_kwargs: Arguments passed through to CreditResetBot.run()
         """
-        print("=" * 60)
-        print(f"Credit Reset Bot - Started at {datetime.now()}")
-        print("=" * 60)
+        self.source = source
+        self.fleet = fleet
+        self.workers = max(1, workers)
+        self.run_at = run_at
+        self.retry_interval = retry_interval
+        self.reload_interval = reload_interval
+        self.token_override = token_override
+        self.coordinator = coordinator
+        self.run_kwargs = run_kwargs
+        self.bots = {}       # account name -> warm CreditResetBot
+        self.paths = {}      # account name -> config file path
+        self.next_run = {}   # account name -> scheduled run (UTC)
+        self._signature = None
+        self._stop = threading.Event()
+    
+    def stop(self):
+        """Ask the daemon to exit once the runs in flight are finished"""
+        self._stop.set()
+    
+    def next_day_run(self, now=None):
+        """Scheduled run time on the next UTC day"""
+        return next_utc_midnight(now) + self.run_at
+    
+    def _load_accounts(self):
+        if self.fleet:
+            accounts = load_fleet_configs(self.source)
+            return self.coordinator.shard_accounts(accounts) if self.coordinator else accounts
         
-        # Step -2: Check and initialize auth token
-        if not self.auth_token or self.auth_token == 'YOUR_AUTH_TOKEN_HERE':
-            print("\n[STEP -2] No valid auth token found, attempting to login...")
-            if not self.refresh_token(save_to_config=True):
-                print("\n" + "=" * 60)
-                print("[ERROR] ❌ Failed to obtain authentication token!")
-                print("[INFO] Please check your email and password in configuration.")
-                print("=" * 60)
-                return False
-            print("[INFO] ✓ Authentication token obtained and saved!")
+        name = Path(self.source).stem
+        try:
+            with open(self.source, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            return [(name, None, self.source, f'cannot load config: {e}')]
+        if self.token_override:
+            config['auth_token'] = self.token_override
+        return [(name, config, self.source, None)]
+    
+    def _config_signature(self):
+        # Modification times of the source and every known config file
+        paths = {str(self.source)}
+        paths.update(path for path in self.paths.values() if path)
+        if self.fleet and os.path.isdir(self.source):
+            paths.update(str(path) for path in Path(self.source).glob('*.json'))
         
-        # Step -1.5: Check system announcements
-        if check_announcements:
-            print("\n[STEP -1.5] Checking system announcements...")
-            announcements = self.check_announcements()
-            
-            if announcements:
-                # Format announcements for email
-                announcement_text = ""
-                for idx, announcement in enumerate(announcements, 1):
-                    announcement_text += f"\n公告 {idx}:\n"
-                    announcement_text += f"标题: {announcement.get('title', 'N/A')}\n"
-                    announcement_text += f"类型: {announcement.get('type', 'N/A')}\n"
-                    announcement_text += f"内容: {announcement.get('content', announcement.get('message', 'N/A'))}\n"
-                    announcement_text += f"发布时间: {announcement.get('createdAt', 'N/A')}\n"
-                    announcement_text += "-" * 40
-                
-                # Send announcement email
-                self.send_email_alert(
-                    f"系统公告 ({len(announcements)}条)",
-                    f"GAC系统有新的公告信息:\n{announcement_text}\n\n请访问 https://gaccode.com/dashboard 查看详情。",
-                    "info"
-                )
-                print("[INFO] ✓ Announcement notification sent!")
-            else:
-                print("[INFO] ✓ No announcements to notify")
+        signature = []
+        for path in sorted(paths):
+            try:
+                signature.append((path, os.stat(path).st_mtime_ns))
+            except OSError:
+                signature.append((path, None))
+        return tuple(signature)
+    
+    def reload(self):
+        """Pick up added, removed and edited account configs"""
+        signature = self._config_signature()
+        if signature == self._signature:
+            return
         
-        # Step -1: Check active subscription
-        if not skip_subscription_check:
-            print("\n[STEP -1] Checking active subscription...")
-            has_subscription, sub_info = self.check_active_subscription()
-            
-            if not has_subscription:
-                print("\n" + "=" * 60)
-                print("[WARNING] ⚠️  No valid active subscription!")
-                print("[INFO] Credit refill requires an active subscription that supports refill.")
-                print("[INFO] Please check your subscription status at https://gaccode.com/subscriptions")
-                print("=" * 60)
-                
-                # Send subscription error email
-                self.send_email_alert(
-                    "订阅检查失败",
-                    "未找到有效的活跃订阅或订阅不支持积分重置。\n请访问 https://gaccode.com/subscriptions 检查订阅状态。",
-                    "error"
-                )
-                
-                # For automated runs, we return False
-                return False
-            else:
-                print("[INFO] ✓ Active subscription verified!")
-        else:
-            print("\n[INFO] Skipping subscription check (--skip-subscription-check)")
+        try:
+            accounts = self._load_accounts()
+        except (OSError, ValueError) as e:
+            logger.warning(f"[WARNING] Cannot reload {self.source}, keeping current accounts: {e}")
+            return
         
-        # Step 0: Check if already reset today
-        print("\n[STEP 0] Checking if already reset today...")
-        already_reset, reset_time = self.check_today_reset()
-        
-        if already_reset:
-            if reset_time is None:
-                # Network error or other issue, cannot verify
-                print("\n" + "=" * 60)
-                print(f"[ERROR] ❌ Cannot verify today's reset status!")
-                print(f"[INFO] Aborting execution to avoid duplicate submission.")
-                print(f"[INFO] Please check your network connection and try again.")
-                print("=" * 60)
-                
-                # Send network error email
-                self.send_email_alert(
-                    "网络错误 - 无法验证重置状态",
-                    "无法验证今天是否已经重置积分（网络连接失败）。\n为避免重复提交，已终止执行。\n请检查网络连接后重试。",
-                    "error"
-                )
-                
-                return False  # Return False to indicate error
+        now = datetime.now(timezone.utc)
+        seen = set()
+        for name, config, config_file_path, error in accounts:
+            seen.add(name)
+            if error:
+                # Keep serving the last good config until the file is fixed
+                logger.info(f"[DAEMON] {name}: {error}")
+                continue
+            
+            bot = self.bots.get(name)
+            if bot is not None and bot.config == config:
+                continue
+            try:
+                new_bot = CreditResetBot(config, config_file_path=config_file_path)
+            except Exception as e:
+                logger.info(f"[DAEMON] {name}: cannot create bot: {e}")
+                continue
+            self.bots[name] = new_bot
+            self.paths[name] = config_file_path
+            
+            if bot is not None:
+                logger.info(f"[DAEMON] {name}: configuration reloaded")
+            elif new_bot.local_reset_today():
+                self.next_run[name] = self.next_day_run(now)
+                logger.info(f"[DAEMON] {name}: already reset today, next run at {self.next_run[name]:%Y-%m-%d %H:%M:%S} UTC")
             else:
-                # Already reset today
-                print("\n" + "=" * 60)
-                print(f"[INFO] ⚠️  Already reset today!")
-                print(f"[INFO] Last reset time: {reset_time}")
-                print(f"[INFO] Please wait until tomorrow to reset again.")
-                print("=" * 60)
-                
-                # Send email notification for already reset
-                self.send_email_alert(
-                    "今日已重置 - 无需操作",
-                    f"今天已经完成积分重置，无需重复操作。\n\n上次重置时间: {reset_time}\n\n请等待明天再次重置。",
-                    "info"
-                )
-                
-                return True  # Return True because no error occurred
-        else:
-            print("[INFO] ✓ No reset found today, proceeding...")
-        
-        # Optional: Check balance before
-        if check_balance:
-            print("\n[STEP 0.5] Checking credit balance before reset...")
-            self.get_credit_balance()
-        
-        # Step 1: Check recaptcha requirement
-        print("\n[STEP 1] Checking recaptcha requirement...")
-        recaptcha_status = self.check_recaptcha_required()
-        
-        if not recaptcha_status:
-            print("[FAILED] Could not check recaptcha status")
-            return False
-        
-        # 🔴 测试模式：在这里停止，不创建工单
-        # 取消下面两行注释来启用测试模式
-        # print("\n[TEST MODE] Stopping before creating ticket...")
-        # return True
-        
-        if recaptcha_status.get('requiresRecaptcha', False):
-            print("[FAILED] Recaptcha is required. Manual intervention needed.")
-            return False
-        
-        # Check if daily limit is reached
-        ticket_count = recaptcha_status.get('ticketCountToday', 0)
-        daily_limit = recaptcha_status.get('dailyLimit', 3)
+                self.next_run[name] = now
+                logger.info(f"[DAEMON] {name}: loaded, due now")
         
-        if ticket_count >= daily_limit:
-            print(f"[FAILED] Daily ticket limit reached ({ticket_count}/{daily_limit})")
-            return False
-        
-        # Step 2: Create ticket
-        print("\n[STEP 2] Creating credit refill request ticket...")
-        time.sleep(1)  # Small delay to be polite to the server
-        
-        ticket_response = self.create_ticket()
-        
-        if not ticket_response or 'ticket' not in ticket_response:
-            print("[FAILED] Could not create ticket")
-            return False
-        
-        ticket_id = ticket_response['ticket'].get('id')
+        for name in list(self.bots):
+            if name not in seen:
+                del self.bots[name]
+                self.paths.pop(name, None)
+                self.next_run.pop(name, None)
+                logger.info(f"[DAEMON] {name}: removed")
         
-        # Step 3: Verify ticket
-        print("\n[STEP 3] Verifying ticket status...")
-        time.sleep(1)  # Small delay
+        self._signature = self._config_signature()
+    
+    def schedule(self, result):
+        """Schedule the next run of an account after a finished run"""
+        name = result['account']
+        if name not in self.bots:
+            return
         
-        verification = self.verify_ticket(ticket_id)
+        now = datetime.now(timezone.utc)
+        if result['status'] in ('success', 'already_reset'):
+            self.next_run[name] = self.next_day_run(now)
+        else:
+            self.next_run[name] = now + timedelta(seconds=self.retry_interval)
+        logger.info(f"[DAEMON] {name}: next run at {self.next_run[name]:%Y-%m-%d %H:%M:%S} UTC")
+    
+    def serve(self):
+        """
+        Run the schedule until stop() is called or the process is interrupted
         
-        if not verification:
-            print("[FAILED] Could not verify ticket")
-            return False
+        Returns:
+            int: Exit code
+        """
+        logger.info("=" * 60)
+        logger.info(f"[INFO] Daemon started: {self.source}, daily run at {self.run_at} after 00:00 UTC")
+        logger.info("=" * 60)
         
-        # Check if ticket is closed (which means credits are reset)
-        status = verification['ticket'].get('status')
-        if status == 'CLOSED':
-            print("\n" + "=" * 60)
-            print("[SUCCESS] Credits have been reset successfully! ✅")
-            print("=" * 60)
-            
-            # Optional: Check balance after
-            balance_info = ""
-            if check_balance:
-                print("\n[STEP 4] Checking credit balance after reset...")
-                time.sleep(1)
-                balance_data = self.get_credit_balance()
-                if balance_data and 'balance' in balance_data:
-                    balance_info = f"\n当前积分: {balance_data.get('balance', 'N/A')}"
-            
-            # Send success email notification
-            messages = verification['ticket'].get('messages', [])
-            response_msg = messages[-1].get('message', '') if messages else ''
-            
-            self.send_email_alert(
-                "积分重置成功 ✅",
-                f"积分已成功重置！\n\n工单ID: {ticket_id}\n响应消息: {response_msg}\n完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{balance_info}",
-                "success"
-            )
+        running = {}  # future -> account name
+        next_reload = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                while not self._stop.is_set():
+                    if time.monotonic() >= next_reload:
+                        self.reload()
+                        next_reload = time.monotonic() + self.reload_interval
+                    
+                    now = datetime.now(timezone.utc)
+                    due = [name for name, run_at in self.next_run.items()
+                           if run_at <= now and name not in running.values()]
+                    if due:
+                        budget = fleet_retry_budget(due)
+                        for name in due:
+                            bot = self.bots[name]
+                            bot.retry_budget = budget
+                            future = executor.submit(run_account, name, None, None, self.run_kwargs,
+                                                     bot=bot, coordinator=self.coordinator)
+                            running[future] = name
+                    
+                    finished = [future for future in running if future.done()]
+                    for future in finished:
+                        del running[future]
+                        result = future.result()
+                        print_fleet_result(result)
+                        self.schedule(result)
+                    if finished and not running:
+                        ALERT_DISPATCHER.flush()
+                        METRICS.write()
+                    
+                    # Wake up for the next due run or config check; the wait is
+                    # capped by reload_interval, so a suspended host catches up
+                    # soon after it resumes
+                    timeout = next_reload - time.monotonic()
+                    # An account in flight keeps its past next_run until
+                    # schedule(); it must not cut the wait to zero
+                    waiting = [run_at for name, run_at in self.next_run.items() if name not in running.values()]
+                    if waiting:
+                        timeout = min(timeout, (min(waiting) - datetime.now(timezone.utc)).total_seconds())
+                    if running:
+                        # Poll the runs in flight
+                        timeout = min(timeout, 0.5)
+                    self._stop.wait(max(0.0, timeout))
+            except KeyboardInterrupt:
+                self.stop()
             
-            return True
-        else:
-            print(f"\n[WARNING] Ticket created but status is: {status}")
-            print("Please check manually if credits were reset.")
-            
-            # Send warning email
-            self.send_email_alert(
-                "积分重置状态异常",
-                f"工单已创建但状态为: {status}\n工单ID: {ticket_id}\n请手动检查是否重置成功。",
-                "error"
-            )
-            
-            return False
-
-
-def load_config(config_path):
-    """
-    Load configuration from file
-    
-    Args:
-        config_path: Path to configuration file
+            if running:
+                logger.info(f"[INFO] Stopping, waiting for {len(running)} run(s) in flight...")
         
-    Returns:
-        dict: Configuration dictionary
-    """
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        return config
-    except FileNotFoundError:
-        print(f"[ERROR] Configuration file not found: {config_path}")
-        print("[INFO] Please create config.json based on config.json.example")
-        sys.exit(1)
-    except json.JSONDecodeError as e:
-        print(f"[ERROR] Invalid JSON in configuration file: {e}")
-        sys.exit(1)
+        logger.info("[INFO] Daemon stopped")
+        return 0
 
 
 def main():
@@ -773,6 +5235,11 @@ Examples:
   python auto_reset_credits_advanced.py --config my_config.json
   python auto_reset_credits_advanced.py --check-balance
   python auto_reset_credits_advanced.py --token YOUR_TOKEN_HERE
+  python auto_reset_credits_advanced.py --fleet accounts/ --workers 8
+  python auto_reset_credits_advanced.py --fleet accounts/ --async --workers 500
+  python auto_reset_credits_advanced.py --concurrent-preflight
+  python auto_reset_credits_advanced.py --fleet accounts/ --daemon --run-at 00:05
+  python auto_reset_credits_advanced.py --fleet accounts/ --snipe --snipe-lead 120
         """
     )
     
@@ -817,7 +5284,269 @@ Examples:
         help='Skip checking system announcements'
     )
     
+    parser.add_argument(
+        '--fleet', '-f',
+        metavar='PATH',
+        help='Run all accounts in a directory of configs or a manifest file'
+    )
+    
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=4,
+        help='Number of accounts processed in parallel in fleet mode (default: 4)'
+    )
+    
+    parser.add_argument(
+        '--async',
+        dest='use_async',
+        action='store_true',
+        help='Run the fleet on one asyncio event loop (requires aiohttp); --workers sets accounts in flight'
+    )
+    
+    parser.add_argument(
+        '--concurrent-preflight',
+        action='store_true',
+        help='Run the pre-flight checks (announcements, subscription, tickets, recaptcha) concurrently'
+    )
+    
+    parser.add_argument(
+        '--retry-budget',
+        type=int,
+        help='Total API retries allowed across a fleet run (default: one per account)'
+    )
+    
+    parser.add_argument(
+        '--requeue-for',
+        type=float,
+        default=300,
+        help='Seconds to keep re-queuing fleet accounts skipped during an API outage (default: 300)'
+    )
+    
+    parser.add_argument(
+        '--force-server-check',
+        action='store_true',
+        help='Ignore the local state store and always check today\'s reset on the server'
+    )
+    
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Keep running and reset the account (or fleet) once per UTC day'
+    )
+    
+    parser.add_argument(
+        '--run-at',
+        type=parse_run_at,
+        default='00:05',
+        metavar='HH:MM',
+        help='Daily run time in UTC for --daemon (default: 00:05)'
+    )
+    
+    parser.add_argument(
+        '--retry-interval',
+        type=float,
+        default=600,
+        help='Seconds until a failed run is retried in --daemon mode (default: 600)'
+    )
+    
+    parser.add_argument(
+        '--reload-interval',
+        type=float,
+        default=30,
+        help='Seconds between config change checks in --daemon mode (default: 30)'
+    )
+    
+    parser.add_argument(
+        '--shard',
+        type=parse_shard,
+        metavar='I/N',
+        help='Only run the accounts of shard I of N (0-based), e.g. 0/4'
+    )
+    
+    parser.add_argument(
+        '--lease-db',
+        metavar='SPEC',
+        help='Shared lease database (SQLite path or sqlite:///path) so several runners never reset the same account twice a day'
+    )
+    
+    parser.add_argument(
+        '--lease-ttl',
+        type=float,
+        default=600,
+        help='Seconds a runner\'s account lease lives without renewal (default: 600)'
+    )
+    
+    parser.add_argument(
+        '--snipe',
+        action='store_true',
+        help='Prepare ahead of 00:00 UTC and submit the ticket right after the boundary'
+    )
+    
+    parser.add_argument(
+        '--snipe-lead',
+        type=float,
+        default=60,
+        help='Seconds before the boundary to log in and run the checks in --snipe mode (default: 60); '
+             'logins are rate limited, so allow about one second per login beyond the first few'
+    )
+    
+    parser.add_argument(
+        '--snipe-margin',
+        type=float,
+        default=0.05,
+        help='Seconds after the server\'s midnight to submit in --snipe mode (default: 0.05)'
+    )
+    
+    parser.add_argument(
+        '--log-format',
+        choices=['human', 'json'],
+        default='human',
+        help='Console output: classic human-readable lines or one JSON object per line (default: human)'
+    )
+    
+    parser.add_argument(
+        '--log-level',
+        choices=list(LOG_LEVELS),
+        default='info',
+        help='Minimum level of console output (default: info)'
+    )
+    
+    parser.add_argument(
+        '--metrics-json',
+        metavar='PATH',
+        help='Write a JSON run report with phase timings and per-endpoint HTTP statistics'
+    )
+    
+    parser.add_argument(
+        '--metrics-prom',
+        metavar='PATH',
+        help='Write run metrics in Prometheus text format (for the node_exporter textfile collector)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        metavar='DIR',
+        help='Profile the run (CPU, memory, per-phase timeline) and write the reports to DIR'
+    )
+    
+    parser.add_argument(
+        '--record',
+        metavar='CASSETTE',
+        help='Record the HTTP traffic of this run to a cassette file (secrets redacted, *.gz compressed)'
+    )
+    
+    parser.add_argument(
+        '--replay',
+        metavar='CASSETTE',
+        help='Serve all HTTP requests from a recorded cassette, without network access'
+    )
+    
+    parser.add_argument(
+        '--replay-timing',
+        action='store_true',
+        help='With --replay, answer each request after its recorded response time'
+    )
+    
     args = parser.parse_args()
+    configure_logging(args.log_format, args.log_level)
+    
+    # Run metrics are written when the process exits (and after every daemon batch)
+    METRICS.configure(json_path=args.metrics_json, prometheus_path=args.metrics_prom)
+    if METRICS.enabled:
+        atexit.register(METRICS.write)
+    
+    # Profiling covers everything after argument parsing, up to the exit
+    if args.profile:
+        if args.daemon:
+            parser.error('--profile does not support --daemon')
+        profiler = RunProfiler(args.profile)
+        profiler.start()
+        atexit.register(profiler.stop)
+    
+    if args.record or args.replay:
+        if args.record and args.replay:
+            parser.error('--record and --replay cannot be combined')
+        if args.fleet or args.daemon or args.snipe:
+            parser.error('--record and --replay only support single-account runs')
+    
+    # Coordination with other runners (sharding, account-day leases)
+    coordinator = None
+    if args.shard or args.lease_db:
+        if not (args.fleet or args.daemon or args.snipe):
+            parser.error('--shard and --lease-db require --fleet, --daemon or --snipe')
+        backend = open_lease_backend(args.lease_db) if args.lease_db else None
+        if backend is None:
+            logger.warning("[WARNING] --shard without --lease-db: shards must not overlap between runners")
+        coordinator = LeaseCoordinator(backend, ttl=args.lease_ttl, shard=args.shard)
+    
+    # Daemon mode - one process schedules the account(s) every day
+    if args.daemon:
+        if args.use_async:
+            parser.error('--daemon does not support --async')
+        daemon = ResetDaemon(
+            args.fleet or args.config,
+            fleet=bool(args.fleet),
+            workers=args.workers,
+            run_at=args.run_at,
+            retry_interval=args.retry_interval,
+            reload_interval=args.reload_interval,
+            token_override=None if args.fleet else (os.getenv('GACCODE_AUTH_TOKEN') or args.token),
+            coordinator=coordinator,
+            check_balance=args.check_balance,
+            skip_subscription_check=args.skip_subscription_check,
+            check_announcements=not args.skip_announcements,
+            concurrent_preflight=args.concurrent_preflight,
+            force_server_check=args.force_server_check
+        )
+        signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+        sys.exit(daemon.serve())
+    
+    # Boundary mode - submit right after 00:00 UTC
+    if args.snipe:
+        if args.fleet:
+            accounts = load_fleet_configs(args.fleet)
+        else:
+            config = load_config(args.config)
+            config['auth_token'] = os.getenv('GACCODE_AUTH_TOKEN') or args.token or config.get('auth_token', '')
+            accounts = [(Path(args.config).stem, config, args.config, None)]
+        sys.exit(run_boundary(
+            accounts,
+            lead=args.snipe_lead,
+            margin=args.snipe_margin,
+            check_balance=args.check_balance,
+            skip_subscription_check=args.skip_subscription_check,
+            coordinator=coordinator
+        ))
+    
+    # Fleet mode - every account config gets its own bot
+    if args.fleet and args.use_async:
+        import asyncio
+        sys.exit(asyncio.run(run_fleet_async(
+            args.fleet,
+            concurrency=args.workers,
+            retry_budget=args.retry_budget,
+            requeue_for=args.requeue_for,
+            coordinator=coordinator,
+            check_balance=args.check_balance,
+            skip_subscription_check=args.skip_subscription_check,
+            check_announcements=not args.skip_announcements,
+            force_server_check=args.force_server_check
+        )))
+    
+    if args.fleet:
+        sys.exit(run_fleet(
+            args.fleet,
+            workers=args.workers,
+            retry_budget=args.retry_budget,
+            requeue_for=args.requeue_for,
+            coordinator=coordinator,
+            check_balance=args.check_balance,
+            skip_subscription_check=args.skip_subscription_check,
+            check_announcements=not args.skip_announcements,
+            concurrent_preflight=args.concurrent_preflight,
+            force_server_check=args.force_server_check
+        ))
     
     # Load configuration
     config = load_config(args.config)
@@ -831,17 +5560,36 @@ Examples:
     if env_token:
         config['auth_token'] = env_token
     
+    # Replays must not depend on or change local state: no state store, no
+    # token persistence, no emails
+    cassette = None
+    if args.replay:
+        config['state_store'] = dict(config.get('state_store', {}), enabled=False)
+        config['token_config'] = dict(config.get('token_config', {}), persist_to_config=False, cache_file='')
+        ALERT_DISPATCHER.offline = True
+        cassette = HTTPCassette(args.replay, 'replay', keep_timing=args.replay_timing)
+    elif args.record:
+        cassette = HTTPCassette(
+            args.record, 'record',
+            secrets=[config.get('email'), config.get('password'), config.get('auth_token')]
+        )
+        atexit.register(cassette.save)
+    if cassette:
+        atexit.register(lambda: logger.info(f"[INFO] Cassette: {cassette.summary()}"))
+    
     try:
         # Create bot instance with config file path for saving
         bot = CreditResetBot(config, config_file_path=args.config)
+        if cassette:
+            bot.use_cassette(cassette)
         
         # Test email mode
         if args.test_email:
-            print("=" * 60)
-            print("Email Notification Test Mode")
-            print("=" * 60)
-            print(f"Config: {args.config}")
-            print("-" * 60)
+            logger.info("=" * 60)
+            logger.info("Email Notification Test Mode")
+            logger.info("=" * 60)
+            logger.info(f"Config: {args.config}")
+            logger.info("-" * 60)
             
             # Get balance for test email
             balance_data = bot.get_credit_balance()
@@ -864,15 +5612,16 @@ Examples:
                 test_body,
                 "info"
             )
+            ALERT_DISPATCHER.flush()
             
-            print("-" * 60)
-            print("Test complete. Please check your inbox.")
-            print("=" * 60)
+            logger.info("-" * 60)
+            logger.info("Test complete. Please check your inbox.")
+            logger.info("=" * 60)
             sys.exit(0)
         
         # Dry run mode - only check status
         if args.dry_run:
-            print("[INFO] Running in dry-run mode...")
+            logger.info("[INFO] Running in dry-run mode...")
             bot.check_recaptcha_required()
             if args.check_balance:
                 bot.get_credit_balance()
@@ -882,7 +5631,9 @@ Examples:
         success = bot.run(
             check_balance=args.check_balance,
             skip_subscription_check=args.skip_subscription_check,
-            check_announcements=not args.skip_announcements
+            check_announcements=not args.skip_announcements,
+            concurrent_preflight=args.concurrent_preflight,
+            force_server_check=args.force_server_check
         )
         
         if success:
@@ -891,10 +5642,10 @@ Examples:
             sys.exit(1)
             
     except ValueError as e:
-        print(f"[ERROR] Configuration error: {e}")
+        logger.error(f"[ERROR] Configuration error: {e}")
         sys.exit(1)
     except Exception as e:
-        print(f"[ERROR] Unexpected error: {e}")
+        logger.error(f"[ERROR] Unexpected error: {e}")
         import traceback
         traceback.print_exc()
         sys.exit(1)
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Local benchmark and load test of the reset path, run against
+gaccode_api_stub.py so no real account or network is involved.
+
+Measures single-account run() latency and requests per run, fleet throughput
+(sync thread pool and, if aiohttp is installed, the asyncio fleet), peak
+memory, and behaviour under injected latency and errors. Results are written
+as JSON so runs on different branches can be compared:
+
+    python benchmark_reset.py --output base.json
+    python benchmark_reset.py --compare base.json --threshold 20
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+import multiprocessing
+import urllib.request
+from pathlib import Path
+from datetime import datetime, timezone
+from contextlib import redirect_stdout
+
+import auto_reset_credits_advanced as gac
+from gaccode_api_stub import StubServer
+
+
+# Stub settings of the injected-fault scenarios
+FAULT_PROFILE = {
+    'latency': 0.02,
+    'latency_jitter': 0.03,
+    'error_rate': 0.05,
+    'rate_limit_rate': 0.02,
+    'unauthorized_rate': 0.02,
+    'retry_after': 0.5,
+    'seed': 1,
+}
+
+FLEET_LINE = re.compile(r'^\[FLEET\] \S+: (\w+) \(', re.MULTILINE)
+
+# Metrics where a larger value is a regression; everything else compared is
+# a rate where a smaller value is one
+LOWER_IS_BETTER = ('latency', 'wall', 'requests', 'memory', '_ms')
+
+
+def _serve_stub(config, conn):
+    """Stub server process: report the base URL, then serve until killed"""
+    server = StubServer(config)
+    conn.send(server.base_url)
+    conn.close()
+    server.httpd.serve_forever()
+
+
+class StubProcess:
+    """
+    gaccode_api_stub.py in a separate process, so the stub does not compete
+    with the bot for the GIL
+    """
+
+    def __init__(self, config=None):
+        self.config = config or {}
+
+    def __enter__(self):
+        parent, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_serve_stub, args=(self.config, child), daemon=True)
+        self.process.start()
+        self.base_url = parent.recv()
+        self.root = self.base_url.rsplit('/api', 1)[0]
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.join()
+
+    def stats(self):
+        with urllib.request.urlopen(f"{self.root}/_stub/stats") as response:
+            return json.load(response)
+
+    def reset(self):
+        urllib.request.urlopen(urllib.request.Request(f"{self.root}/_stub/reset", method='POST')).close()
+
+
+def account_config(base_url, idx, rate_limit=False):
+    """Configuration of one benchmark account"""
+    return {
+        'email': f'bench{idx}@example.com',
+        'password': 'benchmark',
+        'base_url': base_url,
+        # The limiter would measure the configured request rate rather than
+        # the reset path; --rate-limit keeps it
+        'rate_limit': {'enabled': rate_limit},
+        'email_alerts': {'enabled': False},
+    }
+
+
+def write_fleet(directory, base_url, count, rate_limit=False):
+    """Write count account configs into directory"""
+    for idx in range(count):
+        path = Path(directory) / f'bench{idx:05d}.json'
+        path.write_text(json.dumps(account_config(base_url, idx, rate_limit)), encoding='utf-8')
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def max_rss_kb():
+    """Peak resident set size of this process so far (KiB), None if unknown"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def reset_process_state():
+    """
+    Drop the process-wide state the bots share: announcement feed, circuit
+    breakers, rate buckets, token managers and pooled connections
+    """
+    gac.ANNOUNCEMENT_FEED = gac.AnnouncementFeed()
+    gac.CIRCUIT_BREAKERS = gac.CircuitBreakers()
+    gac.RATE_LIMITER = gac.RateLimiter()
+    with gac.TokenManager._instances_lock:
+        gac.TokenManager._instances.clear()
+    gac.configure_http_pool()
+
+
+def bench_single(stub_config, iterations, rate_limit=False):
+    """
+    Cold single-account runs: fresh config directory (no token or state
+    cache), fresh process-wide state (reset_process_state) and fresh stub
+    state for every iteration
+    """
+    durations, requests, statuses = [], [], {}
+    with StubProcess(stub_config) as stub:
+        for _ in range(iterations):
+            stub.reset()
+            reset_process_state()
+            with tempfile.TemporaryDirectory() as directory:
+                path = Path(directory) / 'config.json'
+                path.write_text(json.dumps(account_config(stub.base_url, 0, rate_limit)), encoding='utf-8')
+                config = gac.load_config(str(path))
+                with redirect_stdout(io.StringIO()):
+                    started = time.perf_counter()
+                    bot = gac.CreditResetBot(config, config_file_path=str(path))
+                    bot.run()
+                    durations.append(time.perf_counter() - started)
+            status = bot.last_result[0] or 'error'
+            statuses[status] = statuses.get(status, 0) + 1
+            requests.append(stub.stats()['requests'])
+
+    return {
+        'mode': 'cold',
+        'iterations': iterations,
+        'latency_mean_s': round(statistics.mean(durations), 4),
+        'latency_p50_s': round(percentile(durations, 50), 4),
+        'latency_p95_s': round(percentile(durations, 95), 4),
+        'latency_max_s': round(max(durations), 4),
+        'requests_per_run': round(statistics.mean(requests), 2),
+        'statuses': statuses,
+    }
+
+
+def bench_fleet(stub_config, count, mode='sync', workers=32, rate_limit=False, trace_memory=False):
+    """
+    One fleet run of count accounts through run_fleet / run_fleet_async
+    """
+    with StubProcess(stub_config) as stub, tempfile.TemporaryDirectory() as directory:
+        write_fleet(directory, stub.base_url, count, rate_limit)
+        reset_process_state()
+        output = io.StringIO()
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        with redirect_stdout(output):
+            if mode == 'async':
+                # The asyncio fleet is measured with concurrent pre-flight reads
+                exit_code = asyncio.run(gac.run_fleet_async(directory, concurrency=workers, requeue_for=0,
+                                                            concurrent_preflight=True))
+            else:
+                exit_code = gac.run_fleet(directory, workers=workers, requeue_for=0)
+        wall = time.perf_counter() - started
+        peak = None
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        stats = stub.stats()
+
+    statuses = {}
+    for status in FLEET_LINE.findall(output.getvalue()):
+        statuses[status] = statuses.get(status, 0) + 1
+    result = {
+        'accounts': count,
+        'mode': mode,
+        'workers': workers,
+        'wall_s': round(wall, 3),
+        'accounts_per_s': round(count / wall, 2),
+        'requests': stats['requests'],
+        'requests_per_account': round(stats['requests'] / count, 2),
+        'tickets_created': stats['tickets_created'],
+        'statuses': statuses,
+        'exit_code': exit_code,
+    }
+    if peak is not None:
+        result['peak_memory_mb'] = round(peak / 1024 / 1024, 2)
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def flatten(results, prefix=''):
+    """Numeric leaves of a result document as {'a.b.c': value}"""
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline, current, threshold):
+    """
+    Print metrics that moved by more than threshold percent
+
+    Returns:
+        int: 1 if any metric regressed, 0 otherwise
+    """
+    old, new = flatten(baseline['scenarios']), flatten(current['scenarios'])
+    regressed = False
+    for name in sorted(old.keys() & new.keys()):
+        metric = name.rsplit('.', 1)[-1]
+        if not any(word in metric for word in LOWER_IS_BETTER + ('per_s',)) or not old[name]:
+            continue
+        change = (new[name] - old[name]) / old[name] * 100
+        worse = change > threshold if any(word in metric for word in LOWER_IS_BETTER) else change < -threshold
+        if abs(change) > threshold:
+            label = 'REGRESSION' if worse else 'improved'
+            regressed |= worse
+            print(f"[{label}] {name}: {old[name]} -> {new[name]} ({change:+.1f}%)", file=sys.stderr)
+    return 1 if regressed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the credit reset path against the local API stub',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python benchmark_reset.py --quick
+  python benchmark_reset.py --sizes 10,100,1000 --output results.json
+  python benchmark_reset.py --compare results.json --threshold 20
+        """
+    )
+    parser.add_argument('--iterations', type=int, default=10, help='Single-account runs (default: 10)')
+    parser.add_argument('--sizes', default='10,100,1000', help='Fleet sizes (default: 10,100,1000)')
+    parser.add_argument('--workers', type=int, default=32, help='Sync fleet workers (default: 32)')
+    parser.add_argument('--concurrency', type=int, default=1000, help='Async fleet concurrency (default: 1000)')
+    parser.add_argument('--rate-limit', action='store_true', help='Keep the client-side rate limiter enabled')
+    parser.add_argument('--quick', action='store_true', help='3 iterations, fleets of 10 and 100')
+    parser.add_argument('--output', '-o', help='Write the JSON results to this file (default: stdout)')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare with an earlier results file; exit 1 on regression')
+    parser.add_argument('--threshold', type=float, default=20, help='Regression threshold in percent (default: 20)')
+    args = parser.parse_args()
+
+    iterations = 3 if args.quick else args.iterations
+    sizes = [10, 100] if args.quick else [int(size) for size in args.sizes.split(',') if size.strip()]
+    try:
+        gac._import_aiohttp()
+        modes = ['sync', 'async']
+    except Exception:
+        modes = ['sync']
+
+    scenarios = {}
+
+    def step(name, func, *func_args, **func_kwargs):
+        print(f"[BENCH] {name}...", file=sys.stderr)
+        scenarios[name] = func(*func_args, **func_kwargs)
+
+    step('single', bench_single, {}, iterations, args.rate_limit)
+    step('single_faults', bench_single, FAULT_PROFILE, iterations, args.rate_limit)
+    for mode in modes:
+        workers = args.concurrency if mode == 'async' else args.workers
+        for size in sizes:
+            step(f'fleet_{mode}_{size}', bench_fleet, {}, size, mode, workers, args.rate_limit)
+        faults_size = min(100, max(sizes))
+        step(f'fleet_{mode}_{faults_size}_faults', bench_fleet, FAULT_PROFILE, faults_size, mode, workers,
+             args.rate_limit)
+        # tracemalloc slows allocation down, so memory is measured in its own run
+        step(f'memory_{mode}_{faults_size}', bench_fleet, {}, faults_size, mode, workers, args.rate_limit,
+             trace_memory=True)
+
+    results = {
+        'benchmark': 'gaccode-reset',
+        'version': 1,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'fault_profile': FAULT_PROFILE,
+        'max_rss_kb': max_rss_kb(),
+        'scenarios': scenarios,
+    }
+
+    document = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(document + '\n', encoding='utf-8')
+        print(f"[BENCH] Results written to {args.output}", file=sys.stderr)
+    else:
+        print(document)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            return compare(json.load(f), results, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
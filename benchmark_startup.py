@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark of auto_reset_credits_advanced.py: how long each CLI mode
+takes from spawning the interpreter to its first API request, and which
+imports that time goes into.
+
+Every mode runs as a fresh process against gaccode_api_stub.py with a cold
+config directory (no token or state cache). The first-request latency comes
+from the stub's arrival time of the first request; a separate run with
+python -X importtime gives the import breakdown. Results are written as JSON
+and can be compared like benchmark_reset.py results:
+
+    python benchmark_startup.py --output startup.json
+    python benchmark_startup.py --compare startup.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+from datetime import datetime, timezone
+
+from benchmark_reset import StubProcess, account_config, write_fleet, percentile, compare, git_revision
+
+
+SCRIPT = Path(__file__).resolve().parent / 'auto_reset_credits_advanced.py'
+
+# "import time: self [us] | cumulative | imported package"
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$', re.MULTILINE)
+
+FLEET_SIZE = 10
+
+# Cold-start-to-first-request budget (median, ms) of every mode that talks to the API
+DEFAULT_TARGET_MS = 300
+
+
+def aiohttp_available():
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def cli_modes():
+    """
+    CLI modes to time: name -> (arguments, whether the mode talks to the API)
+
+    '{config}', '{fleet}' and '{cassette}' are filled in per run.
+    """
+    modes = {
+        'help': (['--help'], False),
+        'dry_run': (['--config', '{config}', '--dry-run'], True),
+        'run': (['--config', '{config}'], True),
+        'check_balance': (['--config', '{config}', '--check-balance'], True),
+        'replay': (['--config', '{config}', '--replay', '{cassette}'], False),
+        'fleet': (['--fleet', '{fleet}', '--workers', '4'], True),
+    }
+    if aiohttp_available():
+        modes['fleet_async'] = (['--fleet', '{fleet}', '--async', '--workers', '100'], True)
+    return modes
+
+
+def launcher(kind):
+    """Interpreter command line up to the CLI arguments"""
+    if kind == 'module':
+        # python -m loads the script from its cached bytecode; run as a file,
+        # the script is compiled on every start
+        return [sys.executable, '-m', SCRIPT.stem]
+    return [sys.executable, str(SCRIPT)]
+
+
+def prepare(directory, base_url):
+    """Write a cold single-account config and a fleet directory into directory"""
+    directory = Path(directory)
+    config = directory / 'config.json'
+    config.write_text(json.dumps(account_config(base_url, 0)), encoding='utf-8')
+    fleet = directory / 'fleet'
+    fleet.mkdir()
+    write_fleet(fleet, base_url, FLEET_SIZE)
+    return {'config': str(config), 'fleet': str(fleet)}
+
+
+def spawn(command, importtime=False):
+    """
+    Run one CLI process
+
+    Returns:
+        tuple: (started time.time(), wall seconds, return code, stderr)
+    """
+    if importtime:
+        command = command[:1] + ['-X', 'importtime'] + command[1:]
+    started_at = time.time()
+    started = time.perf_counter()
+    process = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                             cwd=SCRIPT.parent, timeout=300)
+    return started_at, time.perf_counter() - started, process.returncode, process.stderr
+
+
+def import_breakdown(stderr, top=8):
+    """
+    Top-level imports of a -X importtime report
+
+    Returns:
+        dict: Total import time and the heaviest top-level modules (ms)
+    """
+    modules = [(name, int(cumulative) / 1000) for _, cumulative, indent, name in IMPORT_LINE.findall(stderr)
+               if not indent]
+    heaviest = sorted(modules, key=lambda item: item[1], reverse=True)[:top]
+    return {
+        'import_ms': round(sum(ms for _, ms in modules), 1),
+        'heaviest_imports_ms': {name: round(ms, 1) for name, ms in heaviest},
+    }
+
+
+def start(stub, command_line, arguments, name, record_dir, importtime=False):
+    """One cold start of a CLI mode in a fresh config directory"""
+    stub.reset()
+    with tempfile.TemporaryDirectory() as directory:
+        paths = prepare(directory, stub.base_url)
+        paths['cassette'] = os.path.join(record_dir, 'run.json')
+        if name == 'replay':
+            shutil.copy(os.path.join(record_dir, 'config.json'), paths['config'])
+        return spawn(command_line + [argument.format(**paths) for argument in arguments], importtime)
+
+
+def bench_mode(stub, modes, name, command_line, repeats, record_dir):
+    """Cold starts of one CLI mode"""
+    arguments, talks_to_api = modes[name]
+    first_requests, walls, codes = [], [], set()
+    for _ in range(repeats):
+        started_at, wall, code, _ = start(stub, command_line, arguments, name, record_dir)
+        walls.append(wall * 1000)
+        codes.add(code)
+        first = stub.stats()['first_request_at']
+        if talks_to_api and first is not None:
+            first_requests.append((first - started_at) * 1000)
+
+    # One more run for the import breakdown; -X importtime slows imports
+    # down, so it is not part of the latency figures
+    stderr = start(stub, command_line, arguments, name, record_dir, importtime=True)[3]
+
+    result = {
+        'repeats': repeats,
+        'wall_ms_p50': round(percentile(walls, 50), 1),
+        'wall_ms_max': round(max(walls), 1),
+        'exit_codes': sorted(codes),
+    }
+    if first_requests:
+        result['first_request_ms_p50'] = round(percentile(first_requests, 50), 1)
+        result['first_request_ms_mean'] = round(statistics.mean(first_requests), 1)
+        result['first_request_ms_max'] = round(max(first_requests), 1)
+    result.update(import_breakdown(stderr))
+    return result
+
+
+def record_cassette(stub, command_line, directory):
+    """Record one run for the replay mode"""
+    stub.reset()
+    paths = prepare(directory, stub.base_url)
+    subprocess.run(command_line + ['--config', paths['config'], '--record', os.path.join(directory, 'run.json')],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=SCRIPT.parent, timeout=300, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark CLI startup: spawn-to-first-request latency and import time per mode',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python benchmark_startup.py
+  python benchmark_startup.py --modes run,dry_run --repeats 10 --target-ms 400
+  python benchmark_startup.py --launcher module --output startup.json
+  python benchmark_startup.py --compare startup.json --threshold 20
+        """
+    )
+    parser.add_argument('--repeats', type=int, default=5, help='Cold starts per mode (default: 5)')
+    parser.add_argument('--modes', help='Comma-separated modes (default: all): ' + ', '.join(cli_modes()))
+    parser.add_argument('--launcher', choices=['script', 'module'], default='script',
+                        help='Start as "python auto_reset_credits_advanced.py" (default) or with python -m')
+    parser.add_argument('--target-ms', type=float, default=DEFAULT_TARGET_MS,
+                        help='Exit 1 if a mode\'s median spawn-to-first-request latency exceeds this '
+                             f'(default: {DEFAULT_TARGET_MS:g}, 0 disables)')
+    parser.add_argument('--output', '-o', help='Write the JSON results to this file (default: stdout)')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare with an earlier results file; exit 1 on regression')
+    parser.add_argument('--threshold', type=float, default=20, help='Regression threshold in percent (default: 20)')
+    args = parser.parse_args()
+
+    modes = cli_modes()
+    names = [name.strip() for name in args.modes.split(',')] if args.modes else list(modes)
+    unknown = [name for name in names if name not in modes]
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(unknown)}")
+    command_line = launcher(args.launcher)
+
+    scenarios = {}
+    with StubProcess() as stub, tempfile.TemporaryDirectory() as record_dir:
+        if 'replay' in names:
+            record_cassette(stub, command_line, record_dir)
+        for name in names:
+            print(f"[BENCH] {name}...", file=sys.stderr)
+            scenarios[name] = bench_mode(stub, modes, name, command_line, args.repeats, record_dir)
+
+    results = {
+        'benchmark': 'gaccode-startup',
+        'version': 1,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'launcher': args.launcher,
+        'target_ms': args.target_ms,
+        'scenarios': scenarios,
+    }
+
+    document = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(document + '\n', encoding='utf-8')
+        print(f"[BENCH] Results written to {args.output}", file=sys.stderr)
+    else:
+        print(document)
+
+    exit_code = 0
+    if args.target_ms:
+        for name, result in scenarios.items():
+            latency = result.get('first_request_ms_p50')
+            if latency is not None and latency > args.target_ms:
+                print(f"[TARGET] {name}: first request after {latency} ms (target {args.target_ms} ms)",
+                      file=sys.stderr)
+                exit_code = 1
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            exit_code |= compare(json.load(f), results, args.threshold)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
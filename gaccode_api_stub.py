@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the gaccode.com API, for offline testing and benchmarks
+of auto_reset_credits_advanced.py.
+
+Implements the endpoints the bot uses with the response shapes it parses,
+and can inject latency, server errors, 401s, 429s, slow ticket closing and
+daily ticket limits. Point an account's base_url at it:
+
+    python gaccode_api_stub.py --port 8080 --latency 0.05 --error-rate 0.02
+    "base_url": "http://127.0.0.1:8080/api"
+"""
+
+import json
+import time
+import random
+import base64
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+# Behaviour of the stub; every key can be overridden per endpoint under
+# 'endpoints' (keyed like the bot's retry policies, e.g. "POST /tickets")
+DEFAULT_STUB_CONFIG = {
+    'latency': 0.0,              # seconds added to every response
+    'latency_jitter': 0.0,       # plus uniform random 0..jitter seconds
+    'error_rate': 0.0,           # fraction of requests answered with 500/502/503
+    'unauthorized_rate': 0.0,    # fraction of authenticated requests answered with 401
+    'rate_limit_rate': 0.0,      # fraction of requests answered with 429
+    'retry_after': 1,            # Retry-After of injected 429s (seconds)
+    'close_delay': 0.0,          # seconds until a new ticket is CLOSED
+    'daily_limit': 3,            # tickets per account and UTC day
+    'requires_recaptcha': False,
+    'token_ttl': 3600,           # lifetime of issued tokens (JWT exp)
+    'balance': 10000,            # balance after a reset
+    'accounts': {},              # email -> password; empty accepts any login
+    'seed': None,                # seed of the fault injection, for repeatable runs
+    'announcements': [
+        {'id': 1, 'title': '系统维护通知', 'content': '本地测试公告', 'type': 'info',
+         'createdAt': '2025-01-01T00:00:00Z'},
+    ],
+    'endpoints': {},
+}
+
+API_PREFIX = '/api'
+
+
+def utc_now_iso():
+    """Current UTC time in the API's ISO 8601 format"""
+    return datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def make_token(email, ttl):
+    """Issue a JWT-shaped (unsigned) token carrying the email and an exp claim"""
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b'=').decode()
+    header = encode({'alg': 'none', 'typ': 'JWT'})
+    payload = encode({'email': email, 'exp': time.time() + ttl, 'nonce': random.random()})
+    return f"{header}.{payload}.stub"
+
+
+def read_token(token):
+    """
+    Decode a token issued by make_token
+
+    Returns:
+        dict: Claims, or None if the token is malformed
+    """
+    parts = (token or '').split('.')
+    if len(parts) != 3:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(parts[1] + '=' * (-len(parts[1]) % 4)))
+    except ValueError:
+        return None
+
+
+class StubState:
+    """Accounts, tickets and request statistics of a stub server"""
+
+    def __init__(self, config=None):
+        self.config = dict(DEFAULT_STUB_CONFIG)
+        self.config.update(config or {})
+        self.lock = threading.Lock()
+        self.random = random.Random(self.config['seed'])
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.tickets = {}    # email -> list of tickets (oldest first)
+            self.next_id = 1
+            self.stats = {}      # endpoint -> {status: count}
+            self.first_request_at = None
+
+    def arrived(self):
+        """Note the arrival of an API request (startup benchmarks time the first one)"""
+        if self.first_request_at is None:
+            with self.lock:
+                if self.first_request_at is None:
+                    self.first_request_at = time.time()
+
+    def setting(self, endpoint, key):
+        """Effective setting of an endpoint"""
+        return self.config.get('endpoints', {}).get(endpoint, {}).get(key, self.config[key])
+
+    def count(self, endpoint, status):
+        with self.lock:
+            per_status = self.stats.setdefault(endpoint, {})
+            per_status[str(status)] = per_status.get(str(status), 0) + 1
+
+    def snapshot(self):
+        """Request statistics: totals, per-endpoint status counts, tickets per account and the first request's arrival time"""
+        with self.lock:
+            stats = {endpoint: dict(counts) for endpoint, counts in self.stats.items()}
+            tickets = {email: len(t) for email, t in self.tickets.items()}
+        return {
+            'requests': sum(sum(counts.values()) for counts in stats.values()),
+            'tickets_created': sum(tickets.values()),
+            'tickets_per_account': tickets,
+            'first_request_at': self.first_request_at,
+            'endpoints': stats,
+        }
+
+    def ticket_view(self, ticket):
+        """Ticket as returned by the API, closing it once close_delay has passed"""
+        closed = time.time() - ticket['_created'] >= self.setting('GET /tickets/{id}', 'close_delay')
+        view = {k: v for k, v in ticket.items() if not k.startswith('_')}
+        if closed:
+            view['status'] = 'CLOSED'
+            view['updatedAt'] = ticket['_closed_at'] or utc_now_iso()
+            ticket['_closed_at'] = view['updatedAt']
+            view['messages'] = view['messages'] + [{'message': '积分已重置，工单已关闭'}]
+        return view
+
+    def tickets_today(self, email):
+        today = datetime.now(timezone.utc).date().isoformat()
+        return [t for t in self.tickets.get(email, []) if t['createdAt'].startswith(today)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Request handler; the server's state lives in self.server.state"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'gaccode-stub/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # ------------------------------------------------------------------
+    # Helpers
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def endpoint(self, method):
+        """Endpoint key like the bot's, e.g. 'GET /tickets/{id}'"""
+        path = self.path.split('?', 1)[0][len(API_PREFIX):].strip('/')
+        segments = path.split('/')
+        if len(segments) == 2 and segments[0] == 'tickets' and segments[1] != 'recaptcha-required':
+            segments[1] = '{id}'
+        return f"{method} /{'/'.join(segments)}"
+
+    def send_json(self, endpoint, status, data, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.state.count(endpoint, status)
+
+    def read_json(self):
+        try:
+            return json.loads(self.body) if self.body else {}
+        except ValueError:
+            return {}
+
+    def authenticated_email(self):
+        """Email of a valid bearer token, or None"""
+        auth = self.headers.get('authorization', '')
+        claims = read_token(auth[7:] if auth.lower().startswith('bearer ') else '')
+        if not claims or claims.get('exp', 0) < time.time():
+            return None
+        return claims.get('email')
+
+    def inject_faults(self, endpoint, authenticated):
+        """
+        Apply latency and maybe answer with an injected error
+
+        Returns:
+            bool: True if an error response was sent
+        """
+        latency = self.state.setting(endpoint, 'latency') + self.state.random.uniform(0, self.state.setting(endpoint, 'latency_jitter'))
+        if latency > 0:
+            time.sleep(latency)
+
+        if self.state.random.random() < self.state.setting(endpoint, 'rate_limit_rate'):
+            self.send_json(endpoint, 429, {'error': 'Too many requests'},
+                           {'Retry-After': str(self.state.setting(endpoint, 'retry_after'))})
+            return True
+        if authenticated and self.state.random.random() < self.state.setting(endpoint, 'unauthorized_rate'):
+            self.send_json(endpoint, 401, {'error': 'Unauthorized'})
+            return True
+        if self.state.random.random() < self.state.setting(endpoint, 'error_rate'):
+            status = self.state.random.choice([500, 502, 503])
+            self.send_json(endpoint, status, {'error': 'Injected server error'})
+            return True
+        return False
+
+    # ------------------------------------------------------------------
+    # Routing
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def dispatch(self, method):
+        # Consume the body before any (error) response so the kept-alive
+        # connection stays in sync
+        length = int(self.headers.get('Content-Length') or 0)
+        self.body = self.rfile.read(length) if length else b''
+        path = self.path.split('?', 1)[0]
+
+        # Control endpoints for tests and benchmarks (no faults, not counted)
+        if path == '/_stub/stats':
+            return self.send_control(self.state.snapshot())
+        if path == '/_stub/reset' and method == 'POST':
+            self.state.reset()
+            return self.send_control({'reset': True})
+
+        self.state.arrived()
+        endpoint = self.endpoint(method)
+        if not path.startswith(API_PREFIX + '/'):
+            return self.send_json(endpoint, 404, {'error': 'Not found'})
+
+        routes = {
+            'POST /login': (self.login, False),
+            'GET /subscriptions/active': (self.subscriptions, True),
+            'GET /tickets': (self.list_tickets, True),
+            'POST /tickets': (self.create_ticket, True),
+            'GET /tickets/recaptcha-required': (self.recaptcha_required, True),
+            'GET /tickets/{id}': (self.get_ticket, True),
+            'GET /credits/balance': (self.balance, True),
+            'GET /announcements': (self.announcements, False),
+        }
+        if endpoint not in routes:
+            return self.send_json(endpoint, 404, {'error': 'Not found'})
+        handler, needs_auth = routes[endpoint]
+
+        if self.inject_faults(endpoint, needs_auth):
+            return
+        email = None
+        if needs_auth:
+            email = self.authenticated_email()
+            if email is None:
+                return self.send_json(endpoint, 401, {'error': 'Unauthorized'})
+        handler(endpoint, email)
+
+    def send_control(self, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # ------------------------------------------------------------------
+    # API endpoints
+
+    def login(self, endpoint, _):
+        data = self.read_json()
+        email, password = data.get('email'), data.get('password')
+        accounts = self.state.config['accounts']
+        if not email or not password or (accounts and accounts.get(email) != password):
+            return self.send_json(endpoint, 401, {'error': 'Invalid email or password'})
+        self.send_json(endpoint, 200, {'token': make_token(email, self.state.config['token_ttl'])})
+
+    def subscriptions(self, endpoint, _):
+        now = datetime.now(timezone.utc)
+        self.send_json(endpoint, 200, {'subscriptions': [{
+            'startDate': (now - timedelta(days=1)).isoformat().replace('+00:00', 'Z'),
+            'endDate': (now + timedelta(days=30)).isoformat().replace('+00:00', 'Z'),
+            'subscription': {'tier': 'pro', 'description': 'Local stub subscription', 'supportsRefill': True},
+        }]})
+
+    def list_tickets(self, endpoint, email):
+        with self.state.lock:
+            tickets = [self.state.ticket_view(t) for t in reversed(self.state.tickets.get(email, []))]
+        self.send_json(endpoint, 200, {'tickets': tickets[:20]})
+
+    def create_ticket(self, endpoint, email):
+        data = self.read_json()
+        limit = self.state.setting(endpoint, 'daily_limit')
+        with self.state.lock:
+            if len(self.state.tickets_today(email)) >= limit:
+                status, body = 400, {'error': f'Daily ticket limit reached ({limit})'}
+            else:
+                ticket = {
+                    'id': self.state.next_id,
+                    'title': data.get('title', ''),
+                    'categoryId': data.get('categoryId'),
+                    'status': 'OPEN',
+                    'createdAt': utc_now_iso(),
+                    'updatedAt': None,
+                    'messages': [{'message': data.get('description', '')}],
+                    '_created': time.time(),
+                    '_closed_at': None,
+                }
+                self.state.next_id += 1
+                self.state.tickets.setdefault(email, []).append(ticket)
+                status, body = 200, {'ticket': self.state.ticket_view(ticket)}
+        self.send_json(endpoint, status, body)
+
+    def get_ticket(self, endpoint, email):
+        ticket_id = self.path.split('?', 1)[0].rstrip('/').rsplit('/', 1)[-1]
+        with self.state.lock:
+            ticket = next((t for t in self.state.tickets.get(email, []) if str(t['id']) == ticket_id), None)
+            view = self.state.ticket_view(ticket) if ticket else None
+        if view is None:
+            return self.send_json(endpoint, 404, {'error': 'Ticket not found'})
+        self.send_json(endpoint, 200, {'ticket': view})
+
+    def recaptcha_required(self, endpoint, email):
+        with self.state.lock:
+            count = len(self.state.tickets_today(email))
+        self.send_json(endpoint, 200, {
+            'requiresRecaptcha': self.state.setting(endpoint, 'requires_recaptcha'),
+            'ticketCountToday': count,
+            'dailyLimit': self.state.setting('POST /tickets', 'daily_limit'),
+        })
+
+    def balance(self, endpoint, _):
+        self.send_json(endpoint, 200, {'balance': self.state.config['balance']})
+
+    def announcements(self, endpoint, _):
+        announcements = self.state.config['announcements']
+        # Content hash, so the ETag survives stub restarts (hash() is salted per process)
+        digest = hashlib.sha1(json.dumps(announcements, sort_keys=True).encode('utf-8')).hexdigest()
+        etag = f'"{digest[:16]}"'
+        if self.headers.get('if-none-match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            self.state.count(endpoint, 304)
+            return
+        self.send_json(endpoint, 200, {'announcements': announcements}, {'ETag': etag})
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog sized for fleet load tests"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class StubServer:
+    """
+    Threaded stub server, usable from code:
+
+        with StubServer({'latency': 0.05}) as stub:
+            config['base_url'] = stub.base_url
+    """
+
+    def __init__(self, config=None, host='127.0.0.1', port=0, verbose=False):
+        self.state = StubState(config)
+        self.httpd = StubHTTPServer((host, port), StubHandler)
+        self.httpd.state = self.state
+        self.httpd.verbose = verbose
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='gaccode-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    """Run the stub server in the foreground"""
+
+    parser = argparse.ArgumentParser(
+        description='Local stand-in for the gaccode.com API with fault injection',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python gaccode_api_stub.py --port 8080
+  python gaccode_api_stub.py --latency 0.1 --latency-jitter 0.05 --error-rate 0.05
+  python gaccode_api_stub.py --rate-limit-rate 0.1 --close-delay 3 --daily-limit 1
+  python gaccode_api_stub.py --config stub.json   (DEFAULT_STUB_CONFIG keys, incl. per-endpoint overrides)
+        """
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='Listen address (default: 127.0.0.1)')
+    parser.add_argument('--port', '-p', type=int, default=8080, help='Listen port (default: 8080)')
+    parser.add_argument('--config', '-c', help='JSON file with stub settings')
+    parser.add_argument('--latency', type=float, help='Seconds added to every response')
+    parser.add_argument('--latency-jitter', type=float, help='Random extra latency up to this many seconds')
+    parser.add_argument('--error-rate', type=float, help='Fraction of requests answered with 5xx')
+    parser.add_argument('--unauthorized-rate', type=float, help='Fraction of authenticated requests answered with 401')
+    parser.add_argument('--rate-limit-rate', type=float, help='Fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=float, help='Retry-After of injected 429s in seconds')
+    parser.add_argument('--close-delay', type=float, help='Seconds until a new ticket is CLOSED')
+    parser.add_argument('--daily-limit', type=int, help='Tickets per account and day')
+    parser.add_argument('--requires-recaptcha', action='store_true', default=None, help='Report that recaptcha is required')
+    parser.add_argument('--seed', type=int, help='Seed of the fault injection')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    config = {}
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+    for key in DEFAULT_STUB_CONFIG:
+        value = getattr(args, key, None)
+        if value is not None:
+            config[key] = value
+
+    server = StubServer(config, host=args.host, port=args.port, verbose=args.verbose)
+    print(f"[INFO] gaccode API stub listening, base_url: {server.base_url}")
+    print("[INFO] Statistics: GET /_stub/stats, reset state: POST /_stub/reset")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
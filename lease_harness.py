@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Multi-process check of the --lease-db coordination of
+auto_reset_credits_advanced.py, run against gaccode_api_stub.py.
+
+Two scenarios, each on a fresh lease database and stub:
+
+- exclusive: N fleet processes start together on one --lease-db. Every
+  process has its own copy of the fleet directory (like runners on separate
+  hosts), so only the leases keep them apart. Each account must get exactly
+  one ticket, and every other runner must have been stopped by the lease.
+- takeover: the lease database already holds expired leases of a crashed
+  runner and one live lease of another runner. A new runner must take the
+  expired leases over and reset those accounts, and leave the live one alone.
+
+    python lease_harness.py --processes 4 --accounts 20
+    python lease_harness.py --async --workers 50
+"""
+
+import re
+import sys
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+import auto_reset_credits_advanced as gac
+from benchmark_reset import StubProcess, write_fleet
+
+
+SCRIPT = Path(__file__).resolve().parent / 'auto_reset_credits_advanced.py'
+
+# "[FLEET] <account>: <status> (<reason>) in <seconds>s"
+FLEET_LINE = re.compile(r'^\[FLEET\] (\S+): (\w+) \((.*)\) in ', re.MULTILINE)
+TAKEOVER_LINE = re.compile(r'Taking over expired lease (\S+) from (\S+)')
+
+# Keep the runs of all processes in flight at the same time
+STUB_CONFIG = {'latency': 0.01, 'close_delay': 0.05}
+
+
+def email(idx):
+    """Email of benchmark account idx (benchmark_reset.account_config())"""
+    return f'bench{idx}@example.com'
+
+
+def runner(fleet, lease_db, workers, use_async):
+    """Command line of one fleet runner on the shared lease database"""
+    command = [sys.executable, str(SCRIPT), '--fleet', str(fleet), '--workers', str(workers),
+               '--lease-db', f'sqlite:///{lease_db}', '--skip-announcements']
+    if use_async:
+        command.append('--async')
+    return command
+
+
+def start_runners(directory, base_url, processes, accounts, workers, use_async):
+    """Start processes runners, each on its own copy of one fleet"""
+    directory = Path(directory)
+    template = directory / 'fleet'
+    template.mkdir()
+    write_fleet(template, base_url, accounts)
+    lease_db = directory / 'leases.db'
+    started = []
+    for idx in range(processes):
+        fleet = directory / f'runner{idx}'
+        shutil.copytree(template, fleet)
+        started.append(subprocess.Popen(runner(fleet, lease_db, workers, use_async), cwd=SCRIPT.parent,
+                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True))
+    return lease_db, started
+
+
+def collect(processes):
+    """Wait for the runners; returns [(exit code, output)]"""
+    return [(process.wait(timeout=600), process.stdout.read()) for process in processes]
+
+
+def results(output):
+    """Fleet results of one runner's output: account -> (status, reason)"""
+    return {account: (status, reason) for account, status, reason in FLEET_LINE.findall(output)}
+
+
+def blocked_by_lease(status, reason):
+    """Whether a fleet result is LeaseCoordinator.blocked_result()"""
+    return (status == 'already_reset' and reason.startswith('reset today by runner')) or \
+        (status == 'leased' and reason.startswith('claimed by runner'))
+
+
+def check_exclusive(args):
+    """Scenario 1: concurrent runners reset every account exactly once"""
+    failures = []
+    with StubProcess(STUB_CONFIG) as stub, tempfile.TemporaryDirectory() as directory:
+        _, processes = start_runners(directory, stub.base_url, args.processes, args.accounts, args.workers,
+                                     args.use_async)
+        runs = collect(processes)
+        tickets = stub.stats()['tickets_per_account']
+
+    successes = {}
+    for idx, (code, output) in enumerate(runs):
+        if code != 0:
+            failures.append(f"runner {idx} exited with {code}")
+        for account, (status, reason) in results(output).items():
+            if status == 'success':
+                successes[account] = successes.get(account, 0) + 1
+            elif not blocked_by_lease(status, reason):
+                failures.append(f"runner {idx}: {account} {status} ({reason}) without the lease stopping it")
+
+    for idx in range(args.accounts):
+        count = tickets.get(email(idx), 0)
+        if count != 1:
+            failures.append(f"{email(idx)}: {count} ticket(s) created, expected 1")
+    processed = sum(successes.values())
+    if processed != args.accounts:
+        failures.append(f"{processed} successful run(s) across runners, expected {args.accounts}")
+    return failures
+
+
+def check_takeover(args):
+    """Scenario 2: a runner takes over expired leases but not live ones"""
+    failures = []
+    day = gac.datetime.now(gac.timezone.utc).date().isoformat()
+    live = email(args.accounts - 1)
+    with StubProcess(STUB_CONFIG) as stub, tempfile.TemporaryDirectory() as directory:
+        lease_db = Path(directory) / 'leases.db'
+        backend = gac.SQLiteLeaseBackend(str(lease_db))
+        for idx in range(args.accounts - 1):
+            # A runner that crashed: its leases expired a minute ago
+            backend.acquire(f'{email(idx)}:{day}', 'crashed-runner', -60)
+        backend.acquire(f'{live}:{day}', 'live-runner', 600)
+
+        fleet = Path(directory) / 'fleet'
+        fleet.mkdir()
+        write_fleet(fleet, stub.base_url, args.accounts)
+        process = subprocess.run(runner(fleet, lease_db, args.workers, args.use_async), cwd=SCRIPT.parent,
+                                 stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, timeout=600)
+        tickets = stub.stats()['tickets_per_account']
+
+    output = process.stdout
+    taken_over = {key.rsplit(':', 1)[0] for key, owner in TAKEOVER_LINE.findall(output) if owner == 'crashed-runner'}
+    outcome = results(output)
+    for idx in range(args.accounts - 1):
+        account = email(idx)
+        if account not in taken_over:
+            failures.append(f"{account}: expired lease not taken over")
+        if tickets.get(account, 0) != 1:
+            failures.append(f"{account}: {tickets.get(account, 0)} ticket(s) created after the takeover, expected 1")
+    if tickets.get(live, 0):
+        failures.append(f"{live}: reset although another runner holds a live lease")
+    name = f"bench{args.accounts - 1:05d}"  # write_fleet() file name
+    if outcome.get(name, (None,))[0] != 'leased':
+        failures.append(f"{live}: fleet result {outcome.get(name)}, expected leased")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Check that runners sharing a --lease-db process every account exactly once',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python lease_harness.py
+  python lease_harness.py --processes 8 --accounts 50 --workers 10
+  python lease_harness.py --async --workers 50
+        """
+    )
+    parser.add_argument('--processes', '-n', type=int, default=4, help='Concurrent runners (default: 4)')
+    parser.add_argument('--accounts', type=int, default=20, help='Accounts in the fleet (default: 20)')
+    parser.add_argument('--workers', '-w', type=int, default=5, help='--workers of each runner (default: 5)')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='Run the runners with --async')
+    args = parser.parse_args()
+    if args.processes < 2 or args.accounts < 2:
+        parser.error('--processes and --accounts must be at least 2')
+
+    exit_code = 0
+    for name, check in (('exclusive', check_exclusive), ('takeover', check_takeover)):
+        print(f"[HARNESS] {name}...", file=sys.stderr)
+        failures = check(args)
+        for failure in failures:
+            print(f"[FAIL] {name}: {failure}")
+        if failures:
+            exit_code = 1
+        else:
+            print(f"[PASS] {name}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import sys
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import auto_reset_credits_advanced as gac  # noqa: E402
+from benchmark_reset import reset_process_state  # noqa: E402
+from gaccode_api_stub import StubServer  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_process_state():
+    """Every test starts without shared tokens, breakers, rate buckets or announcements"""
+    reset_process_state()
+    yield
+    reset_process_state()
+
+
+@pytest.fixture
+def stub():
+    """Stub API; tests change its behaviour through stub.state.config"""
+    with StubServer({'seed': 1}) as server:
+        yield server
+
+
+@pytest.fixture
+def write_account(tmp_path, stub):
+    """
+    Write an account config pointing at the stub
+
+    Every directory is a separate config directory (own token cache and
+    state database), like a separate host.
+    """
+    def write(directory='accounts', email='tester@example.com', **overrides):
+        path = tmp_path / directory / f"{email.split('@')[0]}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        config = {
+            'email': email,
+            'password': 'secret',
+            'base_url': stub.base_url,
+            'email_alerts': {'enabled': False},
+            'rate_limit': {'enabled': False},
+            'retry_config': {'max_retries': 3, 'retry_delay': 0.01, 'max_delay': 0.05},
+        }
+        config.update(overrides)
+        path.write_text(json.dumps(config), encoding='utf-8')
+        return str(path)
+    return write
+
+
+def run_bot(config_path, **run_kwargs):
+    """One run() of a fresh CreditResetBot; returns (result, bot)"""
+    bot = gac.CreditResetBot(gac.load_config(config_path), config_file_path=config_path)
+    return bot.run(**run_kwargs), bot
+
+
+def journal_states(config_path):
+    """States of the ticket journal entries next to a config, oldest first"""
+    path = Path(config_path).parent / gac.STATE_DB_FILENAME
+    with sqlite3.connect(path) as conn:
+        return [state for state, in conn.execute("SELECT state FROM ticket_journal ORDER BY id")]
+
+
+def requests_to(stub, endpoint):
+    """Number of requests the stub answered on an endpoint"""
+    return sum(stub.state.snapshot()['endpoints'].get(endpoint, {}).values())
@@ -0,0 +1,95 @@
+import email
+import sqlite3
+import smtplib
+from email.header import decode_header, make_header
+from pathlib import Path
+
+import pytest
+
+import auto_reset_credits_advanced as gac
+from conftest import run_bot
+
+
+EMAIL_ALERTS = {
+    'enabled': True,
+    'smtp_server': 'smtp.example.com',
+    'smtp_user': 'alerts@example.com',
+    'smtp_password': 'secret',
+    'from_email': 'alerts@example.com',
+    'to_email': 'owner@example.com',
+}
+
+
+class FakeSMTP:
+    """SMTP connection recording sent mail, or failing every send"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.sent = []
+
+    def sendmail(self, from_email, to_emails, message):
+        if self.fail:
+            raise smtplib.SMTPDataError(554, b'rejected')
+        self.sent.append(message)
+
+    def quit(self):
+        pass
+
+    def announcement_emails(self):
+        subjects = [str(make_header(decode_header(email.message_from_string(message)['Subject'])))
+                    for message in self.sent]
+        return [subject for subject in subjects if '系统公告' in subject]
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    """Fresh alert dispatcher delivering to a FakeSMTP"""
+    server = FakeSMTP()
+    dispatcher = gac.AlertDispatcher()
+    monkeypatch.setattr(dispatcher, '_connect', lambda email_config: server)
+    monkeypatch.setattr(gac, 'ALERT_DISPATCHER', dispatcher)
+    return server
+
+
+def seen_announcements(config_path):
+    path = Path(config_path).parent / gac.STATE_DB_FILENAME
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM seen_announcements").fetchone()[0]
+
+
+def test_announcements_are_marked_after_the_email_was_sent(stub, write_account, smtp):
+    config_path = write_account(email_alerts=EMAIL_ALERTS)
+
+    run_bot(config_path, force_server_check=True)
+    assert gac.ALERT_DISPATCHER.flush(timeout=10)
+
+    assert len(smtp.announcement_emails()) == 1
+    assert seen_announcements(config_path) == 1
+
+
+def test_failed_send_leaves_announcements_for_the_next_run(stub, write_account, smtp):
+    config_path = write_account(email_alerts=EMAIL_ALERTS)
+    smtp.fail = True
+    run_bot(config_path, force_server_check=True)
+    gac.ALERT_DISPATCHER.flush(timeout=10)
+    assert seen_announcements(config_path) == 0
+
+    smtp.fail = False
+    run_bot(config_path, force_server_check=True)
+    assert gac.ALERT_DISPATCHER.flush(timeout=10)
+
+    assert len(smtp.announcement_emails()) == 1
+    assert seen_announcements(config_path) == 1
+
+
+def test_announcements_are_kept_while_alerts_are_off(stub, write_account, smtp):
+    config_path = write_account()
+    run_bot(config_path, force_server_check=True)
+    assert seen_announcements(config_path) == 0
+
+    config_path = write_account(email_alerts=EMAIL_ALERTS)
+    run_bot(config_path, force_server_check=True)
+    assert gac.ALERT_DISPATCHER.flush(timeout=10)
+
+    assert len(smtp.announcement_emails()) == 1
+    assert seen_announcements(config_path) == 1
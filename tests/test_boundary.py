@@ -0,0 +1,65 @@
+import os
+from pathlib import Path
+
+import auto_reset_credits_advanced as gac
+from conftest import run_bot, requests_to
+
+
+# Started this long after a boundary, run_boundary() still fires for it
+LATE_WINDOW = 86400
+
+
+def boundary_accounts(config_path):
+    return [('tester', gac.load_config(config_path), config_path, None)]
+
+
+def test_late_start_fires_for_the_passed_boundary(stub, write_account):
+    config_path = write_account()
+
+    assert gac.run_boundary(boundary_accounts(config_path), late_window=LATE_WINDOW) == 0
+    assert stub.state.snapshot()['tickets_created'] == 1
+
+
+def test_late_start_skips_an_account_reset_today(stub, write_account):
+    config_path = write_account()
+    assert run_bot(config_path)[0] is True
+    # Without local state only the server's ticket list knows about the reset
+    os.remove(Path(config_path).parent / gac.STATE_DB_FILENAME)
+
+    assert gac.run_boundary(boundary_accounts(config_path), late_window=LATE_WINDOW) == 0
+    assert gac.run_boundary(boundary_accounts(config_path), late_window=LATE_WINDOW) == 0
+    assert stub.state.snapshot()['tickets_created'] == 1
+    assert requests_to(stub, 'POST /tickets') == 1
+
+
+def test_late_start_skips_an_account_reset_by_another_runner(stub, write_account, tmp_path):
+    lease_db = f"sqlite:///{tmp_path / 'leases.db'}"
+    for runner in ('runner1', 'runner2'):
+        coordinator = gac.LeaseCoordinator(gac.open_lease_backend(lease_db), owner=runner)
+        config_path = write_account(directory=runner)
+        assert gac.run_boundary(boundary_accounts(config_path), late_window=LATE_WINDOW,
+                                coordinator=coordinator) == 0
+
+    assert stub.state.snapshot()['tickets_created'] == 1
+
+
+def test_logins_throttled_past_the_boundary_are_reported(stub, write_account, monkeypatch, caplog, tmp_path):
+    metrics = gac.MetricsRegistry()
+    metrics.configure(json_path=str(tmp_path / 'metrics.json'))
+    monkeypatch.setattr(gac, 'METRICS', metrics)
+    boundary = gac.datetime.now(gac.timezone.utc) + gac.timedelta(seconds=2)
+    monkeypatch.setattr(gac, 'next_utc_midnight', lambda now=None: boundary)
+    # One login per second: four logins cannot finish within the 1 s lead
+    throttled = {'enabled': True, 'endpoints': {'POST /login': {'rate': 1, 'burst': 1}}}
+    accounts = []
+    for idx in range(4):
+        config_path = write_account(email=f'user{idx}@example.com', rate_limit=throttled)
+        accounts.append((f'user{idx}', gac.load_config(config_path), config_path, None))
+
+    assert gac.run_boundary(accounts, lead=1, late_window=0) == 0
+
+    assert stub.state.snapshot()['tickets_created'] == 4
+    assert 'raise --snipe-lead' in caplog.text
+    late = {run['account']: run['prepared_late'] for run in metrics.report()['runs'] if 'prepared_late' in run}
+    assert len(late) >= 2 and all(seconds > 0 for seconds in late.values())
+    assert caplog.text.count('the ticket is submitted late') == len(late)
@@ -0,0 +1,42 @@
+import json
+from datetime import datetime, timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+
+import auto_reset_credits_advanced as gac
+
+
+def probe(config_path, cassette):
+    bot = gac.CreditResetBot(gac.load_config(config_path), config_file_path=config_path)
+    bot.use_cassette(cassette)
+    skew = gac.ClockSkew()
+    bot.probe_clock(skew, samples=4, spacing=0.01)
+    return skew
+
+
+def test_date_header_is_recorded(stub, write_account, tmp_path):
+    cassette = gac.HTTPCassette(str(tmp_path / 'run.json'), 'record')
+
+    skew = probe(write_account(), cassette)
+
+    assert skew.samples == 4
+    assert all('Date' in interaction['headers'] for interaction in cassette.interactions)
+
+
+def test_replay_keeps_the_recorded_clock_offset(stub, write_account, tmp_path):
+    path = tmp_path / 'run.json'
+    cassette = gac.HTTPCassette(str(path), 'record')
+    probe(write_account(), cassette)
+    cassette.save()
+
+    # Recorded an hour ago against a server clock running 30 s ahead
+    data = json.loads(path.read_text(encoding='utf-8'))
+    data['recorded_at'] = (datetime.fromisoformat(data['recorded_at']) - timedelta(hours=1)).isoformat()
+    for interaction in data['interactions']:
+        recorded = parsedate_to_datetime(interaction['headers']['Date'])
+        interaction['headers']['Date'] = format_datetime(recorded - timedelta(hours=1, seconds=-30), usegmt=True)
+    path.write_text(json.dumps(data), encoding='utf-8')
+
+    skew = probe(write_account(directory='replay'), gac.HTTPCassette(str(path), 'replay'))
+
+    assert skew.samples == 4
+    assert abs(skew.offset - 30) < 2
@@ -0,0 +1,42 @@
+from conftest import run_bot, journal_states, requests_to
+
+
+def test_reads_are_retried(stub, write_account):
+    stub.state.config['endpoints'] = {'GET /tickets': {'error_rate': 1.0}}
+    config_path = write_account()
+
+    result, bot = run_bot(config_path)
+
+    assert result is False
+    # The first attempt and max_retries retries; the run aborts without the ticket list
+    assert requests_to(stub, 'GET /tickets') == 4
+    assert requests_to(stub, 'POST /tickets') == 0
+    assert bot.last_result[0] == 'error'
+
+
+def test_transient_read_error_recovers(stub, write_account, monkeypatch):
+    # The first two subscription requests fail, the third succeeds
+    failures = iter([1.0, 1.0])
+    setting = stub.state.setting
+    monkeypatch.setattr(stub.state, 'setting', lambda endpoint, key: next(failures, 0.0)
+                        if (endpoint, key) == ('GET /subscriptions/active', 'error_rate') else setting(endpoint, key))
+    config_path = write_account()
+
+    result, _ = run_bot(config_path)
+
+    assert result is True
+    assert requests_to(stub, 'GET /subscriptions/active') == 3
+    assert stub.state.snapshot()['tickets_created'] == 1
+
+
+def test_ticket_is_not_resent_after_server_error(stub, write_account):
+    stub.state.config['endpoints'] = {'POST /tickets': {'error_rate': 1.0}}
+    config_path = write_account()
+
+    result, _ = run_bot(config_path)
+
+    assert result is False
+    # A 5xx means the request reached the server; it may have created the ticket
+    assert requests_to(stub, 'POST /tickets') == 1
+    assert journal_states(config_path) == ['intent']
+
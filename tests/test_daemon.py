@@ -0,0 +1,39 @@
+import time
+import threading
+
+import auto_reset_credits_advanced as gac
+
+
+class CountingEvent(threading.Event):
+    """Stop event counting the waits of the daemon loop"""
+
+    def __init__(self):
+        super().__init__()
+        self.waits = 0
+
+    def wait(self, timeout=None):
+        self.waits += 1
+        return super().wait(timeout)
+
+
+def test_serve_does_not_spin_while_a_run_is_in_flight(stub, write_account):
+    stub.state.config['close_delay'] = 2.0
+    daemon = gac.ResetDaemon(write_account())
+    daemon._stop = CountingEvent()
+    server = threading.Thread(target=daemon.serve)
+
+    loaded_at = gac.datetime.now(gac.timezone.utc)
+    started = time.monotonic()
+    server.start()
+    # schedule() moves the account to the next day once its run finished
+    while daemon.next_run.get('tester', loaded_at) <= loaded_at + gac.timedelta(minutes=1):
+        assert time.monotonic() - started < 30, 'the run did not finish'
+        time.sleep(0.05)
+    elapsed = time.monotonic() - started
+    daemon.stop()
+    server.join(timeout=10)
+
+    assert stub.state.snapshot()['tickets_created'] == 1
+    assert elapsed >= 2.0
+    # One wake-up per 0.5 s poll while the ticket closes, plus a few for scheduling
+    assert daemon._stop.waits <= elapsed / 0.5 + 5
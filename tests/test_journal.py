@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import auto_reset_credits_advanced as gac
+from conftest import run_bot, journal_states, requests_to
+
+
+def lose_ticket_response(stub, config_path):
+    """A run whose POST /tickets fails with a 5xx, leaving an in-flight journal entry"""
+    stub.state.config['endpoints'] = {'POST /tickets': {'error_rate': 1.0}}
+    result, _ = run_bot(config_path)
+    stub.state.config['endpoints'] = {}
+    assert result is False
+    assert journal_states(config_path) == ['intent']
+
+
+def test_unconfirmed_submission_blocks_a_second_ticket(stub, write_account):
+    config_path = write_account()
+    lose_ticket_response(stub, config_path)
+
+    result, bot = run_bot(config_path)
+
+    assert result is False
+    assert bot.last_result == ('error', 'earlier submission not confirmed yet')
+    assert requests_to(stub, 'POST /tickets') == 1
+    assert journal_states(config_path) == ['intent']
+
+
+def test_absent_submission_is_settled_after_the_grace_period(stub, write_account):
+    config_path = write_account(state_store={'journal_grace': 0})
+    lose_ticket_response(stub, config_path)
+
+    result, _ = run_bot(config_path)
+
+    assert result is True
+    assert stub.state.snapshot()['tickets_created'] == 1
+    assert journal_states(config_path) == ['absent', 'closed']
+
+
+def test_submission_that_reached_the_server_is_confirmed(stub, write_account):
+    config_path = write_account()
+    # The process died after POST /tickets reached the server: the journal
+    # holds the intent and the server holds the ticket
+    store = gac.StateStore(str(Path(config_path).parent / gac.STATE_DB_FILENAME))
+    store.journal_intent('tester@example.com')
+    assert run_bot(write_account(directory='elsewhere'))[0] is True
+
+    result, bot = run_bot(config_path)
+
+    assert result is True
+    assert bot.last_result[0] == 'already_reset'
+    assert journal_states(config_path) == ['created']
+    assert stub.state.snapshot()['tickets_created'] == 1
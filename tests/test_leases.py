@@ -0,0 +1,64 @@
+import threading
+
+import auto_reset_credits_advanced as gac
+
+
+def coordinator(tmp_path, owner):
+    return gac.LeaseCoordinator(gac.open_lease_backend(f"sqlite:///{tmp_path / 'leases.db'}"), owner=owner)
+
+
+def run_account(config_path, runner):
+    return gac.run_account('tester', gac.load_config(config_path), config_path, {}, coordinator=runner)
+
+
+def test_acquire_is_exclusive_across_runners(tmp_path):
+    backend = gac.SQLiteLeaseBackend(str(tmp_path / 'leases.db'))
+    barrier = threading.Barrier(8)
+    acquired = []
+
+    def claim(owner):
+        barrier.wait()
+        acquired.append(backend.acquire('tester@example.com:2025-01-01', owner, 600)[0])
+
+    threads = [threading.Thread(target=claim, args=(f'runner{idx}',)) for idx in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(acquired) == [False] * 7 + [True]
+
+
+def test_account_is_reset_by_one_runner_only(stub, write_account, tmp_path):
+    # Separate config directories: only the lease keeps the runners apart
+    first = run_account(write_account(directory='host1'), coordinator(tmp_path, 'runner1'))
+    second = run_account(write_account(directory='host2'), coordinator(tmp_path, 'runner2'))
+
+    assert first['status'] == 'success'
+    assert second == {'account': 'tester', 'status': 'already_reset',
+                      'reason': 'reset today by runner runner1', 'duration': 0.0}
+    assert stub.state.snapshot()['tickets_created'] == 1
+
+
+def test_live_lease_blocks_other_runners(stub, write_account, tmp_path):
+    holder = coordinator(tmp_path, 'runner1')
+    held = holder.acquire('tester@example.com')
+    assert held.acquired
+
+    result = run_account(write_account(), coordinator(tmp_path, 'runner2'))
+    holder.release(held)
+
+    assert result['status'] == 'leased'
+    assert result['reason'] == 'claimed by runner runner1'
+    assert stub.state.snapshot()['tickets_created'] == 0
+
+
+def test_expired_lease_is_taken_over(stub, write_account, tmp_path):
+    # A runner that crashed while holding the lease, which expired a minute ago
+    day = gac.datetime.now(gac.timezone.utc).date().isoformat()
+    gac.SQLiteLeaseBackend(str(tmp_path / 'leases.db')).acquire(f'tester@example.com:{day}', 'crashed', -60)
+
+    result = run_account(write_account(), coordinator(tmp_path, 'runner2'))
+
+    assert result['status'] == 'success'
+    assert stub.state.snapshot()['tickets_created'] == 1
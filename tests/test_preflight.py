@@ -0,0 +1,90 @@
+import time
+import asyncio
+
+import pytest
+
+import auto_reset_credits_advanced as gac
+from conftest import run_bot, requests_to
+
+
+PREFLIGHT_READS = ('GET /subscriptions/active', 'GET /tickets', 'GET /tickets/recaptcha-required')
+
+
+def test_concurrent_preflight_resets(stub, write_account):
+    result, bot = run_bot(write_account(), concurrent_preflight=True)
+
+    assert result is True
+    assert bot.last_result[0] == 'success'
+    assert stub.state.snapshot()['tickets_created'] == 1
+
+
+def test_concurrent_preflight_stops_when_already_reset(stub, write_account):
+    # Reset from another config directory, so only the server knows about it
+    assert run_bot(write_account(directory='elsewhere'))[0] is True
+
+    result, bot = run_bot(write_account(), concurrent_preflight=True)
+
+    assert result is True
+    assert bot.last_result[0] == 'already_reset'
+    assert requests_to(stub, 'POST /tickets') == 1
+
+
+@pytest.mark.parametrize('config', [
+    {'requires_recaptcha': True},
+    {'endpoints': {'POST /tickets': {'daily_limit': 0}}},
+], ids=['recaptcha', 'daily_limit'])
+def test_concurrent_preflight_stops_without_a_ticket(stub, write_account, config):
+    stub.state.config.update(config)
+
+    result, bot = run_bot(write_account(), concurrent_preflight=True)
+
+    assert result is False
+    assert bot.last_result[0] == 'error'
+    assert requests_to(stub, 'POST /tickets') == 0
+
+
+@pytest.mark.parametrize('endpoint', PREFLIGHT_READS)
+def test_concurrent_preflight_stops_on_a_network_error(stub, write_account, endpoint):
+    stub.state.config['endpoints'] = {endpoint: {'error_rate': 1.0}}
+
+    result, _ = run_bot(write_account(), concurrent_preflight=True)
+
+    assert result is False
+    assert requests_to(stub, endpoint) == 4
+    assert requests_to(stub, 'POST /tickets') == 0
+
+
+def timed_run(config_path, **run_kwargs):
+    started = time.monotonic()
+    result, _ = run_bot(config_path, check_announcements=False, **run_kwargs)
+    return result, time.monotonic() - started
+
+
+def test_preflight_reads_overlap(stub, write_account):
+    stub.state.config['endpoints'] = {endpoint: {'latency': 0.3} for endpoint in PREFLIGHT_READS}
+
+    sequential = timed_run(write_account(directory='sequential'))
+    concurrent = timed_run(write_account(directory='concurrent', email='other@example.com'),
+                           concurrent_preflight=True)
+
+    assert sequential[0] is True and concurrent[0] is True
+    assert sequential[1] >= 0.9
+    # The three reads take one round trip instead of three
+    assert concurrent[1] < 0.75
+
+
+def test_async_preflight_reads_overlap(stub, write_account):
+    pytest.importorskip('aiohttp')
+    stub.state.config['endpoints'] = {endpoint: {'latency': 0.3} for endpoint in PREFLIGHT_READS}
+    config_path = write_account()
+
+    async def run():
+        async with gac.AsyncCreditResetBot(gac.load_config(config_path), config_path) as bot:
+            started = time.monotonic()
+            result = await bot.run(check_announcements=False, concurrent_preflight=True)
+            return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(run())
+
+    assert result is True
+    assert elapsed < 0.75